@@ -0,0 +1,225 @@
+"""
+Pending Order Book for Backtesting
+
+Keeps resting limit, stop-loss and take-profit orders sorted by price level so
+each bar only touches the levels its high/low actually crossed.
+"""
+
+import bisect
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Order types that can rest in the book until their price is reached
+RESTING_ORDER_TYPES = ('limit', 'stop-loss', 'take-profit')
+
+
+@dataclass
+class PendingOrder:
+    """A resting order waiting for its trigger price"""
+    txid: str
+    pair: str
+    side: str  # 'buy' or 'sell'
+    order_type: str  # 'limit', 'stop-loss' or 'take-profit'
+    price: float
+    volume: float
+    created_at: Optional[datetime] = None
+    oco_group: Optional[str] = None  # Orders sharing a group cancel each other on fill
+    
+    @property
+    def triggers_on_fall(self) -> bool:
+        """True if the order triggers when price trades down to its level"""
+        if self.order_type == 'stop-loss':
+            return self.side == 'sell'
+        # Limit and take-profit buys rest below the market, sells above it
+        return self.side == 'buy'
+        
+
+class PriceLevels:
+    """
+    One side of a pair's book: orders grouped per price level
+    
+    Level prices are kept in a sorted list, so finding the crossed levels is a
+    binary search and removing them touches only the filled levels.
+    """
+    
+    def __init__(self):
+        self.prices: List[float] = []
+        self.levels: Dict[float, List[PendingOrder]] = {}
+        
+    def __len__(self) -> int:
+        return len(self.prices)
+        
+    def add(self, order: PendingOrder):
+        """Add an order at its price level"""
+        level = self.levels.get(order.price)
+        if level is None:
+            bisect.insort(self.prices, order.price)
+            self.levels[order.price] = [order]
+        else:
+            level.append(order)
+            
+    def remove(self, order: PendingOrder) -> bool:
+        """Remove a single order, dropping its level if it becomes empty"""
+        level = self.levels.get(order.price)
+        if not level or order not in level:
+            return False
+            
+        level.remove(order)
+        if not level:
+            del self.levels[order.price]
+            del self.prices[bisect.bisect_left(self.prices, order.price)]
+        return True
+        
+    def pop_at_or_above(self, price: float) -> List[PendingOrder]:
+        """Remove and return orders priced >= price, highest level first"""
+        index = bisect.bisect_left(self.prices, price)
+        crossed = self.prices[index:]
+        del self.prices[index:]
+        return [order for p in reversed(crossed) for order in self.levels.pop(p)]
+        
+    def pop_at_or_below(self, price: float) -> List[PendingOrder]:
+        """Remove and return orders priced <= price, lowest level first"""
+        index = bisect.bisect_right(self.prices, price)
+        crossed = self.prices[:index]
+        del self.prices[:index]
+        return [order for p in crossed for order in self.levels.pop(p)]
+        
+
+class PendingOrderBook:
+    """
+    Resting orders for all pairs, matched against each bar's high/low
+    
+    The bid side holds orders triggered by falling prices (buy limits, sell
+    stops, buy take-profits) and the ask side those triggered by rising prices.
+    """
+    
+    def __init__(self):
+        self._bids: Dict[str, PriceLevels] = {}
+        self._asks: Dict[str, PriceLevels] = {}
+        self._orders: Dict[str, PendingOrder] = {}
+        self._oco_groups: Dict[str, Set[str]] = {}
+        
+    def __len__(self) -> int:
+        return len(self._orders)
+        
+    def __contains__(self, txid: str) -> bool:
+        return txid in self._orders
+        
+    def clear(self):
+        """Drop all resting orders"""
+        self._bids.clear()
+        self._asks.clear()
+        self._orders.clear()
+        self._oco_groups.clear()
+        
+    def add(self, order: PendingOrder):
+        """Rest a new order in the book"""
+        if order.order_type not in RESTING_ORDER_TYPES:
+            raise ValueError(f"Order type cannot rest in the book: {order.order_type}")
+            
+        book = self._bids if order.triggers_on_fall else self._asks
+        book.setdefault(order.pair, PriceLevels()).add(order)
+        self._orders[order.txid] = order
+        
+        if order.oco_group:
+            self._oco_groups.setdefault(order.oco_group, set()).add(order.txid)
+            
+    def cancel(self, txid: str) -> Optional[PendingOrder]:
+        """Cancel an order by txid, returning it if it was still open"""
+        order = self._orders.pop(txid, None)
+        if order is None:
+            return None
+            
+        book = self._bids if order.triggers_on_fall else self._asks
+        book[order.pair].remove(order)
+        self._leave_oco_group(order)
+        return order
+        
+    def get_order(self, txid: str) -> Optional[PendingOrder]:
+        """Look up an open order"""
+        return self._orders.get(txid)
+        
+    def open_orders(self, pair: Optional[str] = None) -> List[PendingOrder]:
+        """List open orders, optionally for one pair"""
+        return [
+            order for order in self._orders.values()
+            if pair is None or order.pair == pair
+        ]
+        
+    def has_orders(self, pair: str) -> bool:
+        """Check whether a pair has any resting orders"""
+        return bool(self._bids.get(pair)) or bool(self._asks.get(pair))
+        
+    def match(
+        self,
+        pair: str,
+        open_price: float,
+        high: float,
+        low: float,
+        close: float
+    ) -> List[Tuple[PendingOrder, float]]:
+        """
+        Find the resting orders one bar triggers
+        
+        The bar is assumed to travel open -> low -> high -> close when it closes
+        up, and open -> high -> low -> close otherwise. Returns (order, reference
+        price) pairs in path order; the reference price is the order price, or
+        the open if the bar gapped through the level.
+        
+        Triggered orders leave their price levels but stay open until the
+        caller settles each one with ``fill`` or ``cancel``, so an OCO group is
+        only resolved by a fill that actually happens. Skip orders that are no
+        longer open, i.e. cancelled by a sibling filled earlier in the bar.
+        """
+        bids = self._bids.get(pair)
+        asks = self._asks.get(pair)
+        
+        legs = [(bids, True), (asks, False)]
+        if close < open_price:
+            legs.reverse()
+            
+        fills = []
+        for levels, falling in legs:
+            if not levels:
+                continue
+                
+            if falling:
+                for order in levels.pop_at_or_above(low):
+                    fills.append((order, min(order.price, open_price)))
+            else:
+                for order in levels.pop_at_or_below(high):
+                    fills.append((order, max(order.price, open_price)))
+                    
+        return fills
+        
+    def fill(self, order: PendingOrder) -> List[PendingOrder]:
+        """Close a filled order, cancelling and returning its OCO siblings"""
+        if self._orders.pop(order.txid, None) is None:
+            return []
+            
+        cancelled = []
+        if order.oco_group:
+            for txid in list(self._oco_groups.get(order.oco_group, ())):
+                sibling = self.cancel(txid) if txid != order.txid else None
+                if sibling is not None:
+                    logger.debug(f"OCO: cancelled {txid} after {order.txid} filled")
+                    cancelled.append(sibling)
+                    
+        self._leave_oco_group(order)
+        return cancelled
+        
+    def _leave_oco_group(self, order: PendingOrder):
+        """Remove an order from its OCO group bookkeeping"""
+        if not order.oco_group:
+            return
+            
+        group = self._oco_groups.get(order.oco_group)
+        if group is not None:
+            group.discard(order.txid)
+            if not group:
+                del self._oco_groups[order.oco_group]
+                
\ No newline at end of file
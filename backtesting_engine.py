@@ -7,14 +7,87 @@ Provides intuitive backtesting with realistic market simulation.
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Callable, Dict, List, Optional, Tuple, Any, Union
 from dataclasses import dataclass, field
 import json
 import logging
 from collections import defaultdict
 
+from backtest_order_book import PendingOrder, PendingOrderBook, RESTING_ORDER_TYPES
+
 logger = logging.getLogger(__name__)
 
+# Column layout of the aligned OHLCV tensor used by the columnar simulation
+OHLCV_COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+_OHLCV_INDEX = {name: i for i, name in enumerate(OHLCV_COLUMNS)}
+
+SIMULATION_MODES = ('columnar', 'loop')
+
+
+class _BarView:
+    """
+    Lightweight read-only view of one pair's bar in the aligned OHLCV tensor.
+    
+    Supports the subset of ``pd.Series`` used by strategies and the mock API:
+    column lookup (``bar['close']``) and ``bar.name`` for the bar timestamp.
+    Values are read from the tensor on lookup, so building a view per pair
+    per bar costs no array slicing.
+    """
+    __slots__ = ('_ohlcv', '_i', '_j', 'name')
+    
+    def __init__(self, ohlcv: np.ndarray, i: int, j: int, name: pd.Timestamp):
+        self._ohlcv = ohlcv
+        self._i = i
+        self._j = j
+        self.name = name
+    
+    def __getitem__(self, key: str):
+        return self._ohlcv[self._i, self._j, _OHLCV_INDEX[key]]
+    
+    def __contains__(self, key: str) -> bool:
+        return key in _OHLCV_INDEX
+    
+    def get(self, key: str, default=None):
+        index = _OHLCV_INDEX.get(key)
+        return default if index is None else self._ohlcv[self._i, self._j, index]
+
+
+@dataclass
+class SignalArrays:
+    """
+    Precomputed long-only signals for one pair over its full history
+    
+    Strategies may implement ``generate_signals(pair, ohlcv) -> SignalArrays``
+    next to ``analyze()``. When they do, the columnar simulation executes the
+    whole history in one pass; returning None keeps the per-bar ``analyze()``
+    loop. Orders fill at the signal bar's close, like ``analyze()`` signals.
+    """
+    entries: np.ndarray  # bool per bar: open a position at this bar
+    exits: np.ndarray    # bool per bar: close the open position at this bar
+    size_pct: Union[float, np.ndarray] = 0.10  # Fraction of cash committed per entry
+    
+
+def first_true(
+    predicate: Callable[[slice], np.ndarray],
+    start: int,
+    stop: int,
+    chunk_size: int = 256
+) -> Optional[int]:
+    """
+    Find the first index in [start, stop) where ``predicate`` holds
+    
+    The predicate is evaluated on growing slices, so the cost is proportional
+    to the distance scanned rather than to the remaining history.
+    """
+    while start < stop:
+        end = min(start + chunk_size, stop)
+        hits = np.flatnonzero(predicate(slice(start, end)))
+        if len(hits):
+            return start + int(hits[0])
+        start = end
+        chunk_size *= 2
+    return None
+    
 
 @dataclass
 class Trade:
@@ -94,19 +167,26 @@ class BacktestingEngine:
         initial_capital: float = 10000,
         fee_rate: float = 0.0026,  # Kraken's default fee
         slippage_pct: float = 0.001,  # 0.1% slippage
-        risk_free_rate: float = 0.02  # 2% annual risk-free rate
+        risk_free_rate: float = 0.02,  # 2% annual risk-free rate
+        simulation_mode: str = 'columnar'  # 'columnar' or 'loop'
     ):
+        if simulation_mode not in SIMULATION_MODES:
+            raise ValueError(f"Unknown simulation mode: {simulation_mode}")
+            
         self.initial_capital = initial_capital
         self.current_capital = initial_capital
         self.fee_rate = fee_rate
         self.slippage_pct = slippage_pct
         self.risk_free_rate = risk_free_rate
+        self.simulation_mode = simulation_mode
         
         # State tracking
         self.positions: Dict[str, Position] = {}
         self.trades: List[Trade] = []
         self.equity_curve: List[Dict] = []
-        self.pending_orders: Dict[str, Dict] = {}
+        self.pending_orders = PendingOrderBook()
+        self.closed_orders: Dict[str, Dict] = {}
+        self._order_sequence = 0
         
         # Historical data cache
         self.data_cache: Dict[str, pd.DataFrame] = {}
@@ -154,9 +234,15 @@ class BacktestingEngine:
         pairs: List[str],
         start_date: datetime,
         end_date: datetime,
+        market_data: Optional[Dict[str, pd.DataFrame]] = None,
         **strategy_params
     ) -> BacktestResult:
-        """Run backtest for a strategy"""
+        """
+        Run backtest for a strategy
+        
+        ``market_data`` supplies preloaded OHLCV frames per pair (e.g. shared by
+        an optimizer); they are sliced to the date range instead of reloaded.
+        """
         logger.info(f"Starting backtest from {start_date} to {end_date}")
         
         # Reset state
@@ -164,11 +250,16 @@ class BacktestingEngine:
         self.positions.clear()
         self.trades.clear()
         self.equity_curve.clear()
+        self.pending_orders.clear()
+        self.closed_orders.clear()
         
         # Load data for all pairs
         data = {}
         for pair in pairs:
-            data[pair] = self.load_historical_data(pair, start_date, end_date)
+            if market_data is not None:
+                data[pair] = market_data[pair].loc[start_date:end_date]
+            else:
+                data[pair] = self.load_historical_data(pair, start_date, end_date)
             
         # Create strategy instance with mock API
         strategy = strategy_class(
@@ -176,6 +267,12 @@ class BacktestingEngine:
             **strategy_params
         )
         
+        if self.simulation_mode == 'columnar':
+            signals = self._generate_signal_arrays(strategy, data)
+            if signals is not None:
+                return self._run_signal_arrays(data, signals, start_date, end_date)
+            return self._run_columnar(strategy, data, start_date, end_date)
+            
         # Get all timestamps
         all_timestamps = sorted(set(
             ts for df in data.values() for ts in df.index
@@ -193,6 +290,10 @@ class BacktestingEngine:
             if not current_data:
                 continue
                 
+            # Fill resting orders crossed by this bar
+            if self.pending_orders:
+                self._match_pending_orders(current_data)
+                
             # Update positions with current prices
             self._update_positions(current_data)
             
@@ -205,49 +306,324 @@ class BacktestingEngine:
                 'positions_value': equity - self.current_capital
             })
             
-            # Execute strategy
-            try:
-                # Simulate strategy decision making
-                self.current_prices = current_data
-                strategy.current_timestamp = timestamp
-                
-                # Call strategy's analyze method if it exists
-                if hasattr(strategy, 'analyze'):
-                    signals = strategy.analyze(current_data)
-                    
-                    # Execute trades based on signals
-                    for signal in signals:
-                        if signal['action'] == 'buy':
-                            self.create_order(
-                                pair=signal['pair'],
-                                side='buy',
-                                order_type='market',
-                                volume=signal['volume']
-                            )
-                        elif signal['action'] == 'sell':
-                            self.create_order(
-                                pair=signal['pair'],
-                                side='sell',
-                                order_type='market',
-                                volume=signal['volume']
-                            )
-                            
-            except Exception as e:
-                logger.error(f"Strategy error at {timestamp}: {e}")
+            self._run_strategy_step(strategy, current_data, timestamp)
                 
         # Calculate final results
         return self._calculate_results(start_date, end_date)
         
+    def align_market_data(
+        self,
+        data: Dict[str, pd.DataFrame]
+    ) -> Tuple[pd.DatetimeIndex, np.ndarray, np.ndarray]:
+        """
+        Align all pairs onto one timeline as a contiguous OHLCV tensor
+        
+        Returns:
+            (timestamps, ohlcv, present) where ``ohlcv`` has shape
+            (timestamps x pairs x OHLCV) in ``OHLCV_COLUMNS`` order and
+            ``present`` marks which pairs have a bar at each timestamp.
+        """
+        pairs = list(data.keys())
+        
+        timestamps = None
+        for df in data.values():
+            timestamps = df.index if timestamps is None else timestamps.union(df.index)
+        timestamps = timestamps.sort_values() if timestamps is not None else pd.DatetimeIndex([])
+        
+        ohlcv = np.full((len(timestamps), len(pairs), len(OHLCV_COLUMNS)), np.nan)
+        present = np.zeros((len(timestamps), len(pairs)), dtype=bool)
+        
+        for j, pair in enumerate(pairs):
+            df = data[pair]
+            rows = timestamps.get_indexer(df.index)
+            ohlcv[rows, j, :] = df[list(OHLCV_COLUMNS)].to_numpy(dtype=np.float64)
+            present[rows, j] = True
+            
+        return timestamps, ohlcv, present
+        
+    def _run_columnar(
+        self,
+        strategy,
+        data: Dict[str, pd.DataFrame],
+        start_date: datetime,
+        end_date: datetime
+    ) -> BacktestResult:
+        """
+        Walk bar indices over the aligned OHLCV tensor
+        
+        Held volumes and mark prices live in per-pair arrays, so marking to
+        market and equity are one dot product per bar instead of a pass over
+        the Position objects. Open positions still get the bar's marks before
+        the strategy runs, so it sees the same ledger as in the per-bar loop.
+        """
+        pairs = list(data.keys())
+        pair_index = {pair: j for j, pair in enumerate(pairs)}
+        timestamps, ohlcv, present = self.align_market_data(data)
+        n_bars = len(timestamps)
+        closes = ohlcv[:, :, _OHLCV_INDEX['close']]
+        
+        # Preallocated state arrays
+        equity = np.empty(n_bars)
+        cash = np.empty(n_bars)
+        volumes = np.zeros(len(pairs))
+        marks = np.zeros(len(pairs))
+        held = np.empty(0, dtype=np.intp)  # Held pairs in self.positions order
+        
+        all_pairs = range(len(pairs))
+        full_rows = present.all(axis=1).tolist()
+        bar_times = list(timestamps)
+        
+        def sync_positions(since: int):
+            # Mirror the pairs traded since trade ``since`` into the arrays;
+            # a newly opened position is marked at its fill price
+            nonlocal held
+            if since == len(self.trades):
+                return
+            for trade in self.trades[since:]:
+                j = pair_index.get(trade.pair)
+                if j is None:
+                    continue
+                position = self.positions.get(trade.pair)
+                if position is None:
+                    volumes[j] = 0.0
+                else:
+                    if not volumes[j]:
+                        marks[j] = position.current_price
+                    volumes[j] = position.volume
+            held = np.array([pair_index[pair] for pair in self.positions if pair in pair_index], dtype=np.intp)
+            
+        for i in range(n_bars):
+            timestamp = bar_times[i]
+            full = full_rows[i]
+            pair_indices = all_pairs if full else np.flatnonzero(present[i]).tolist()
+            
+            current_data = {
+                pairs[j]: _BarView(ohlcv, i, j, timestamp) for j in pair_indices
+            }
+            
+            if self.pending_orders:
+                traded = len(self.trades)
+                self._match_pending_orders(current_data)
+                sync_positions(traded)
+                
+            if full:
+                marks[:] = closes[i]
+            else:
+                np.copyto(marks, closes[i], where=present[i])
+                
+            # Sequential sum in position order, as _calculate_equity adds them
+            cash[i] = self.current_capital
+            equity[i] = self.current_capital
+            if len(held):
+                equity[i] += (volumes[held] * marks[held]).cumsum()[-1]
+                self._update_positions(current_data)
+            
+            traded = len(self.trades)
+            self._run_strategy_step(strategy, current_data, timestamp)
+            sync_positions(traded)
+            
+        return self._calculate_results(
+            start_date, end_date,
+            timestamps=timestamps, equity=equity, cash=cash
+        )
+        
+    def _generate_signal_arrays(
+        self,
+        strategy,
+        data: Dict[str, pd.DataFrame]
+    ) -> Optional[Dict[str, SignalArrays]]:
+        """Ask the strategy for precomputed signals, if it supports the fast path"""
+        generate_signals = getattr(strategy, 'generate_signals', None)
+        if not callable(generate_signals):
+            return None
+            
+        signals = {}
+        try:
+            for pair, df in data.items():
+                pair_signals = generate_signals(pair, df)
+                if pair_signals is None:
+                    return None
+                signals[pair] = pair_signals
+        except Exception as e:
+            logger.warning(f"Signal fast path unavailable, using per-bar analyze(): {e}")
+            return None
+            
+        return signals
+        
+    def _run_signal_arrays(
+        self,
+        data: Dict[str, pd.DataFrame],
+        signals: Dict[str, SignalArrays],
+        start_date: datetime,
+        end_date: datetime
+    ) -> BacktestResult:
+        """Execute precomputed entries and exits for the whole history in one pass"""
+        pairs = list(data.keys())
+        timestamps, ohlcv, present = self.align_market_data(data)
+        n_bars = len(timestamps)
+        
+        # Map every pair's signals onto the shared timeline as (bar, pair) events
+        event_bars, event_pairs, event_entry, event_size = [], [], [], []
+        for j, pair in enumerate(pairs):
+            rows = timestamps.get_indexer(data[pair].index)
+            pair_signals = signals[pair]
+            size_pct = np.broadcast_to(
+                np.asarray(pair_signals.size_pct, dtype=float), rows.shape
+            )
+            for mask, is_entry in ((pair_signals.entries, True), (pair_signals.exits, False)):
+                bars = np.flatnonzero(mask)
+                event_bars.append(rows[bars])
+                event_pairs.append(np.full(len(bars), j))
+                event_entry.append(np.full(len(bars), is_entry))
+                event_size.append(size_pct[bars])
+                
+        event_bars = np.concatenate(event_bars) if event_bars else np.empty(0, dtype=int)
+        event_pairs = np.concatenate(event_pairs) if event_pairs else np.empty(0, dtype=int)
+        event_entry = np.concatenate(event_entry) if event_entry else np.empty(0, dtype=bool)
+        event_size = np.concatenate(event_size) if event_size else np.empty(0)
+        
+        # Same ordering as the per-bar loop: by bar, then by pair
+        order = np.lexsort((event_pairs, event_bars))
+        event_bars = event_bars[order]
+        event_pairs = event_pairs[order]
+        
+        cash_after = np.empty(len(order))
+        volume_after = np.empty(len(order))
+        mark_after = np.empty(len(order))
+        signal_bar, signal_cash = -1, self.current_capital
+        
+        for k, e in enumerate(order):
+            i, j = int(event_bars[k]), int(event_pairs[k])
+            pair = pairs[j]
+            if i != signal_bar:
+                # Strategies size every signal of a bar off the cash seen before its fills
+                signal_bar, signal_cash = i, self.current_capital
+            self.current_prices = {pair: _BarView(ohlcv, i, j, timestamps[i])}
+            was_held = pair in self.positions
+            
+            try:
+                if event_entry[e]:
+                    if pair not in self.positions:
+                        close = float(ohlcv[i, j, _OHLCV_INDEX['close']])
+                        self.create_order(
+                            pair=pair,
+                            side='buy',
+                            order_type='market',
+                            volume=signal_cash * event_size[e] / close
+                        )
+                elif pair in self.positions:
+                    self.create_order(
+                        pair=pair,
+                        side='sell',
+                        order_type='market',
+                        volume=self.positions[pair].volume
+                    )
+            except Exception as ex:
+                logger.error(f"Signal execution error at {timestamps[i]}: {ex}")
+                
+            cash_after[k] = self.current_capital
+            volume_after[k] = self.positions[pair].volume if pair in self.positions else 0.0
+            # A position opened on this bar is marked at its fill price, any
+            # other at the bar's close, as _update_positions leaves them
+            if pair in self.positions and not was_held:
+                mark_after[k] = self.positions[pair].current_price
+            else:
+                mark_after[k] = ohlcv[i, j, _OHLCV_INDEX['close']]
+            
+        # Equity at bar i reflects fills from earlier bars, as in the per-bar loop
+        bar_range = np.arange(n_bars)
+        last_event = np.searchsorted(event_bars, bar_range, side='left') - 1
+        cash = np.where(
+            last_event >= 0,
+            np.append(cash_after, self.initial_capital)[last_event],
+            self.initial_capital
+        )
+        
+        # Positions are marked to the last available close of each pair, or
+        # to the mark left by the pair's last event until the pair has a bar
+        closes = pd.DataFrame(ohlcv[:, :, _OHLCV_INDEX['close']]).ffill().to_numpy()
+        last_present = np.maximum.accumulate(
+            np.where(present, bar_range[:, None], -1), axis=0
+        )
+        positions_value = np.zeros(n_bars)
+        for j in range(len(pairs)):
+            in_pair = event_pairs == j
+            if not in_pair.any():
+                continue
+            pair_event_bars = event_bars[in_pair]
+            last_pair_event = np.searchsorted(pair_event_bars, bar_range, side='left') - 1
+            held = np.where(
+                last_pair_event >= 0,
+                np.append(volume_after[in_pair], 0.0)[last_pair_event],
+                0.0
+            )
+            marks = np.where(
+                last_present[:, j] > np.append(pair_event_bars, -1)[last_pair_event],
+                closes[:, j],
+                np.append(mark_after[in_pair], 0.0)[last_pair_event]
+            )
+            positions_value += np.where(held != 0, held * marks, 0.0)
+            
+        return self._calculate_results(
+            start_date, end_date,
+            timestamps=timestamps, equity=cash + positions_value, cash=cash
+        )
+        
+    def _run_strategy_step(self, strategy, current_data: Dict, timestamp) -> None:
+        """Let the strategy react to one bar and execute its signals"""
+        try:
+            # Simulate strategy decision making
+            self.current_prices = current_data
+            strategy.current_timestamp = timestamp
+            
+            # Call strategy's analyze method if it exists
+            if hasattr(strategy, 'analyze'):
+                signals = strategy.analyze(current_data)
+                
+                # Execute trades based on signals
+                for signal in signals:
+                    if signal['action'] in ('buy', 'sell'):
+                        self.create_order(
+                            pair=signal['pair'],
+                            side=signal['action'],
+                            order_type=signal.get('order_type', 'market'),
+                            volume=signal['volume'],
+                            price=signal.get('price'),
+                            oco_group=signal.get('oco_group')
+                        )
+                    elif signal['action'] == 'cancel':
+                        self.cancel_order(signal['txid'])
+                        
+        except Exception as e:
+            logger.error(f"Strategy error at {timestamp}: {e}")
+            
     def create_order(
         self,
         pair: str,
-        side: str,
-        order_type: str,
-        volume: float,
+        side: Optional[str] = None,
+        order_type: Optional[str] = None,
+        volume: Optional[float] = None,
         price: Optional[float] = None,
+        oco_group: Optional[str] = None,
         **kwargs
     ) -> Dict:
-        """Simulate order creation"""
+        """
+        Simulate order creation
+        
+        Market orders fill immediately at the close. Limit, stop-loss and
+        take-profit orders rest in ``pending_orders`` until a later bar's
+        high/low reaches their price. Kraken-style ``type``/``ordertype``
+        keywords are accepted as aliases for ``side``/``order_type``.
+        """
+        side = side or kwargs.get('type')
+        order_type = order_type or kwargs.get('ordertype', 'market')
+        volume = float(volume)
+        
+        if order_type in RESTING_ORDER_TYPES:
+            return self._place_pending_order(pair, side, order_type, volume, price, oco_group)
+        if order_type != 'market':
+            raise ValueError(f"Unsupported order type: {order_type}")
+            
         # Get current market price
         if not hasattr(self, 'current_prices') or pair not in self.current_prices:
             raise Exception(f"No price data for {pair}")
@@ -264,11 +640,15 @@ class BacktestingEngine:
         order_value = volume * execution_price
         fee = order_value * self.fee_rate
         
-        # Check if we have enough capital
+        # Check if we have enough capital, or enough of the pair to sell
         if side == 'buy':
             required_capital = order_value + fee
             if required_capital > self.current_capital:
                 raise Exception(f"Insufficient capital: need {required_capital}, have {self.current_capital}")
+        else:
+            held = self.positions[pair].volume if pair in self.positions else 0.0
+            if volume > held:
+                raise Exception(f"Insufficient position: selling {volume} {pair}, have {held}")
                 
         # Execute trade
         trade = Trade(
@@ -290,6 +670,165 @@ class BacktestingEngine:
             'descr': {'order': f"{side} {volume} {pair} @ {execution_price}"}
         }
         
+    def _place_pending_order(
+        self,
+        pair: str,
+        side: str,
+        order_type: str,
+        volume: float,
+        price: Optional[float],
+        oco_group: Optional[str]
+    ) -> Dict:
+        """Rest a limit, stop-loss or take-profit order in the book"""
+        if price is None:
+            raise ValueError(f"{order_type} order requires a price")
+        if side not in ('buy', 'sell'):
+            raise ValueError(f"Invalid order side: {side}")
+            
+        current_bar = getattr(self, 'current_prices', {}).get(pair)
+        self._order_sequence += 1
+        order = PendingOrder(
+            txid=f"BT-O{self._order_sequence}",
+            pair=pair,
+            side=side,
+            order_type=order_type,
+            price=float(price),
+            volume=volume,
+            created_at=current_bar.name if current_bar is not None else None,
+            oco_group=oco_group
+        )
+        self.pending_orders.add(order)
+        
+        return {
+            'txid': [order.txid],
+            'descr': {'order': f"{side} {volume} {pair} @ {order_type} {order.price}"}
+        }
+        
+    def cancel_order(self, txid: str) -> Dict:
+        """Cancel a resting order"""
+        order = self.pending_orders.cancel(txid)
+        if order is not None:
+            self._close_order(order, 'canceled')
+        return {'count': 1 if order else 0}
+        
+    def _close_order(self, order: PendingOrder, status: str, price: Optional[float] = None):
+        """Record a resting order that left the book, in Kraken's ClosedOrders shape"""
+        current_bar = getattr(self, 'current_prices', {}).get(order.pair)
+        self.closed_orders[order.txid] = {
+            'status': status,
+            'descr': {
+                'pair': order.pair,
+                'type': order.side,
+                'ordertype': order.order_type,
+                'price': str(order.price)
+            },
+            'vol': str(order.volume),
+            'vol_exec': str(order.volume if status == 'closed' else 0.0),
+            'price': str(price if price is not None else 0.0),
+            'opentm': order.created_at,
+            'closetm': current_bar.name if current_bar is not None else None
+        }
+        
+    def query_orders(self, txids: List[str]) -> Dict:
+        """Status of the given orders in Kraken's QueryOrders shape"""
+        result = {}
+        for txid in txids:
+            if txid in self.closed_orders:
+                result[txid] = self.closed_orders[txid]
+                continue
+            order = self.pending_orders.get_order(txid)
+            if order is not None:
+                result[txid] = {
+                    'status': 'open',
+                    'descr': {
+                        'pair': order.pair,
+                        'type': order.side,
+                        'ordertype': order.order_type,
+                        'price': str(order.price)
+                    },
+                    'vol': str(order.volume),
+                    'vol_exec': '0.0',
+                    'opentm': order.created_at
+                }
+        return result
+        
+    def get_open_orders(self) -> Dict:
+        """Resting orders in Kraken's OpenOrders shape"""
+        return {
+            'open': {
+                order.txid: {
+                    'descr': {
+                        'pair': order.pair,
+                        'type': order.side,
+                        'ordertype': order.order_type,
+                        'price': str(order.price)
+                    },
+                    'vol': str(order.volume),
+                    'opentm': order.created_at
+                }
+                for order in self.pending_orders.open_orders()
+            }
+        }
+        
+    def _match_pending_orders(self, current_data: Dict):
+        """Fill resting orders whose price was reached during the current bar"""
+        for pair, bar in current_data.items():
+            if not self.pending_orders.has_orders(pair):
+                continue
+                
+            fills = self.pending_orders.match(
+                pair,
+                float(bar['open']), float(bar['high']),
+                float(bar['low']), float(bar['close'])
+            )
+            
+            for order, reference_price in fills:
+                # Cancelled by an OCO sibling that filled earlier in this bar
+                if order.txid not in self.pending_orders:
+                    continue
+                    
+                # Stops and take-profits become market orders once triggered
+                execution_price = reference_price
+                if order.order_type != 'limit':
+                    if order.side == 'buy':
+                        execution_price *= (1 + self.slippage_pct)
+                    else:
+                        execution_price *= (1 - self.slippage_pct)
+                        
+                fee = order.volume * execution_price * self.fee_rate
+                
+                if order.side == 'buy' and order.volume * execution_price + fee > self.current_capital:
+                    logger.warning(f"Insufficient capital to fill {order.txid}, order cancelled")
+                    self._reject_pending_order(order)
+                    continue
+                if order.side == 'sell' and (
+                    pair not in self.positions or order.volume > self.positions[pair].volume
+                ):
+                    logger.warning(f"{pair} position too small to fill {order.txid}, order cancelled")
+                    self._reject_pending_order(order)
+                    continue
+                    
+                # Only a fill that happened resolves the order's OCO group
+                for sibling in self.pending_orders.fill(order):
+                    self._close_order(sibling, 'canceled')
+                self._close_order(order, 'closed', execution_price)
+                
+                self._execute_trade(Trade(
+                    timestamp=bar.name,
+                    pair=pair,
+                    side=order.side,
+                    price=execution_price,
+                    volume=order.volume,
+                    fee=fee,
+                    order_type=order.order_type,
+                    trade_id=order.txid
+                ))
+                
+    def _reject_pending_order(self, order: PendingOrder):
+        """Drop a triggered order that cannot fill; its OCO siblings stay open"""
+        self.pending_orders.cancel(order.txid)
+        self._close_order(order, 'canceled')
+        
     def _execute_trade(self, trade: Trade):
         """Execute a trade and update positions"""
         self.trades.append(trade)
@@ -358,11 +897,25 @@ class BacktestingEngine:
         )
         return self.current_capital + positions_value
         
-    def _calculate_results(self, start_date: datetime, end_date: datetime) -> BacktestResult:
+    def _calculate_results(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        timestamps: Optional[pd.DatetimeIndex] = None,
+        equity: Optional[np.ndarray] = None,
+        cash: Optional[np.ndarray] = None
+    ) -> BacktestResult:
         """Calculate comprehensive backtest results"""
-        # Convert equity curve to DataFrame
-        equity_df = pd.DataFrame(self.equity_curve)
-        equity_df.set_index('timestamp', inplace=True)
+        if equity is not None:
+            # Columnar simulation: build the curve straight from the state arrays
+            equity_df = pd.DataFrame(
+                {'equity': equity, 'cash': cash, 'positions_value': equity - cash},
+                index=pd.DatetimeIndex(timestamps, name='timestamp')
+            )
+        else:
+            # Convert equity curve to DataFrame
+            equity_df = pd.DataFrame(self.equity_curve)
+            equity_df.set_index('timestamp', inplace=True)
         
         # Calculate returns
         equity_df['returns'] = equity_df['equity'].pct_change()
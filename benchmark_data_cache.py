@@ -0,0 +1,153 @@
+"""
+Data Cache Ingestion Benchmark
+
+Measures candle ingestion throughput (rows/sec) of the historical data caches:
+the original row-by-row SQLite insert loop, the bulk executemany path of
+DataCache, and the columnar cache.
+
+Usage: python benchmark_data_cache.py --rows 500000 1000000 5000000
+"""
+
+import argparse
+import logging
+import shutil
+import sqlite3
+import tempfile
+import time
+from typing import Callable, List
+
+import numpy as np
+import pandas as pd
+
+from historical_data_manager import DataCache
+from columnar_data_cache import ColumnarDataCache
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+
+logger = logging.getLogger(__name__)
+
+
+def generate_candles(rows: int) -> pd.DataFrame:
+    """Generate a synthetic 1m OHLCV frame"""
+    rng = np.random.default_rng(42)
+    index = pd.date_range('2020-01-01', periods=rows, freq='1min', name='timestamp')
+    close = 50000 * np.exp(np.cumsum(rng.normal(0, 0.001, rows)))
+    
+    return pd.DataFrame({
+        'open': close * (1 + rng.uniform(-0.001, 0.001, rows)),
+        'high': close * (1 + rng.uniform(0, 0.002, rows)),
+        'low': close * (1 - rng.uniform(0, 0.002, rows)),
+        'close': close,
+        'volume': rng.uniform(1, 100, rows)
+    }, index=index)
+    
+
+def legacy_cache_data(cache: DataCache, df: pd.DataFrame, pair: str, timeframe: str, source: str):
+    """Row-by-row insert loop that DataCache.cache_data used before bulk ingestion"""
+    conn = sqlite3.connect(cache.db_path)
+    conn.execute('PRAGMA journal_mode=DELETE')
+    conn.execute('PRAGMA synchronous=FULL')
+    cursor = conn.cursor()
+    
+    created_at = int(time.time())
+    
+    for timestamp, row in df.iterrows():
+        cursor.execute('''
+            INSERT OR REPLACE INTO ohlcv_data
+            (pair, timeframe, timestamp, open, high, low, close, volume, source, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (
+            pair, timeframe, int(timestamp.timestamp()),
+            float(row['open']), float(row['high']), float(row['low']),
+            float(row['close']), float(row['volume']),
+            source, created_at
+        ))
+        
+    conn.commit()
+    conn.close()
+    
+
+def time_ingestion(name: str, rows: int, ingest: Callable[[str], None]) -> float:
+    """Run one ingestion into a fresh cache directory and return rows/sec"""
+    cache_dir = tempfile.mkdtemp(prefix='cache_bench_')
+    try:
+        start = time.perf_counter()
+        ingest(cache_dir)
+        elapsed = time.perf_counter() - start
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+        
+    rate = rows / elapsed if elapsed > 0 else float('inf')
+    logger.info(f"  {name:10} {rows:>9,} rows in {elapsed:8.2f}s = {rate:>12,.0f} rows/sec")
+    return rate
+    
+
+def run_benchmark(row_counts: List[int], chunk_size: int, legacy_max_rows: int):
+    """Benchmark every cache backend for each frame size"""
+    logging.getLogger('historical_data_manager').setLevel(logging.WARNING)
+    logging.getLogger('columnar_data_cache').setLevel(logging.WARNING)
+    
+    for rows in row_counts:
+        logger.info(f"📊 Ingesting {rows:,} candles")
+        df = generate_candles(rows)
+        rates = {}
+        
+        if rows <= legacy_max_rows:
+            rates['legacy'] = time_ingestion(
+                'legacy', rows,
+                lambda d: legacy_cache_data(DataCache(d), df, 'XBTUSD', '1m', 'bench')
+            )
+        else:
+            logger.info(f"  legacy     skipped (above --legacy-max-rows {legacy_max_rows:,})")
+            
+        rates['bulk'] = time_ingestion(
+            'bulk', rows,
+            lambda d: DataCache(d, chunk_size=chunk_size).cache_data(df, 'XBTUSD', '1m', 'bench')
+        )
+        rates['columnar'] = time_ingestion(
+            'columnar', rows,
+            lambda d: ColumnarDataCache(d).cache_data(df, 'XBTUSD', '1m', 'bench')
+        )
+        
+        if 'legacy' in rates:
+            logger.info(f"  bulk speedup: {rates['bulk'] / rates['legacy']:.1f}x, "
+                       f"columnar speedup: {rates['columnar'] / rates['legacy']:.1f}x")
+
+
+def main():
+    """Main function with command line interface"""
+    
+    parser = argparse.ArgumentParser(description='Benchmark historical data cache ingestion')
+    
+    parser.add_argument(
+        '--rows',
+        type=int,
+        nargs='+',
+        default=[500_000, 1_000_000, 5_000_000],
+        help='Frame sizes to ingest (default: 500000 1000000 5000000)'
+    )
+    
+    parser.add_argument(
+        '--chunk-size',
+        type=int,
+        default=50_000,
+        help='Rows per executemany batch for the bulk path (default: 50000)'
+    )
+    
+    parser.add_argument(
+        '--legacy-max-rows',
+        type=int,
+        default=1_000_000,
+        help='Skip the slow row-by-row baseline above this size (default: 1000000)'
+    )
+    
+    args = parser.parse_args()
+    
+    run_benchmark(args.rows, args.chunk_size, args.legacy_max_rows)
+    
+
+if __name__ == "__main__":
+    main()
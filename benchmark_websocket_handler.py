@@ -0,0 +1,195 @@
+"""
+WebSocket Message Handling Benchmark
+
+Measures how fast EnhancedWebSocketHandler._handle_message processes Kraken
+frames (messages/sec and per-message latency percentiles and histogram),
+replaying a TickRecorder recording, frames stored one per line in a file,
+or a synthesized ticker/trade/book mix. Compare the standard library and
+orjson decoders with --json-backend; replay a recording at its recorded
+pace, or faster, with --speed.
+
+Usage: python benchmark_websocket_handler.py --messages 200000
+       python benchmark_websocket_handler.py --frames recorded_frames.jsonl
+       python benchmark_websocket_handler.py --frames recordings/ --speed 10
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+from typing import List, Tuple
+
+import numpy as np
+
+import websocket_enhancements
+import websocket_handler
+from tick_recorder import RECORDING_SUFFIX, ReplayReport, TickReplayer, read_frames
+from websocket_enhancements import KrakenWebSocketHandlerV2
+from websocket_handler import EnhancedWebSocketHandler
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+
+logger = logging.getLogger(__name__)
+
+PAIRS = ['XBT/USD', 'ETH/USD', 'SOL/USD', 'ADA/USD', 'DOT/USD']
+
+
+def generate_frames(count: int) -> List[str]:
+    """Synthesize a mix of ticker, trade and book frames (60/25/15)"""
+    rng = np.random.default_rng(42)
+    frames = []
+
+    for i in range(count):
+        pair = PAIRS[i % len(PAIRS)]
+        price = 50000 * (1 + rng.normal(0, 0.001))
+        kind = rng.random()
+
+        if kind < 0.6:
+            payload = {
+                "a": [f"{price + 0.5:.5f}", 1, "1.000"],
+                "b": [f"{price - 0.5:.5f}", 2, "2.000"],
+                "c": [f"{price:.5f}", "0.01000000"],
+                "v": ["1500.12345678", "3000.87654321"],
+                "p": [f"{price:.5f}", f"{price:.5f}"],
+                "t": [12000, 24000],
+                "l": [f"{price * 0.98:.5f}", f"{price * 0.97:.5f}"],
+                "h": [f"{price * 1.02:.5f}", f"{price * 1.03:.5f}"],
+                "o": [f"{price:.5f}", f"{price:.5f}"]
+            }
+            frames.append(json.dumps([340, payload, "ticker", pair]))
+        elif kind < 0.85:
+            trades = [
+                [f"{price:.5f}", f"{rng.uniform(0.001, 2):.8f}", f"{1700000000 + i:.6f}", "b" if rng.random() < 0.5 else "s", "l", ""]
+                for _ in range(int(rng.integers(1, 4)))
+            ]
+            frames.append(json.dumps([337, trades, "trade", pair]))
+        else:
+            side = "a" if rng.random() < 0.5 else "b"
+            level = [f"{price:.5f}", f"{rng.uniform(0, 5):.8f}", f"{1700000000 + i:.6f}"]
+            frames.append(json.dumps([336, {side: [level]}, "book-10", pair]))
+
+    return frames
+
+
+def load_frames(path: str) -> List[Tuple[int, str]]:
+    """
+    Read a TickRecorder recording (file or directory), or raw frames one per
+    line; raw frames are spaced 1ms apart for paced replays
+    """
+    if os.path.isdir(path) or path.endswith(RECORDING_SUFFIX):
+        return list(read_frames(path))
+
+    with open(path) as f:
+        frames = [line.strip() for line in f if line.strip()]
+    return [(i * 1_000_000, frame) for i, frame in enumerate(frames)]
+
+
+async def replay(frames: List[Tuple[int, str]], rounds: int, speed: float,
+                 api_version: str) -> ReplayReport:
+    """Feed every frame through _handle_message, rounds times, and merge the reports"""
+    if api_version == 'v2':
+        handler = KrakenWebSocketHandlerV2(api_version='v2')
+    else:
+        handler = EnhancedWebSocketHandler()
+    await handler.init_async()
+
+    replayer = TickReplayer(frames, speed)
+    reports = [await replayer.run(handler) for _ in range(rounds)]
+
+    return ReplayReport(
+        messages=sum(r.messages for r in reports),
+        elapsed=sum(r.elapsed for r in reports),
+        latencies_us=np.concatenate([r.latencies_us for r in reports]),
+        errors=sum(r.errors for r in reports)
+    )
+
+
+def run_benchmark(frames: List[Tuple[int, str]], rounds: int, backend: str,
+                  speed: float = 0.0, api_version: str = 'v1'):
+    """Replay the frames and report throughput and the latency distribution"""
+    if backend == 'json':
+        websocket_handler.json_loads = json.loads
+        websocket_enhancements.json_loads = json.loads
+    elif websocket_handler.JSON_BACKEND != 'orjson':
+        raise ValueError("orjson backend requested but orjson is not installed")
+
+    pace = f"{speed:g}x recorded pace" if speed else "full speed"
+    logger.info(f"📊 Replaying {len(frames):,} frames x {rounds} rounds at {pace} with {backend} decoding")
+
+    report = asyncio.run(replay(frames, rounds, speed, api_version))
+
+    if report.errors:
+        logger.warning(f"  {report.errors} frames raised errors while processing")
+
+    logger.info(f"  {report.throughput:>12,.0f} messages/sec")
+    logger.info("  " + "  ".join(f"p{p:g} {v:8.1f}µs" for p, v in report.percentiles().items())
+                + f"  max {report.latencies_us.max():8.1f}µs")
+    for upper, count in report.histogram():
+        logger.info(f"  <= {upper:>9,.0f}µs {count:>10,} {'#' * max(1, round(50 * count / report.messages))}")
+
+
+def main():
+    """Main function with command line interface"""
+
+    parser = argparse.ArgumentParser(description='Benchmark WebSocket message handling')
+
+    parser.add_argument(
+        '--frames',
+        type=str,
+        help='TickRecorder recording (file or directory) or a file of frames, one per line '
+             '(default: synthetic frames)'
+    )
+
+    parser.add_argument(
+        '--messages',
+        type=int,
+        default=100_000,
+        help='Number of synthetic frames to generate (default: 100000)'
+    )
+
+    parser.add_argument(
+        '--rounds',
+        type=int,
+        default=1,
+        help='Times to replay the frame set (default: 1)'
+    )
+
+    parser.add_argument(
+        '--speed',
+        type=float,
+        default=0.0,
+        help='Replay pace relative to the recording, e.g. 1 or 10; 0 for full speed (default: 0)'
+    )
+
+    parser.add_argument(
+        '--api-version',
+        choices=['v1', 'v2'],
+        default='v1',
+        help='WebSocket API the frames were recorded from; v2 replays through KrakenWebSocketHandlerV2 (default: v1)'
+    )
+
+    parser.add_argument(
+        '--json-backend',
+        choices=['auto', 'json', 'orjson'],
+        default='auto',
+        help='JSON decoder to use (default: orjson when installed)'
+    )
+
+    args = parser.parse_args()
+
+    logging.getLogger('websocket_handler').setLevel(logging.WARNING)
+    if args.frames:
+        frames = load_frames(args.frames)
+    else:
+        frames = [(i * 1_000_000, frame) for i, frame in enumerate(generate_frames(args.messages))]
+    backend = websocket_handler.JSON_BACKEND if args.json_backend == 'auto' else args.json_backend
+
+    run_benchmark(frames, args.rounds, backend, args.speed, args.api_version)
+
+
+if __name__ == "__main__":
+    main()
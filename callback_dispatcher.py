@@ -0,0 +1,237 @@
+"""
+Callback Dispatcher
+
+Fans WebSocket channel data out to subscriber callbacks. Every subscriber
+has its own bounded mailbox and worker task, so a slow consumer only delays
+itself, and an overflow policy decides what happens when it falls behind:
+drop the oldest message, coalesce to the latest value per pair, or block
+the publisher until there is room.
+"""
+
+import asyncio
+import inspect
+import logging
+import time
+from collections import deque
+from enum import Enum
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class OverflowPolicy(Enum):
+    """What a full mailbox does with a new message"""
+    DROP_OLDEST = "drop_oldest"
+    COALESCE = "coalesce"
+    BLOCK = "block"
+    
+
+# Snapshot-like channels only need the latest value; trades must not be lost.
+# Keyed by base channel name, so "ohlc" covers "ohlc-5" and the like; book
+# subscribers are sent whole-book snapshots, not the deltas.
+DEFAULT_POLICIES = {
+    "ticker": OverflowPolicy.COALESCE,
+    "book": OverflowPolicy.COALESCE,
+    "ohlc": OverflowPolicy.COALESCE,
+    "trade": OverflowPolicy.BLOCK,
+}
+
+
+class Subscriber:
+    """
+    One callback with a bounded mailbox drained by its own task
+    
+    With COALESCE the mailbox holds at most one pending message per pair:
+    a newer message replaces the queued one in place, so pairs keep their
+    turn and none starves.
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        callback: Callable,
+        policy: OverflowPolicy = OverflowPolicy.DROP_OLDEST,
+        maxsize: int = 1000
+    ):
+        if maxsize <= 0:
+            raise ValueError(f"maxsize must be positive, got {maxsize}")
+            
+        self.name = name
+        self.callback = callback
+        self.policy = policy
+        self.maxsize = maxsize
+        
+        self._queue: Deque[Tuple[str, Any, float]] = deque()
+        self._latest: Dict[str, Tuple[Any, float]] = {}
+        self._not_empty = asyncio.Event()
+        self._not_full = asyncio.Event()
+        self._not_full.set()
+        self._task: Optional[asyncio.Task] = None
+        
+        # Metrics
+        self.delivered = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        
+    def __len__(self) -> int:
+        return len(self._latest) if self.policy is OverflowPolicy.COALESCE else len(self._queue)
+        
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+            
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        # Release publishers blocked on the mailbox; they see the stop and return
+        self._not_full.set()
+        
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+        
+    async def put(self, key: str, data: Any):
+        """
+        Queue a message, applying the overflow policy if the mailbox is full;
+        messages for a stopped subscriber are dropped
+        """
+        if not self.running:
+            self.dropped += 1
+            return
+            
+        now = time.monotonic()
+        
+        if self.policy is OverflowPolicy.COALESCE:
+            if key in self._latest:
+                self.coalesced += 1
+            elif len(self._latest) >= self.maxsize:
+                del self._latest[next(iter(self._latest))]
+                self.dropped += 1
+            self._latest[key] = (data, now)
+        else:
+            if len(self._queue) >= self.maxsize:
+                if self.policy is OverflowPolicy.BLOCK:
+                    while len(self._queue) >= self.maxsize:
+                        self._not_full.clear()
+                        await self._not_full.wait()
+                        if not self.running:
+                            self.dropped += 1
+                            return
+                else:
+                    self._queue.popleft()
+                    self.dropped += 1
+            self._queue.append((key, data, now))
+            
+        self._not_empty.set()
+        
+    def _take(self) -> Tuple[Any, float]:
+        if self.policy is OverflowPolicy.COALESCE:
+            key = next(iter(self._latest))
+            return self._latest.pop(key)
+            
+        _, data, queued_at = self._queue.popleft()
+        self._not_full.set()
+        return data, queued_at
+        
+    async def _run(self):
+        while True:
+            if not len(self):
+                self._not_empty.clear()
+                await self._not_empty.wait()
+                continue
+                
+            data, queued_at = self._take()
+            self.last_lag = time.monotonic() - queued_at
+            self.max_lag = max(self.max_lag, self.last_lag)
+            
+            try:
+                result = self.callback(data)
+                if inspect.isawaitable(result):
+                    await result
+                self.delivered += 1
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"Error in callback {self.name}: {e}")
+                
+    def metrics(self) -> Dict:
+        return {
+            "policy": self.policy.value,
+            "queued": len(self),
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+            "errors": self.errors,
+            "lag_ms": self.last_lag * 1000,
+            "max_lag_ms": self.max_lag * 1000,
+        }
+        
+
+class CallbackDispatcher:
+    """Routes channel data for a pair to every subscriber registered for it"""
+    
+    def __init__(self, maxsize: int = 1000):
+        self.maxsize = maxsize
+        self.subscribers: Dict[str, List[Subscriber]] = {}  # "channel:pair" -> subscribers
+        self._all: List[Subscriber] = []
+        
+    def subscribe(
+        self,
+        channel: str,
+        pairs: List[str],
+        callback: Callable,
+        policy: Optional[OverflowPolicy] = None,
+        maxsize: Optional[int] = None
+    ) -> Subscriber:
+        """
+        Register a callback for a channel on one or more pairs
+        
+        The policy defaults to DEFAULT_POLICIES for the channel's base name
+        (the part before any "-interval" suffix), else DROP_OLDEST. Must be
+        called from a running event loop.
+        """
+        policy = policy or DEFAULT_POLICIES.get(channel.partition('-')[0], OverflowPolicy.DROP_OLDEST)
+        name = f"{channel}:{','.join(pairs)}:{getattr(callback, '__qualname__', repr(callback))}"
+        subscriber = Subscriber(name, callback, policy, maxsize or self.maxsize)
+        
+        for pair in pairs:
+            self.subscribers.setdefault(f"{channel}:{pair}", []).append(subscriber)
+        self._all.append(subscriber)
+        subscriber.start()
+        return subscriber
+        
+    async def unsubscribe(self, channel: str, pairs: List[str]):
+        """Drop every subscriber of a channel on the given pairs"""
+        removed = set()
+        for pair in pairs:
+            removed.update(self.subscribers.pop(f"{channel}:{pair}", ()))
+            
+        # Subscribers still registered for other pairs keep running
+        active = {id(s) for subscribers in self.subscribers.values() for s in subscribers}
+        for subscriber in removed:
+            if id(subscriber) not in active:
+                self._all.remove(subscriber)
+                await subscriber.stop()
+                
+    async def publish(self, channel: str, pair: str, data: Any):
+        """Deliver to the pair's subscribers; only blocks for a full BLOCK mailbox"""
+        for subscriber in self.subscribers.get(f"{channel}:{pair}", ()):
+            await subscriber.put(pair, data)
+            
+    async def stop(self):
+        """Stop every worker task, discarding undelivered messages"""
+        for subscriber in self._all:
+            await subscriber.stop()
+            
+    def start(self):
+        """Restart the worker tasks after stop()"""
+        for subscriber in self._all:
+            subscriber.start()
+            
+    def metrics(self) -> Dict[str, Dict]:
+        """Per-subscriber queue depth, lag and drop counters"""
+        return {subscriber.name: subscriber.metrics() for subscriber in self._all}
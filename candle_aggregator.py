@@ -0,0 +1,302 @@
+"""
+Candle Aggregator
+
+Builds OHLCV bars from the WebSocket trade stream so strategies can read
+live candles instead of polling the REST OHLC endpoint. Trades update the
+forming base (1 minute) bar in O(1); each base bar that closes is rolled up
+into the higher intervals, and every closed bar is returned to the caller
+as an event and kept in an OHLCRingBuffer per (pair, interval).
+
+Bars are bucketed on exchange trade time. Intervals with no trades produce
+no bar, and a trade older than the forming base bar is counted as late and
+dropped, since its bar has already been published. The bar of each interval
+that was forming when the first trade arrived misses everything before it;
+it is tracked as partial until a REST seed replaces it.
+"""
+
+import logging
+import time
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from ohlc_ring_buffer import OHLCRingBuffer
+
+logger = logging.getLogger(__name__)
+
+
+class Bar:
+    """One OHLCV bar; ``start`` is the open time in epoch seconds"""
+    
+    __slots__ = ('pair', 'interval', 'start', 'open', 'high', 'low', 'close', 'volume', 'trades')
+    
+    def __init__(self, pair: str, interval: int, start: int, open_: float, high: float,
+                 low: float, close: float, volume: float, trades: int):
+        self.pair = pair
+        self.interval = interval
+        self.start = start
+        self.open = open_
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+        self.trades = trades
+        
+    @property
+    def end(self) -> int:
+        return self.start + self.interval * 60
+        
+    def rolled_up(self, interval: int) -> 'Bar':
+        """Copy of this bar as the first part of a bar of a longer interval"""
+        seconds = interval * 60
+        return Bar(self.pair, interval, self.start - self.start % seconds, self.open,
+                   self.high, self.low, self.close, self.volume, self.trades)
+                   
+    def merge(self, bar: 'Bar'):
+        """Extend this bar with a later one"""
+        if bar.high > self.high:
+            self.high = bar.high
+        if bar.low < self.low:
+            self.low = bar.low
+        self.close = bar.close
+        self.volume += bar.volume
+        self.trades += bar.trades
+        
+    def to_dict(self) -> Dict:
+        return {
+            'pair': self.pair,
+            'interval': self.interval,
+            'time': self.start,
+            'open': self.open,
+            'high': self.high,
+            'low': self.low,
+            'close': self.close,
+            'volume': self.volume,
+            'trades': self.trades,
+        }
+        
+    def __repr__(self) -> str:
+        return (f"Bar({self.pair} {self.interval}m @{self.start} o={self.open} h={self.high} "
+                f"l={self.low} c={self.close} v={self.volume} n={self.trades})")
+                
+
+class PairCandles:
+    """Forming bars and closed-bar buffers of one pair"""
+    
+    __slots__ = ('forming', 'rollups', 'buffers', 'next_start', 'partial')
+    
+    def __init__(self, intervals: List[int], capacity: int):
+        self.forming: Optional[Bar] = None
+        self.rollups: Dict[int, Optional[Bar]] = {interval: None for interval in intervals[1:]}
+        self.buffers = {interval: OHLCRingBuffer(capacity) for interval in intervals}
+        self.next_start = 0  # End of the last closed base bar; older trades are late
+        # Open time per interval of the bar started before the first trade was seen
+        self.partial: Dict[int, Optional[int]] = {interval: None for interval in intervals}
+        
+
+class CandleAggregator:
+    """
+    Live OHLCV bars for every pair in the trade stream
+    
+    ``intervals`` are in minutes like the OHLC channel's; the smallest is
+    the base bar and the others must be multiples of it. ``add_trade`` and
+    ``advance`` return the bars they closed, base interval first, so the
+    caller can publish them. Call ``advance`` periodically so bars of quiet
+    pairs still close; ``close_delay`` allows for the exchange clock and
+    network latency before a bar is closed without a later trade.
+    """
+    
+    def __init__(self, intervals: Iterable[int] = (1, 5, 15, 60), capacity: int = 1000,
+                 close_delay: float = 2.0):
+        intervals = sorted(set(intervals))
+        if not intervals or intervals[0] <= 0:
+            raise ValueError(f"intervals must be positive minutes, got {intervals}")
+        base = intervals[0]
+        if any(interval % base for interval in intervals):
+            raise ValueError(f"intervals must be multiples of the base interval {base}, got {intervals}")
+            
+        self.intervals = intervals
+        self.base = base
+        self.base_seconds = base * 60
+        self.capacity = capacity
+        self.close_delay = close_delay
+        self.pairs: Dict[str, PairCandles] = {}
+        self.late_trades = 0
+        
+    def _pair(self, pair: str) -> PairCandles:
+        candles = self.pairs.get(pair)
+        if candles is None:
+            candles = self.pairs[pair] = PairCandles(self.intervals, self.capacity)
+        return candles
+        
+    def add_trade(self, pair: str, price: float, volume: float, time_: float) -> List[Bar]:
+        """Apply one trade (exchange epoch seconds); returns the bars it closed"""
+        candles = self.pairs.get(pair) or self._pair(pair)
+        start = int(time_ - time_ % self.base_seconds)
+        bar = candles.forming
+        
+        # Hot path: another trade in the forming bar
+        if bar is not None and start == bar.start:
+            if price > bar.high:
+                bar.high = price
+            elif price < bar.low:
+                bar.low = price
+            bar.close = price
+            bar.volume += volume
+            bar.trades += 1
+            return []
+            
+        if start < candles.next_start or (bar is not None and start < bar.start):
+            self.late_trades += 1
+            logger.debug(f"Dropping late {pair} trade at {time_}, its bar is already closed")
+            return []
+            
+        if bar is None and candles.next_start == 0:
+            for interval in candles.partial:
+                seconds = interval * 60
+                candles.partial[interval] = int(time_ - time_ % seconds)
+                
+        closed = self._roll(candles, start)
+        candles.forming = Bar(pair, self.base, start, price, price, price, price, volume, 1)
+        return closed
+        
+    def advance(self, now: float) -> List[Bar]:
+        """Close every bar that ended more than close_delay before ``now``"""
+        upto = now - self.close_delay
+        closed = []
+        for candles in self.pairs.values():
+            closed.extend(self._roll(candles, upto))
+        return closed
+        
+    def _roll(self, candles: PairCandles, upto: float) -> List[Bar]:
+        """Close the bars ending at or before ``upto``, rolling base bars up"""
+        closed = []
+        bar = candles.forming
+        
+        if bar is not None and bar.end <= upto:
+            self._store(candles, bar)
+            closed.append(bar)
+            candles.forming = None
+            candles.next_start = bar.end
+            
+            for interval, rollup in candles.rollups.items():
+                if rollup is None:
+                    candles.rollups[interval] = bar.rolled_up(interval)
+                else:
+                    rollup.merge(bar)
+                    
+        for interval, rollup in candles.rollups.items():
+            if rollup is not None and rollup.end <= upto:
+                self._store(candles, rollup)
+                closed.append(rollup)
+                candles.rollups[interval] = None
+                
+        return closed
+        
+    @staticmethod
+    def _store(candles: PairCandles, bar: Bar):
+        candles.buffers[bar.interval].upsert(
+            bar.start * 1_000_000, bar.open, bar.high, bar.low, bar.close, bar.volume, bar.trades
+        )
+        
+    def forming_bar(self, pair: str, interval: Optional[int] = None) -> Optional[Bar]:
+        """The bar still forming for an interval (base by default), as a copy"""
+        candles = self.pairs.get(pair)
+        interval = interval or self.base
+        if candles is None or interval not in candles.buffers:
+            return None
+            
+        base = candles.forming
+        if interval == self.base:
+            return base.rolled_up(interval) if base is not None else None
+            
+        rollup = candles.rollups[interval]
+        if rollup is None:
+            return base.rolled_up(interval) if base is not None else None
+            
+        bar = rollup.rolled_up(interval)
+        if base is not None and base.start < bar.end:
+            bar.merge(base)
+        return bar
+        
+    def get_bars(self, pair: str, interval: Optional[int] = None, lookback: Optional[int] = None,
+                 include_forming: bool = False) -> pd.DataFrame:
+        """
+        Closed bars (optionally plus the forming one), in the frame shape of
+        OHLCRingBuffer.to_frame
+        """
+        candles = self.pairs.get(pair)
+        interval = interval or self.base
+        if candles is None or interval not in candles.buffers:
+            return pd.DataFrame()
+            
+        frame = candles.buffers[interval].to_frame(lookback)
+        if include_forming:
+            bar = self.forming_bar(pair, interval)
+            if bar is not None:
+                row = pd.DataFrame(
+                    {name: [getattr(bar, name)] for name in ('open', 'high', 'low', 'close', 'volume', 'trades')},
+                    index=pd.DatetimeIndex([np.datetime64(bar.start, 's').astype('datetime64[us]')], name='time')
+                )
+                frame = pd.concat([frame, row]) if len(frame) else row
+                if lookback:
+                    frame = frame.iloc[-lookback:]
+        return frame
+        
+    def bar_count(self, pair: str, interval: Optional[int] = None) -> int:
+        """Number of closed bars held for a pair and interval"""
+        candles = self.pairs.get(pair)
+        buffer = candles.buffers.get(interval or self.base) if candles is not None else None
+        return len(buffer) if buffer is not None else 0
+        
+    def last_closed_end(self, pair: str, interval: Optional[int] = None) -> Optional[int]:
+        """End time (epoch seconds) of the latest closed bar, or None"""
+        candles = self.pairs.get(pair)
+        interval = interval or self.base
+        buffer = candles.buffers.get(interval) if candles is not None else None
+        if buffer is None or buffer.last_time is None:
+            return None
+        return buffer.last_time // 1_000_000 + interval * 60
+        
+    def partial_start(self, pair: str, interval: Optional[int] = None) -> Optional[int]:
+        """
+        Open time (epoch seconds) of the live bar that only holds trades
+        since the first one seen, or None once a seed has replaced it
+        """
+        candles = self.pairs.get(pair)
+        if candles is None:
+            return None
+        return candles.partial.get(interval or self.base)
+        
+    def seed(self, pair: str, interval: int, frame: pd.DataFrame):
+        """
+        Load historical closed bars, e.g. from one REST OHLC request at
+        startup, so strategies have a full lookback before live bars accrue
+        
+        ``frame`` is indexed by bar open time with open/high/low/close/volume
+        (and optionally trades) columns. Bars that have not ended yet, or that
+        overlap the forming bar, are skipped; live trades own those. A seeded
+        bar replaces the partial first live bar of its interval.
+        """
+        candles = self._pair(pair)
+        if interval not in candles.buffers:
+            raise ValueError(f"Interval {interval} is not aggregated, have {self.intervals}")
+            
+        cutoff = time.time()
+        if candles.forming is not None:
+            cutoff = min(cutoff, candles.forming.start)
+        buffer = candles.buffers[interval]
+        starts = pd.DatetimeIndex(frame.index).as_unit('s').asi8
+        trades = frame['trades'] if 'trades' in frame else pd.Series(0, index=frame.index)
+        
+        for start, open_, high, low, close, volume, count in zip(
+            starts.tolist(), frame['open'].tolist(), frame['high'].tolist(), frame['low'].tolist(),
+            frame['close'].tolist(), frame['volume'].tolist(), trades.tolist()
+        ):
+            if start + interval * 60 > cutoff:
+                break
+            buffer.upsert(start * 1_000_000, float(open_), float(high), float(low),
+                          float(close), float(volume), int(count))
+            if start == candles.partial[interval]:
+                candles.partial[interval] = None
@@ -0,0 +1,285 @@
+"""
+Columnar OHLCV Cache
+
+Stores each (pair, timeframe) series as append-only, fixed-width binary column
+files read back through numpy.memmap. Drop-in replacement for the SQLite
+DataCache in historical_data_manager.
+"""
+
+import logging
+import os
+import sqlite3
+import struct
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Column name -> dtype; timestamps are epoch seconds like the SQLite cache
+COLUMNS = {
+    'timestamp': np.int64,
+    'open': np.float64,
+    'high': np.float64,
+    'low': np.float64,
+    'close': np.float64,
+    'volume': np.float64,
+}
+PRICE_COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+
+# Index header: magic, version, rows, first timestamp, last timestamp
+HEADER_FORMAT = '<8sIqqq'
+HEADER_MAGIC = b'JSOHLCV\x00'
+HEADER_VERSION = 1
+HEADER_SIZE = 64
+
+MIGRATION_MARKER = '.migrated_from_sqlite'
+
+
+def to_epoch_seconds(index: pd.DatetimeIndex) -> np.ndarray:
+    """Convert a DatetimeIndex to int64 epoch seconds (naive values are UTC)"""
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        index = index.tz_convert('UTC').tz_localize(None)
+    return index.values.astype('datetime64[s]').astype(np.int64)
+    
+
+class ColumnarDataCache:
+    """Memory-mapped columnar cache for historical OHLCV data"""
+    
+    def __init__(self, cache_dir: str = "data_cache"):
+        self.cache_dir = Path(cache_dir)
+        self.root = self.cache_dir / "columnar"
+        self.root.mkdir(parents=True, exist_ok=True)
+        
+    def _series_dir(self, pair: str, timeframe: str) -> Path:
+        """Directory holding the column files of one series"""
+        safe_pair = pair.replace('/', '-')
+        return self.root / safe_pair / timeframe
+        
+    def _read_header(self, series_dir: Path) -> Tuple[int, int, int]:
+        """Return (rows, first_ts, last_ts) for a series, zeros if absent"""
+        header_path = series_dir / "index.hdr"
+        if not header_path.exists():
+            return 0, 0, 0
+            
+        with open(header_path, 'rb') as f:
+            raw = f.read(HEADER_SIZE)
+            
+        magic, version, rows, first_ts, last_ts = struct.unpack_from(HEADER_FORMAT, raw)
+        if magic != HEADER_MAGIC or version != HEADER_VERSION:
+            raise ValueError(f"Unrecognised columnar cache header in {header_path}")
+            
+        return rows, first_ts, last_ts
+        
+    def _write_header(self, series_dir: Path, rows: int, first_ts: int, last_ts: int):
+        """Atomically replace the index header"""
+        raw = struct.pack(HEADER_FORMAT, HEADER_MAGIC, HEADER_VERSION, rows, first_ts, last_ts)
+        tmp_path = series_dir / "index.hdr.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(raw.ljust(HEADER_SIZE, b'\x00'))
+        os.replace(tmp_path, series_dir / "index.hdr")
+        
+    def _open_columns(self, series_dir: Path, rows: int) -> Dict[str, np.ndarray]:
+        """Map every column file read-only, limited to the committed rows"""
+        return {
+            name: np.memmap(series_dir / f"{name}.col", dtype=dtype, mode='r', shape=(rows,))
+            for name, dtype in COLUMNS.items()
+        }
+        
+    def get_cached_data(
+        self,
+        pair: str,
+        timeframe: str,
+        start_date: datetime,
+        end_date: datetime
+    ) -> Optional[pd.DataFrame]:
+        """Retrieve cached data as read-only views over the column files"""
+        series_dir = self._series_dir(pair, timeframe)
+        rows, _, _ = self._read_header(series_dir)
+        if rows == 0:
+            return None
+            
+        columns = self._open_columns(series_dir, rows)
+        timestamps = columns['timestamp']
+        
+        start = np.searchsorted(timestamps, int(start_date.timestamp()), side='left')
+        end = np.searchsorted(timestamps, int(end_date.timestamp()), side='right')
+        if start >= end:
+            return None
+            
+        index = pd.DatetimeIndex(
+            timestamps[start:end].view('datetime64[s]'), name='timestamp'
+        )
+        df = pd.DataFrame(
+            {name: columns[name][start:end] for name in PRICE_COLUMNS},
+            index=index,
+            copy=False
+        )
+        
+        logger.info(f"Cache: Retrieved {len(df)} cached candles for {pair} {timeframe}")
+        return df
+        
+    def cache_data(
+        self,
+        df: pd.DataFrame,
+        pair: str,
+        timeframe: str,
+        source: str
+    ):
+        """
+        Store data in cache
+        
+        New data that extends the series, or that re-covers its last rows
+        exactly (e.g. the refetched forming candle), is written in place from
+        the first overlapping row; only a true backfill rewrites the series.
+        """
+        if df.empty:
+            return
+            
+        new = {'timestamp': to_epoch_seconds(df.index)}
+        for name in PRICE_COLUMNS:
+            new[name] = df[name].to_numpy(dtype=np.float64)
+            
+        # Sort and keep the last value per timestamp, like INSERT OR REPLACE
+        order = np.argsort(new['timestamp'], kind='stable')
+        new = {name: values[order] for name, values in new.items()}
+        keep = np.append(new['timestamp'][1:] != new['timestamp'][:-1], True)
+        new = {name: values[keep] for name, values in new.items()}
+        
+        series_dir = self._series_dir(pair, timeframe)
+        series_dir.mkdir(parents=True, exist_ok=True)
+        rows, _, last_ts = self._read_header(series_dir)
+        
+        start = self._overlap_start(series_dir, rows, last_ts, new['timestamp'])
+        if start is not None:
+            self._write_from(series_dir, start, new)
+            rows = start + len(new['timestamp'])
+        else:
+            rows = self._merge(series_dir, rows, new)
+            
+        timestamps = np.memmap(series_dir / "timestamp.col", dtype=np.int64, mode='r', shape=(rows,))
+        self._write_header(series_dir, rows, int(timestamps[0]), int(timestamps[-1]))
+        del timestamps
+        
+        logger.info(f"Cache: Stored {len(df)} candles for {pair} {timeframe}")
+        
+    def _overlap_start(self, series_dir: Path, rows: int, last_ts: int,
+                       timestamps: np.ndarray) -> Optional[int]:
+        """
+        First row the new data replaces, if it starts with exactly the
+        series' rows from there on; None if it back-fills earlier gaps
+        """
+        if rows == 0 or timestamps[0] > last_ts:
+            return rows
+            
+        existing = np.memmap(series_dir / "timestamp.col", dtype=np.int64, mode='r', shape=(rows,))
+        start = int(np.searchsorted(existing, timestamps[0], side='left'))
+        tail = existing[start:]
+        overlaps = len(tail) <= len(timestamps) and np.array_equal(tail, timestamps[:len(tail)])
+        del existing, tail
+        return start if overlaps else None
+        
+    def _write_from(self, series_dir: Path, start: int, new: Dict[str, np.ndarray]):
+        """
+        Write rows from ``start`` on, overwriting the overlapping tail and
+        appending the rest; anything past the new end (a torn tail) is dropped
+        
+        Overwritten rows keep their timestamps, so a reader only ever sees
+        old or new values for a row, and the header still covers valid rows.
+        """
+        for name, dtype in COLUMNS.items():
+            path = series_dir / f"{name}.col"
+            itemsize = np.dtype(dtype).itemsize
+            with open(path, 'r+b' if path.exists() else 'wb') as f:
+                f.seek(start * itemsize)
+                f.write(np.ascontiguousarray(new[name], dtype=dtype).tobytes())
+                f.truncate((start + len(new[name])) * itemsize)
+                
+    def _merge(self, series_dir: Path, rows: int, new: Dict[str, np.ndarray]) -> int:
+        """Rewrite a series with overlapping or back-filled rows merged in"""
+        existing = self._open_columns(series_dir, rows)
+        timestamps = np.concatenate([existing['timestamp'], new['timestamp']])
+        
+        # Stable sort keeps new rows after existing ones with the same timestamp
+        order = np.argsort(timestamps, kind='stable')
+        timestamps = timestamps[order]
+        keep = np.append(timestamps[1:] != timestamps[:-1], True)
+        
+        merged = {'timestamp': timestamps[keep]}
+        for name in PRICE_COLUMNS:
+            merged[name] = np.concatenate([existing[name], new[name]])[order][keep]
+        del existing
+        
+        # Write every column before replacing any, so a failure part way
+        # leaves the committed series untouched
+        for name, dtype in COLUMNS.items():
+            merged[name].astype(dtype, copy=False).tofile(series_dir / f"{name}.col.tmp")
+        for name in COLUMNS:
+            os.replace(series_dir / f"{name}.col.tmp", series_dir / f"{name}.col")
+            
+        return len(merged['timestamp'])
+        
+    def get_cache_coverage(
+        self,
+        pair: str,
+        timeframe: str
+    ) -> Tuple[Optional[datetime], Optional[datetime]]:
+        """Get the date range available in cache"""
+        rows, first_ts, last_ts = self._read_header(self._series_dir(pair, timeframe))
+        if rows == 0:
+            return None, None
+            
+        return datetime.fromtimestamp(first_ts), datetime.fromtimestamp(last_ts)
+        
+    def migrate_from_sqlite(self, db_path: Optional[Path] = None, chunk_size: int = 500_000) -> int:
+        """
+        One-shot import of the legacy SQLite cache
+        
+        Streams every (pair, timeframe) series in timestamp order so memory
+        stays bounded, then leaves a marker so later calls are no-ops.
+        Returns the number of candles migrated.
+        """
+        db_path = Path(db_path) if db_path else self.cache_dir / "historical_data.db"
+        marker = self.root / MIGRATION_MARKER
+        if marker.exists() or not db_path.exists():
+            return 0
+            
+        logger.info(f"Migrating SQLite cache {db_path} to columnar store")
+        conn = sqlite3.connect(db_path)
+        migrated = 0
+        
+        try:
+            series = conn.execute(
+                'SELECT DISTINCT pair, timeframe FROM ohlcv_data'
+            ).fetchall()
+            
+            for pair, timeframe in series:
+                chunks = pd.read_sql_query(
+                    '''
+                    SELECT timestamp, open, high, low, close, volume
+                    FROM ohlcv_data
+                    WHERE pair = ? AND timeframe = ?
+                    ORDER BY timestamp
+                    ''',
+                    conn,
+                    params=(pair, timeframe),
+                    chunksize=chunk_size
+                )
+                for chunk in chunks:
+                    chunk.index = pd.DatetimeIndex(
+                        chunk.pop('timestamp').to_numpy(dtype=np.int64).view('datetime64[s]'),
+                        name='timestamp'
+                    )
+                    self.cache_data(chunk, pair, timeframe, 'sqlite')
+                    migrated += len(chunk)
+                    
+        finally:
+            conn.close()
+            
+        marker.write_text(f"{migrated}\n")
+        logger.info(f"Migrated {migrated} candles across {len(series)} series")
+        return migrated
@@ -31,7 +31,8 @@ async def download_data(
     pairs: List[str],
     timeframes: List[str],
     days_back: int = 365,
-    force_refresh: bool = False
+    force_refresh: bool = False,
+    max_concurrency: int = 16
 ):
     """Download historical data for specified pairs and timeframes"""
     
@@ -54,52 +55,20 @@ async def download_data(
     logger.info(f"Date range: {start_date.strftime('%Y-%m-%d')} to {end_date.strftime('%Y-%m-%d')}")
     
     total_combinations = len(pairs) * len(timeframes)
-    completed = 0
-    errors = 0
     
     try:
-        for pair in pairs:
-            for timeframe in timeframes:
-                try:
-                    logger.info(f"📊 [{completed+1}/{total_combinations}] Downloading {pair} {timeframe}")
-                    
-                    # Check if data already exists (unless force refresh)
-                    if not force_refresh:
-                        cache_start, cache_end = data_manager.cache.get_cache_coverage(pair, timeframe)
-                        
-                        if cache_start and cache_end:
-                            if cache_start <= start_date and cache_end >= end_date:
-                                logger.info(f"✅ Cache hit: {pair} {timeframe} already available")
-                                completed += 1
-                                continue
-                            else:
-                                logger.info(f"⚠️ Partial cache: {pair} {timeframe} - updating...")
-                    
-                    # Download data
-                    data = await data_manager.get_historical_data(
-                        pair=pair,
-                        timeframe=timeframe,
-                        start_date=start_date,
-                        end_date=end_date,
-                        use_cache=not force_refresh
-                    )
-                    
-                    if not data.empty:
-                        logger.info(f"✅ Downloaded {len(data)} candles for {pair} {timeframe}")
-                    else:
-                        logger.warning(f"❌ No data retrieved for {pair} {timeframe}")
-                        errors += 1
-                        
-                    completed += 1
-                    
-                    # Small delay to be nice to APIs
-                    await asyncio.sleep(0.5)
-                    
-                except Exception as e:
-                    logger.error(f"❌ Error downloading {pair} {timeframe}: {e}")
-                    errors += 1
-                    completed += 1
-                    
+        # Chunks already in the cache are skipped, so an interrupted run resumes
+        jobs = await data_manager.download_and_cache_data(
+            pairs=pairs,
+            timeframes=timeframes,
+            days_back=days_back,
+            force_refresh=force_refresh,
+            max_concurrency=max_concurrency
+        )
+        
+        completed = total_combinations
+        errors = len({(job.pair, job.timeframe) for job in jobs if not job.done})
+        
         # Summary
         logger.info("📈 Download Summary:")
         logger.info(f"  Total combinations: {total_combinations}")
@@ -235,6 +204,13 @@ def main():
         help='Force refresh existing cached data'
     )
     
+    parser.add_argument(
+        '--concurrency', 
+        type=int, 
+        default=16,
+        help='Maximum concurrent download chunks (default: 16)'
+    )
+    
     parser.add_argument(
         '--all-pairs', 
         action='store_true',
@@ -281,7 +257,8 @@ def main():
             pairs=args.pairs,
             timeframes=args.timeframes,
             days_back=args.days,
-            force_refresh=args.force
+            force_refresh=args.force,
+            max_concurrency=args.concurrency
         ))
         
     elif args.command == 'test':
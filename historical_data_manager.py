@@ -6,8 +6,10 @@ Supports multiple data sources with automatic fallbacks and local caching.
 
 import asyncio
 import logging
+import random
 import pandas as pd
 import numpy as np
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple, Union
 import aiohttp
@@ -18,23 +20,75 @@ from pathlib import Path
 import time
 import ccxt.async_support as ccxt
 
+from columnar_data_cache import ColumnarDataCache, to_epoch_seconds
+from rate_limiter import TokenBucket
+
 logger = logging.getLogger(__name__)
 
+# Bar length per timeframe, used to size coverage gaps
+TIMEFRAME_DELTAS = {
+    '1m': timedelta(minutes=1),
+    '5m': timedelta(minutes=5),
+    '15m': timedelta(minutes=15),
+    '1h': timedelta(hours=1),
+    '4h': timedelta(hours=4),
+    '1d': timedelta(days=1),
+}
+
+# Holes shorter than this in a pre-existing cache are treated as exchange gaps
+SEED_GAP = timedelta(days=1)
+
+
+# Finest cached timeframe; every other timeframe can be rolled up from it
+BASE_TIMEFRAME = '1m'
+
+# Start of the range recorded as covered before a pair's first candle
+EPOCH = datetime(1970, 1, 1)
+
+
+def floor_to_bar(moment: datetime, bar: timedelta) -> datetime:
+    """Round a naive timestamp down to its bar open (bars are aligned to the epoch)"""
+    return EPOCH + ((moment - EPOCH) // bar) * bar
+    
+
+def resample_ohlcv(df: pd.DataFrame, timeframe: str) -> pd.DataFrame:
+    """
+    Aggregate sorted OHLCV candles into a higher timeframe
+    
+    Candles are bucketed by epoch-aligned bar open and reduced with NumPy
+    reduceat; buckets without candles produce no bar.
+    """
+    if df.empty:
+        return df
+        
+    seconds = int(TIMEFRAME_DELTAS[timeframe].total_seconds())
+    timestamps = to_epoch_seconds(df.index)
+    buckets = timestamps - timestamps % seconds
+    
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(buckets)] - 1
+    
+    return pd.DataFrame({
+        'open': df['open'].to_numpy(dtype=np.float64)[starts],
+        'high': np.maximum.reduceat(df['high'].to_numpy(dtype=np.float64), starts),
+        'low': np.minimum.reduceat(df['low'].to_numpy(dtype=np.float64), starts),
+        'close': df['close'].to_numpy(dtype=np.float64)[ends],
+        'volume': np.add.reduceat(df['volume'].to_numpy(dtype=np.float64), starts),
+    }, index=pd.DatetimeIndex(buckets[starts].astype('datetime64[s]'), name='timestamp'))
+    
 
 class DataSource:
     """Base class for data sources"""
     
-    def __init__(self, name: str, rate_limit_ms: int = 1000):
+    def __init__(self, name: str, rate_limit_ms: int = 1000, burst: int = 1):
         self.name = name
         self.rate_limit_ms = rate_limit_ms
-        self.last_request = 0
+        # Request budget shared by every concurrent download from this source
+        self.bucket = TokenBucket(rate=1000 / rate_limit_ms, capacity=burst)
         
     async def _rate_limit(self):
-        """Enforce rate limiting"""
-        elapsed = (time.time() * 1000) - self.last_request
-        if elapsed < self.rate_limit_ms:
-            await asyncio.sleep((self.rate_limit_ms - elapsed) / 1000)
-        self.last_request = time.time() * 1000
+        """Enforce rate limiting (one token per API request)"""
+        await self.bucket.acquire()
         
     async def get_ohlcv(
         self, 
@@ -43,7 +97,13 @@ class DataSource:
         start_date: datetime, 
         end_date: datetime
     ) -> Optional[pd.DataFrame]:
-        """Get OHLCV data for the specified period"""
+        """
+        Get OHLCV data for the specified period
+        
+        Sources set ``attrs['complete']`` on the frame once they have paged
+        through the whole range; a frame cut short (e.g. by an API error)
+        only covers up to its last candle.
+        """
         raise NotImplementedError
 
 
@@ -68,8 +128,6 @@ class KrakenDataSource(DataSource):
     ) -> Optional[pd.DataFrame]:
         """Get OHLCV data from Kraken"""
         try:
-            await self._rate_limit()
-            
             # Convert pair format (XBTUSD -> BTC/USD)
             ccxt_pair = self._convert_pair_format(pair)
             
@@ -79,9 +137,11 @@ class KrakenDataSource(DataSource):
             all_data = []
             current_since = since
             end_timestamp = int(end_date.timestamp() * 1000)
+            complete = True
             
             while current_since < end_timestamp:
                 try:
+                    await self._rate_limit()
                     ohlcv = await self.exchange.fetch_ohlcv(
                         ccxt_pair, timeframe, since=current_since, limit=720
                     )
@@ -97,11 +157,9 @@ class KrakenDataSource(DataSource):
                     else:
                         break
                         
-                    # Don't hammer the API
-                    await asyncio.sleep(1)
-                    
                 except Exception as e:
                     logger.warning(f"Kraken API error: {e}")
+                    complete = False
                     break
                     
             if all_data:
@@ -112,6 +170,7 @@ class KrakenDataSource(DataSource):
                 
                 # Filter to requested date range
                 df = df[(df.index >= start_date) & (df.index <= end_date)]
+                df.attrs['complete'] = complete
                 
                 logger.info(f"Kraken: Retrieved {len(df)} {timeframe} candles for {pair}")
                 return df
@@ -141,6 +200,7 @@ class KrakenDataSource(DataSource):
             '5m': 5 * 60 * 1000,
             '15m': 15 * 60 * 1000,
             '1h': 60 * 60 * 1000,
+            '4h': 4 * 60 * 60 * 1000,
             '1d': 24 * 60 * 60 * 1000
         }
         return timeframe_map.get(timeframe, 60 * 1000)
@@ -163,17 +223,16 @@ class CryptoCompareDataSource(DataSource):
     ) -> Optional[pd.DataFrame]:
         """Get OHLCV data from CryptoCompare"""
         try:
-            await self._rate_limit()
-            
             # Convert formats
             fsym, tsym = self._parse_pair(pair)
-            endpoint = self._get_endpoint(timeframe)
+            endpoint, aggregate = self._get_endpoint(timeframe)
             
             params = {
                 'fsym': fsym,
                 'tsym': tsym,
                 'toTs': int(end_date.timestamp()),
                 'limit': 2000,  # Max 2000 points per request
+                'aggregate': aggregate,
             }
             
             if self.api_key:
@@ -183,11 +242,13 @@ class CryptoCompareDataSource(DataSource):
             
             all_data = []
             current_end = end_date
+            complete = True
             
             async with aiohttp.ClientSession() as session:
                 while current_end > start_date:
                     params['toTs'] = int(current_end.timestamp())
                     
+                    await self._rate_limit()
                     async with session.get(url, params=params) as response:
                         if response.status == 200:
                             data = await response.json()
@@ -209,13 +270,13 @@ class CryptoCompareDataSource(DataSource):
                                 
                             else:
                                 logger.warning(f"CryptoCompare API error: {data.get('Message')}")
+                                complete = False
                                 break
                         else:
                             logger.error(f"CryptoCompare HTTP error: {response.status}")
+                            complete = False
                             break
                             
-                    await asyncio.sleep(0.1)  # Rate limiting
-                    
             if all_data:
                 # Convert to DataFrame
                 df_data = []
@@ -235,6 +296,7 @@ class CryptoCompareDataSource(DataSource):
                 
                 # Filter to requested range
                 df = df[(df.index >= start_date) & (df.index <= end_date)]
+                df.attrs['complete'] = complete
                 
                 logger.info(f"CryptoCompare: Retrieved {len(df)} {timeframe} candles for {pair}")
                 return df
@@ -266,16 +328,19 @@ class CryptoCompareDataSource(DataSource):
             
         return ('BTC', 'USD')  # Default
         
-    def _get_endpoint(self, timeframe: str) -> str:
-        """Get API endpoint for timeframe"""
+    def _get_endpoint(self, timeframe: str) -> Tuple[str, int]:
+        """Get API endpoint and number of its base periods per candle for a timeframe"""
         endpoint_map = {
-            '1m': 'histominute',
-            '5m': 'histominute',
-            '15m': 'histominute',
-            '1h': 'histohour',
-            '1d': 'histoday'
+            '1m': ('histominute', 1),
+            '5m': ('histominute', 5),
+            '15m': ('histominute', 15),
+            '1h': ('histohour', 1),
+            '4h': ('histohour', 4),
+            '1d': ('histoday', 1)
         }
-        return endpoint_map.get(timeframe, 'histohour')
+        if timeframe not in endpoint_map:
+            raise ValueError(f"Unsupported CryptoCompare timeframe: {timeframe}")
+        return endpoint_map[timeframe]
 
 
 class BinanceDataSource(DataSource):
@@ -296,8 +361,6 @@ class BinanceDataSource(DataSource):
     ) -> Optional[pd.DataFrame]:
         """Get OHLCV data from Binance"""
         try:
-            await self._rate_limit()
-            
             # Convert pair format
             binance_pair = self._convert_pair_format(pair)
             
@@ -306,9 +369,11 @@ class BinanceDataSource(DataSource):
             all_data = []
             current_since = since
             end_timestamp = int(end_date.timestamp() * 1000)
+            complete = True
             
             while current_since < end_timestamp:
                 try:
+                    await self._rate_limit()
                     ohlcv = await self.exchange.fetch_ohlcv(
                         binance_pair, timeframe, since=current_since, limit=1000
                     )
@@ -323,10 +388,9 @@ class BinanceDataSource(DataSource):
                     else:
                         break
                         
-                    await asyncio.sleep(0.1)
-                    
                 except Exception as e:
                     logger.warning(f"Binance API error: {e}")
+                    complete = False
                     break
                     
             if all_data:
@@ -336,6 +400,7 @@ class BinanceDataSource(DataSource):
                 df = df.sort_index()
                 
                 df = df[(df.index >= start_date) & (df.index <= end_date)]
+                df.attrs['complete'] = complete
                 
                 logger.info(f"Binance: Retrieved {len(df)} {timeframe} candles for {pair}")
                 return df
@@ -360,15 +425,23 @@ class BinanceDataSource(DataSource):
 class DataCache:
     """Local SQLite cache for historical data"""
     
-    def __init__(self, cache_dir: str = "data_cache"):
+    def __init__(self, cache_dir: str = "data_cache", chunk_size: int = 50_000):
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(exist_ok=True)
         self.db_path = self.cache_dir / "historical_data.db"
+        self.chunk_size = chunk_size  # Rows per executemany batch during ingestion
         self._init_database()
         
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection tuned for bulk writes"""
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+        
     def _init_database(self):
         """Initialize SQLite database"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -439,32 +512,39 @@ class DataCache:
         df: pd.DataFrame, 
         pair: str, 
         timeframe: str, 
-        source: str
+        source: str,
+        chunk_size: Optional[int] = None
     ):
-        """Store data in cache"""
+        """Store data in cache using batched executemany in a single transaction"""
         if df.empty:
             return
             
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         created_at = int(time.time())
+        chunk_size = chunk_size or self.chunk_size
         
-        for timestamp, row in df.iterrows():
-            cursor.execute('''
-                INSERT OR REPLACE INTO ohlcv_data 
-                (pair, timeframe, timestamp, open, high, low, close, volume, source, created_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                pair, timeframe, int(timestamp.timestamp()),
-                float(row['open']), float(row['high']), float(row['low']),
-                float(row['close']), float(row['volume']),
-                source, created_at
-            ))
-            
-        conn.commit()
-        conn.close()
+        # Convert once through NumPy instead of boxing every value via iterrows()
+        timestamps = to_epoch_seconds(df.index)
+        values = df[['open', 'high', 'low', 'close', 'volume']].to_numpy(dtype=np.float64)
         
+        conn = self._connect()
+        try:
+            # One transaction for the whole frame, streamed in bounded batches
+            with conn:
+                for start in range(0, len(df), chunk_size):
+                    end = start + chunk_size
+                    conn.executemany('''
+                        INSERT OR REPLACE INTO ohlcv_data 
+                        (pair, timeframe, timestamp, open, high, low, close, volume, source, created_at)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ''', [
+                        (pair, timeframe, ts, o, h, l, c, v, source, created_at)
+                        for ts, (o, h, l, c, v) in zip(
+                            timestamps[start:end].tolist(), values[start:end].tolist()
+                        )
+                    ])
+        finally:
+            conn.close()
+            
         logger.info(f"Cache: Stored {len(df)} candles for {pair} {timeframe}")
         
     def get_cache_coverage(
@@ -494,6 +574,239 @@ class DataCache:
         return None, None
 
 
+class CoverageIndex:
+    """
+    Contiguous cached intervals per (pair, timeframe)
+    
+    Intervals record the ranges that have actually been fetched, so holes
+    inside them (exchange downtime, minutes without trades) are not
+    re-requested. Persisted as a small JSON file next to the cache.
+    """
+    
+    def __init__(self, cache_dir: str = "data_cache"):
+        self.path = Path(cache_dir) / "coverage_index.json"
+        self._intervals: Dict[str, List[Tuple[datetime, datetime]]] = {}
+        
+        if self.path.exists():
+            with open(self.path) as f:
+                raw = json.load(f)
+            self._intervals = {
+                key: [(datetime.fromisoformat(s), datetime.fromisoformat(e)) for s, e in spans]
+                for key, spans in raw.items()
+            }
+            
+    def _key(self, pair: str, timeframe: str) -> str:
+        return f"{pair}|{timeframe}"
+        
+    def has_series(self, pair: str, timeframe: str) -> bool:
+        """Check whether a series has been indexed"""
+        return self._key(pair, timeframe) in self._intervals
+        
+    def intervals(self, pair: str, timeframe: str) -> List[Tuple[datetime, datetime]]:
+        """Sorted, non-overlapping cached intervals of a series"""
+        return list(self._intervals.get(self._key(pair, timeframe), []))
+        
+    def add(
+        self,
+        pair: str,
+        timeframe: str,
+        start: datetime,
+        end: datetime,
+        tolerance: timedelta = timedelta(0)
+    ):
+        """Record [start, end] as cached, coalescing intervals closer than tolerance"""
+        if end < start:
+            return
+            
+        key = self._key(pair, timeframe)
+        spans = sorted(self._intervals.get(key, []) + [(start, end)])
+        
+        merged = [spans[0]]
+        for span_start, span_end in spans[1:]:
+            last_start, last_end = merged[-1]
+            if span_start <= last_end + tolerance:
+                merged[-1] = (last_start, max(last_end, span_end))
+            else:
+                merged.append((span_start, span_end))
+                
+        self._intervals[key] = merged
+        self._save()
+        
+    def missing(
+        self,
+        pair: str,
+        timeframe: str,
+        start: datetime,
+        end: datetime,
+        min_gap: timedelta = timedelta(0)
+    ) -> List[Tuple[datetime, datetime]]:
+        """
+        Sub-ranges of [start, end] not yet cached, ignoring interior gaps
+        shorter than min_gap
+        
+        A gap at the end of the range is always reported, however short, so
+        the bar still forming there is not served stale.
+        """
+        gaps = []
+        cursor = start
+        
+        for span_start, span_end in self._intervals.get(self._key(pair, timeframe), []):
+            if span_end < cursor:
+                continue
+            if span_start > end:
+                break
+            if span_start > cursor:
+                gaps.append((cursor, span_start))
+            cursor = max(cursor, span_end)
+            
+        gaps = [(gap_start, gap_end) for gap_start, gap_end in gaps if gap_end - gap_start >= min_gap]
+        if cursor < end:
+            gaps.append((cursor, end))
+            
+        return gaps
+        
+    def clear(self, pair: str, timeframe: str):
+        """Forget the coverage of a series so it is fetched again"""
+        if self._intervals.pop(self._key(pair, timeframe), None) is not None:
+            self._save()
+            
+    def _save(self):
+        """Atomically rewrite the index file"""
+        raw = {
+            key: [[s.isoformat(), e.isoformat()] for s, e in spans]
+            for key, spans in self._intervals.items()
+        }
+        tmp_path = self.path.with_suffix('.json.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(raw, f)
+        os.replace(tmp_path, self.path)
+
+
+@dataclass
+class DownloadJob:
+    """One chunk of a (pair, timeframe) backfill"""
+    pair: str
+    timeframe: str
+    start_date: datetime
+    end_date: datetime
+    attempts: int = 0
+    candles: int = 0
+    done: bool = False
+
+
+class DownloadScheduler:
+    """
+    Concurrent backfill of many (pair, timeframe, chunk) jobs
+    
+    Jobs are drained by a pool of workers. Every API request still takes a
+    token from its source's bucket, so throughput is bounded by the sources'
+    rate limits instead of fixed sleeps. Progress lives in the manager's
+    coverage index, which is saved after every stored chunk: rerunning an
+    interrupted download only schedules the chunks still missing.
+    """
+    
+    def __init__(
+        self,
+        manager: 'HistoricalDataManager',
+        max_concurrency: int = 16,
+        chunk_bars: int = 5000,
+        max_retries: int = 3,
+        backoff_seconds: float = 2.0
+    ):
+        self.manager = manager
+        self.max_concurrency = max_concurrency
+        self.chunk_bars = chunk_bars
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        
+    def plan(
+        self,
+        pairs: List[str],
+        timeframes: List[str],
+        start_date: datetime,
+        end_date: datetime
+    ) -> List[DownloadJob]:
+        """Split the missing ranges of every series into chunk-sized jobs"""
+        jobs = []
+        
+        for pair in pairs:
+            for timeframe in timeframes:
+                self.manager._seed_coverage(pair, timeframe)
+                bar = TIMEFRAME_DELTAS.get(timeframe, timedelta(minutes=1))
+                chunk = bar * self.chunk_bars
+                
+                for gap_start, gap_end in self.manager.coverage.missing(
+                    pair, timeframe, start_date, end_date, min_gap=bar
+                ):
+                    chunk_start = gap_start
+                    while chunk_start < gap_end:
+                        chunk_end = min(chunk_start + chunk, gap_end)
+                        jobs.append(DownloadJob(pair, timeframe, chunk_start, chunk_end))
+                        chunk_start = chunk_end
+                        
+        return jobs
+        
+    async def run(self, jobs: List[DownloadJob]) -> List[DownloadJob]:
+        """Run jobs concurrently until each is done or out of retries"""
+        if not jobs:
+            return jobs
+            
+        queue: asyncio.Queue = asyncio.Queue()
+        for job in jobs:
+            queue.put_nowait(job)
+            
+        workers = [
+            asyncio.create_task(self._worker(queue))
+            for _ in range(min(self.max_concurrency, len(jobs)))
+        ]
+        
+        try:
+            await queue.join()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            
+        return jobs
+        
+    async def _worker(self, queue: asyncio.Queue):
+        """Take jobs off the queue until cancelled"""
+        while True:
+            job = await queue.get()
+            try:
+                await self._run_job(job)
+            finally:
+                queue.task_done()
+                
+    async def _run_job(self, job: DownloadJob):
+        """Fetch one chunk, retrying with exponential backoff while it stays missing"""
+        bar = TIMEFRAME_DELTAS.get(job.timeframe, timedelta(minutes=1))
+        
+        while True:
+            job.attempts += 1
+            try:
+                job.candles += await self.manager._fill_range(
+                    job.pair, job.timeframe, job.start_date, job.end_date
+                )
+            except Exception as e:
+                logger.warning(f"Download error for {job.pair} {job.timeframe} {job.start_date}: {e}")
+                
+            if not self.manager.coverage.missing(
+                job.pair, job.timeframe, job.start_date,
+                self.manager._coverable_end(job.end_date, bar), min_gap=bar
+            ):
+                job.done = True
+                return
+                
+            if job.attempts > self.max_retries:
+                logger.warning(f"Giving up on {job.pair} {job.timeframe} "
+                             f"{job.start_date} to {job.end_date} after {job.attempts} attempts")
+                return
+                
+            delay = self.backoff_seconds * 2 ** (job.attempts - 1) * random.uniform(1.0, 1.5)
+            await asyncio.sleep(delay)
+
+
 class HistoricalDataManager:
     """Main historical data manager with multiple sources and caching"""
     
@@ -502,7 +815,8 @@ class HistoricalDataManager:
         kraken_api_key: str = None,
         kraken_api_secret: str = None,
         cryptocompare_api_key: str = None,
-        cache_dir: str = "data_cache"
+        cache_dir: str = "data_cache",
+        cache_backend: str = "columnar"  # 'columnar' or 'sqlite'
     ):
         # Initialize data sources in priority order
         self.sources = []
@@ -520,7 +834,17 @@ class HistoricalDataManager:
         self.sources.append(BinanceDataSource())
         
         # Local cache
-        self.cache = DataCache(cache_dir)
+        if cache_backend == 'columnar':
+            self.cache = ColumnarDataCache(cache_dir)
+            # One-shot import of an existing SQLite cache (no-op once migrated)
+            self.cache.migrate_from_sqlite()
+        elif cache_backend == 'sqlite':
+            self.cache = DataCache(cache_dir)
+        else:
+            raise ValueError(f"Unknown cache backend: {cache_backend}")
+            
+        # Which ranges of each series are already cached
+        self.coverage = CoverageIndex(cache_dir)
         
         logger.info(f"Initialized HistoricalDataManager with {len(self.sources)} data sources")
         
@@ -534,51 +858,247 @@ class HistoricalDataManager:
     ) -> pd.DataFrame:
         """
         Get historical OHLCV data with intelligent source selection and caching
+        
+        With the cache enabled only the sub-ranges missing from the coverage
+        index are downloaded (concurrently), then the full range is read back
+        from the cache. Without it the whole range is fetched fresh and stored.
         """
         logger.info(f"Requesting {pair} {timeframe} data from {start_date} to {end_date}")
         
-        # Check cache first
-        if use_cache:
-            cached_data = self.cache.get_cached_data(pair, timeframe, start_date, end_date)
+        if not use_cache:
+            for source in self.sources:
+                data = await self._fetch_from_source(source, pair, timeframe, start_date, end_date)
+                if data is not None:
+                    self._store(data, pair, timeframe, source.name, start_date, end_date)
+                    return data
+                    
+            logger.error(f"Failed to retrieve data for {pair} {timeframe} from all sources")
+            return pd.DataFrame()
+            
+        self._seed_coverage(pair, timeframe)
+        bar = TIMEFRAME_DELTAS.get(timeframe, timedelta(minutes=1))
+        missing = self.coverage.missing(pair, timeframe, start_date, end_date, min_gap=bar)
+        
+        # Roll up cached 1m candles before asking any source
+        if missing and self._derive_rollups(pair, timeframe, start_date, end_date):
+            missing = self.coverage.missing(pair, timeframe, start_date, end_date, min_gap=bar)
+        
+        if not missing:
+            logger.info(f"Cache hit: Full range available for {pair} {timeframe}")
+        else:
+            logger.info(f"Fetching {len(missing)} missing range(s) for {pair} {timeframe}")
+            fetched = await asyncio.gather(*(
+                self._fill_range(pair, timeframe, gap_start, gap_end)
+                for gap_start, gap_end in missing
+            ))
+            logger.info(f"Fetched {sum(fetched)} new candles for {pair} {timeframe}")
+            
+        data = self.cache.get_cached_data(pair, timeframe, start_date, end_date)
+        if data is None or data.empty:
+            logger.error(f"Failed to retrieve data for {pair} {timeframe} from all sources")
+            return pd.DataFrame()
+            
+        return data
+        
+    async def _fetch_from_source(
+        self,
+        source: DataSource,
+        pair: str,
+        timeframe: str,
+        start_date: datetime,
+        end_date: datetime
+    ) -> Optional[pd.DataFrame]:
+        """Fetch and clean one range from one source, None if it had nothing"""
+        try:
+            logger.info(f"Trying {source.name} for {pair} {timeframe} ({start_date} to {end_date})")
+            
+            data = await source.get_ohlcv(pair, timeframe, start_date, end_date)
             
-            if cached_data is not None and not cached_data.empty:
-                # Check if cache covers the full requested range
-                cache_start = cached_data.index.min()
-                cache_end = cached_data.index.max()
+            if data is not None and not data.empty:
+                # Validate and clean data
+                complete = data.attrs.get('complete', False)
+                data = self._validate_and_clean_data(data, pair)
+                data.attrs['complete'] = complete
                 
-                if cache_start <= start_date and cache_end >= end_date:
-                    logger.info(f"Cache hit: Full range available for {pair} {timeframe}")
-                    return cached_data
+                if not data.empty:
+                    logger.info(f"Successfully retrieved {len(data)} candles from {source.name}")
+                    return data
                     
-                # Partial cache hit - identify missing ranges
-                logger.info(f"Partial cache hit for {pair} {timeframe}")
-                
-        # Try each data source until we get data
+        except Exception as e:
+            logger.warning(f"Error with {source.name}: {e}")
+            
+        return None
+        
+    async def _fill_range(
+        self,
+        pair: str,
+        timeframe: str,
+        start_date: datetime,
+        end_date: datetime
+    ) -> int:
+        """
+        Download one missing range into the cache
+        
+        Sources are tried in priority order; each later source is only asked
+        for what the earlier ones left uncovered, so better data is never
+        overwritten by a fallback. If no source has anything before the
+        earliest candle stored, the pair was not listed yet: everything
+        before it is recorded as covered so refreshes stop asking for it.
+        Returns the number of candles stored.
+        """
+        bar = TIMEFRAME_DELTAS.get(timeframe, timedelta(minutes=1))
+        remaining = [(start_date, end_date)]
+        fetched = 0
+        history_start = None  # Earliest candle stored by this call
+        
         for source in self.sources:
-            try:
-                logger.info(f"Trying {source.name} for {pair} {timeframe}")
+            for gap_start, gap_end in remaining:
+                data = await self._fetch_from_source(source, pair, timeframe, gap_start, gap_end)
+                if data is not None:
+                    self._store(data, pair, timeframe, source.name, gap_start, gap_end)
+                    fetched += len(data)
+                    first = data.index[0].to_pydatetime()
+                    history_start = first if history_start is None else min(history_start, first)
+                    
+            # The bar still forming can never be covered, so no fallback is asked for it
+            remaining = self.coverage.missing(
+                pair, timeframe, start_date, self._coverable_end(end_date, bar), min_gap=bar
+            )
+            if not remaining:
+                break
                 
-                data = await source.get_ohlcv(pair, timeframe, start_date, end_date)
+        if remaining and history_start is not None:
+            gap_start, gap_end = remaining[0]
+            if gap_start == start_date and gap_end >= history_start:
+                logger.info(f"No {pair} {timeframe} history before {history_start}, marking it covered")
+                self.coverage.add(pair, timeframe, EPOCH, history_start, tolerance=bar)
                 
-                if data is not None and not data.empty:
-                    # Validate and clean data
-                    data = self._validate_and_clean_data(data, pair)
+        return fetched
+        
+    @staticmethod
+    def _coverable_end(end_date: datetime, bar: timedelta) -> datetime:
+        """Latest end a range can be covered to: the end of the last closed bar"""
+        return min(end_date, floor_to_bar(datetime.now(), bar))
+        
+    def _store(
+        self,
+        data: pd.DataFrame,
+        pair: str,
+        timeframe: str,
+        source: str,
+        start_date: datetime,
+        end_date: datetime
+    ):
+        """Cache fetched candles and record the range they cover"""
+        self.cache.cache_data(data, pair, timeframe, source)
+        
+        bar = TIMEFRAME_DELTAS.get(timeframe, timedelta(minutes=1))
+        first = data.index[0].to_pydatetime()
+        
+        # A source that starts later than asked (e.g. limited history) only
+        # covers from its first candle. The range ends at the requested end,
+        # or where the last closed bar ends so the bar still forming there is
+        # fetched again next time; a quiet end of range is only covered when
+        # the source reports it paged through the whole range, otherwise the
+        # range ends with its last candle.
+        covered_start = start_date if first - start_date <= bar else first
+        covered_end = self._coverable_end(end_date, bar)
+        if not data.attrs.get('complete', False):
+            covered_end = min(covered_end, data.index[-1].to_pydatetime() + bar)
+        self.coverage.add(pair, timeframe, covered_start, covered_end, tolerance=bar)
+        
+        # Keep materialized rollups in step with the newly covered 1m range;
+        # _derive_rollups widens it to whole rollup bars
+        if timeframe == BASE_TIMEFRAME:
+            for rollup in TIMEFRAME_DELTAS:
+                if rollup != BASE_TIMEFRAME and self.coverage.has_series(pair, rollup):
+                    self._derive_rollups(pair, rollup, covered_start, covered_end, refresh=True)
+        
+    def _derive_rollups(
+        self,
+        pair: str,
+        timeframe: str,
+        start_date: datetime,
+        end_date: datetime,
+        refresh: bool = False
+    ) -> int:
+        """
+        Build higher-timeframe bars from cached 1m candles
+        
+        Only the bars missing from the rollup's coverage are built, or every
+        bar in the range with refresh. Bars are derived where their 1m range
+        is cached; the rollup's coverage ends at the open of its last bar, so
+        that bar is rebuilt once more 1m candles arrive. Returns the number of
+        bars stored.
+        """
+        if timeframe == BASE_TIMEFRAME or timeframe not in TIMEFRAME_DELTAS:
+            return 0
+            
+        self._seed_coverage(pair, BASE_TIMEFRAME)
+        bar = TIMEFRAME_DELTAS[timeframe]
+        base_bar = TIMEFRAME_DELTAS[BASE_TIMEFRAME]
+        derived = 0
+        
+        if refresh:
+            ranges = [(start_date, end_date)]
+        else:
+            ranges = self.coverage.missing(pair, timeframe, start_date, end_date, min_gap=bar)
+            
+        for gap_start, gap_end in ranges:
+            gap_start = floor_to_bar(gap_start, bar)
+            
+            for base_start, base_end in self.coverage.intervals(pair, BASE_TIMEFRAME):
+                # First bar fully inside the 1m interval, through the bar holding its last candle
+                first_bar = floor_to_bar(base_start + bar - base_bar, bar)
+                last_bar = floor_to_bar(min(base_end, gap_end), bar)
+                first_bar = max(first_bar, gap_start)
+                if first_bar > last_bar:
+                    continue
                     
-                    if not data.empty:
-                        # Cache the data
-                        if use_cache:
-                            self.cache.cache_data(data, pair, timeframe, source.name)
-                            
-                        logger.info(f"Successfully retrieved {len(data)} candles from {source.name}")
-                        return data
-                        
-            except Exception as e:
-                logger.warning(f"Error with {source.name}: {e}")
-                continue
+                candles = self.cache.get_cached_data(
+                    pair, BASE_TIMEFRAME, first_bar, min(base_end, last_bar + bar - base_bar)
+                )
+                if candles is None or candles.empty:
+                    continue
+                    
+                rollup = resample_ohlcv(candles, timeframe)
+                self.cache.cache_data(rollup, pair, timeframe, f"rollup:{BASE_TIMEFRAME}")
+                self.coverage.add(pair, timeframe, first_bar, last_bar, tolerance=bar)
+                derived += len(rollup)
                 
-        # If no source worked, return empty DataFrame
-        logger.error(f"Failed to retrieve data for {pair} {timeframe} from all sources")
-        return pd.DataFrame()
+        if derived:
+            logger.info(f"Derived {derived} {timeframe} bars for {pair} from {BASE_TIMEFRAME} candles")
+            
+        return derived
+        
+    def _seed_coverage(self, pair: str, timeframe: str):
+        """Index a series that was cached before the coverage index existed"""
+        if self.coverage.has_series(pair, timeframe):
+            return
+            
+        cache_start, cache_end = self.cache.get_cache_coverage(pair, timeframe)
+        if cache_start is None:
+            return
+            
+        cached = self.cache.get_cached_data(pair, timeframe, cache_start, cache_end)
+        if cached is None or cached.empty:
+            return
+            
+        # Earlier downloads always fetched whole ranges, so only long holes
+        # are treated as missing rather than as quiet market periods
+        bar = TIMEFRAME_DELTAS.get(timeframe, timedelta(minutes=1))
+        timestamps = cached.index.values
+        breaks = np.flatnonzero(np.diff(timestamps) > np.timedelta64(max(SEED_GAP, 2 * bar)))
+        
+        for run_start, run_end in zip(np.r_[0, breaks + 1], np.r_[breaks, len(timestamps) - 1]):
+            self.coverage.add(
+                pair, timeframe,
+                cached.index[run_start].to_pydatetime(),
+                cached.index[run_end].to_pydatetime(),
+                tolerance=bar
+            )
+            
+        logger.info(f"Indexed {len(breaks) + 1} cached interval(s) for {pair} {timeframe}")
         
     def _validate_and_clean_data(self, df: pd.DataFrame, pair: str) -> pd.DataFrame:
         """Validate and clean OHLCV data"""
@@ -609,7 +1129,8 @@ class HistoricalDataManager:
         # Remove extreme outliers (price spikes > 50% from previous close)
         if len(df) > 1:
             price_changes = df['close'].pct_change().abs()
-            df = df[price_changes <= 0.5]  # Remove >50% price changes
+            # Keep the first candle (no previous close); gap fills start mid-series
+            df = df[(price_changes <= 0.5) | price_changes.isna()]  # Remove >50% price changes
             
         cleaned_len = len(df)
         
@@ -622,35 +1143,62 @@ class HistoricalDataManager:
         self, 
         pairs: List[str], 
         timeframes: List[str],
-        days_back: int = 365
-    ):
-        """Download and cache historical data for multiple pairs/timeframes"""
+        days_back: int = 365,
+        force_refresh: bool = False,
+        max_concurrency: int = 16,
+        chunk_bars: int = 5000
+    ) -> List[DownloadJob]:
+        """
+        Download and cache historical data for multiple pairs/timeframes
+        
+        All missing chunks are fetched concurrently through a DownloadScheduler.
+        Higher timeframes are rolled up from cached 1m candles where possible
+        and only downloaded where 1m data is missing. force_refresh drops the
+        existing coverage so everything is fetched again.
+        Returns the scheduled jobs so callers can report failures.
+        """
         end_date = datetime.now()
         start_date = end_date - timedelta(days=days_back)
         
         logger.info(f"Downloading {days_back} days of data for {len(pairs)} pairs, {len(timeframes)} timeframes")
         
+        if force_refresh:
+            for pair in pairs:
+                for timeframe in timeframes:
+                    self.coverage.clear(pair, timeframe)
+                    
+        scheduler = DownloadScheduler(self, max_concurrency=max_concurrency, chunk_bars=chunk_bars)
+        
+        # Fetch 1m first so the other timeframes can be rolled up from it
+        base = [tf for tf in timeframes if tf == BASE_TIMEFRAME]
+        rollups = [tf for tf in timeframes if tf != BASE_TIMEFRAME]
+        
+        jobs = scheduler.plan(pairs, base, start_date, end_date)
+        if jobs:
+            logger.info(f"Scheduled {len(jobs)} {BASE_TIMEFRAME} download chunks")
+            await scheduler.run(jobs)
+            
+        for pair in pairs:
+            for timeframe in rollups:
+                self._derive_rollups(pair, timeframe, start_date, end_date)
+                
+        rollup_jobs = scheduler.plan(pairs, rollups, start_date, end_date)
+        logger.info(f"Scheduled {len(rollup_jobs)} download chunks for ranges without 1m data")
+        jobs += await scheduler.run(rollup_jobs)
+        
         for pair in pairs:
             for timeframe in timeframes:
-                try:
-                    logger.info(f"Downloading {pair} {timeframe}...")
-                    
-                    data = await self.get_historical_data(
-                        pair, timeframe, start_date, end_date, use_cache=False
-                    )
-                    
-                    if not data.empty:
-                        logger.info(f"✅ Downloaded {len(data)} candles for {pair} {timeframe}")
-                    else:
-                        logger.warning(f"❌ No data retrieved for {pair} {timeframe}")
-                        
-                    # Small delay between requests
-                    await asyncio.sleep(0.5)
-                    
-                except Exception as e:
-                    logger.error(f"Error downloading {pair} {timeframe}: {e}")
+                series_jobs = [job for job in jobs if job.pair == pair and job.timeframe == timeframe]
+                failed = sum(1 for job in series_jobs if not job.done)
+                candles = sum(job.candles for job in series_jobs)
+                
+                if failed:
+                    logger.warning(f"❌ {failed} of {len(series_jobs)} chunks failed for {pair} {timeframe}")
+                else:
+                    logger.info(f"✅ Downloaded {candles} candles for {pair} {timeframe}")
                     
         logger.info("Data download complete")
+        return jobs
         
     async def get_latest_price(self, pair: str) -> Optional[float]:
         """Get latest price for a pair"""
@@ -673,7 +1221,7 @@ class HistoricalDataManager:
         
     def get_available_timeframes(self) -> List[str]:
         """Get list of available timeframes"""
-        return ['1m', '5m', '15m', '1h', '1d']
+        return ['1m', '5m', '15m', '1h', '4h', '1d']
         
     async def cleanup(self):
         """Clean up resources"""
@@ -4,11 +4,14 @@ Kraken-specific utilities extracted from my_kraken_bot
 Provides additional functionality for the johnstreet project
 """
 
+import numpy as np
 import pandas as pd
-from datetime import datetime
 from typing import Dict, List, Optional, Tuple
 import logging
 
+from ohlc_ring_buffer import OHLCRingBuffer
+from src.core.indicators import IndicatorRegistry
+
 logger = logging.getLogger(__name__)
 
 
@@ -18,9 +21,10 @@ class KrakenDataManager:
     Extracted from my_kraken_bot with improvements
     """
     
-    def __init__(self):
-        # OHLC data storage with pandas for efficient time series operations
-        self.ohlc_data = {}  # Dict[pair, DataFrame]
+    def __init__(self, max_candles: int = 10000):
+        # OHLC data storage: a fixed-capacity ring buffer per "pair:interval"
+        self.max_candles = max_candles
+        self.ohlc_data: Dict[str, OHLCRingBuffer] = {}
         self.ohlc_interval_map = {
             1: '1m',
             5: '5m',
@@ -32,121 +36,154 @@ class KrakenDataManager:
             10080: '1w'
         }
         
-    def update_ohlc_data(self, pair: str, candle: dict, interval: int = 1) -> pd.DataFrame:
+        # Streaming indicators per "pair:interval", fed as candles arrive
+        self.indicator_registries: Dict[str, IndicatorRegistry] = {}
+        
+    def update_ohlc_data(self, pair: str, candle: dict, interval: int = 1) -> Optional[OHLCRingBuffer]:
         """
-        Update OHLC data with intelligent DataFrame management
-        Maintains sorted time series data with efficient updates
+        Update OHLC data in the series' ring buffer
+        
+        A new candle is appended and an update to the forming candle is
+        written in place, both O(1); the last max_candles candles are kept.
+        Returns the series buffer, or None if the candle could not be parsed.
         """
         try:
-            candle_time = datetime.utcfromtimestamp(float(candle["time"]))
-            new_row = {
-                "time": candle_time,
-                "open": float(candle["open"]),
-                "high": float(candle["high"]),
-                "low": float(candle["low"]),
-                "close": float(candle["close"]),
-                "volume": float(candle["volume"]),
-                "trades": int(candle.get("count", 0))
-            }
-            
+            time_us = round(float(candle["time"]) * 1_000_000)
             key = f"{pair}:{interval}"
             
-            # Initialize DataFrame if needed
-            if key not in self.ohlc_data:
-                self.ohlc_data[key] = pd.DataFrame(
-                    columns=["time", "open", "high", "low", "close", "volume", "trades"]
-                )
-                self.ohlc_data[key].set_index("time", inplace=True)
-            
-            df = self.ohlc_data[key]
-            
-            # Update or append the row
-            if candle_time in df.index:
-                # Update existing candle
-                df.loc[candle_time] = [
-                    new_row["open"], new_row["high"], new_row["low"],
-                    new_row["close"], new_row["volume"], new_row["trades"]
-                ]
-            else:
-                # Append new candle
-                new_df_row = pd.DataFrame([new_row]).set_index("time")
-                df = pd.concat([df, new_df_row])
-                df.sort_index(inplace=True)
-                
-                # Keep only last 10000 candles for memory efficiency
-                if len(df) > 10000:
-                    df = df.iloc[-10000:]
+            buffer = self.ohlc_data.get(key)
+            if buffer is None:
+                buffer = self.ohlc_data[key] = OHLCRingBuffer(self.max_candles)
                 
-                self.ohlc_data[key] = df
+            last_time = buffer.last_time
+            buffer.upsert(
+                time_us,
+                float(candle["open"]),
+                float(candle["high"]),
+                float(candle["low"]),
+                float(candle["close"]),
+                float(candle["volume"]),
+                int(candle.get("count", 0))
+            )
             
-            return df
+            self._update_indicators(key, buffer, last_time, time_us, candle)
+            
+            return buffer
             
         except Exception as e:
             logger.error(f"Error updating OHLC data for {pair}: {e}")
-            return pd.DataFrame()
+            return None
     
     def get_ohlc_data(self, pair: str, interval: int = 1, 
                       lookback_periods: Optional[int] = None) -> pd.DataFrame:
         """
         Get OHLC data with optional lookback
+        
+        Only the requested candles are copied into the DataFrame; use
+        get_ohlc_view for zero-copy arrays.
         """
-        key = f"{pair}:{interval}"
-        if key not in self.ohlc_data:
+        buffer = self.ohlc_data.get(f"{pair}:{interval}")
+        if buffer is None:
             return pd.DataFrame()
         
-        df = self.ohlc_data[key].copy()
-        if lookback_periods and len(df) > lookback_periods:
-            return df.iloc[-lookback_periods:]
-        return df
+        return buffer.to_frame(lookback_periods or None)
+    
+    def get_ohlc_view(self, pair: str, interval: int = 1,
+                      lookback_periods: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Zero-copy, read-only column arrays of the latest candles"""
+        buffer = self.ohlc_data.get(f"{pair}:{interval}")
+        if buffer is None:
+            return {}
+        
+        return buffer.view(lookback_periods or None)
+    
+    @staticmethod
+    def _new_indicator_registry() -> IndicatorRegistry:
+        """Registry with every indicator calculate_indicators reports"""
+        registry = IndicatorRegistry()
+        for period in (20, 50, 200):
+            registry.sma(period)
+        registry.ema(12)
+        registry.ema(26)
+        registry.macd(12, 26, 9)
+        registry.rsi(14)
+        registry.bollinger_bands(20, 2.0)
+        registry.sma(20, source='volume')
+        return registry
+    
+    def _update_indicators(self, key: str, buffer: OHLCRingBuffer, last_time: Optional[int],
+                           time_us: int, candle: dict):
+        """
+        Feed a candle to the streaming indicators of a series
+        
+        Updates to the latest candle revise it in place; a candle older than
+        the latest one (out of order) rebuilds the indicators from the buffer.
+        """
+        registry = self.indicator_registries.get(key)
+        
+        if registry is not None and registry.last_key == last_time:
+            if last_time is None or time_us > last_time:
+                registry.update(candle, key=time_us)
+                return
+            if time_us == last_time:
+                registry.update(candle, revise=True, key=time_us)
+                return
+                
+        self._rebuild_indicators(key, buffer)
+    
+    def _rebuild_indicators(self, key: str, buffer: OHLCRingBuffer,
+                            lookback: Optional[int] = None) -> IndicatorRegistry:
+        """Replay buffered candles into a fresh indicator registry"""
+        registry = self.indicator_registries[key] = self._new_indicator_registry()
+        registry.replay(buffer.to_frame(lookback))
+        registry.last_key = buffer.last_time
+        return registry
     
     def calculate_indicators(self, pair: str, interval: int = 1) -> Dict:
         """
         Calculate common technical indicators for a pair
         Returns dict with SMA, EMA, RSI, MACD, etc.
+        
+        Values come from streaming indicators updated with each candle, so
+        this is O(1) per call rather than a pandas pass over 500 rows.
         """
-        df = self.get_ohlc_data(pair, interval, lookback_periods=500)
-        if df.empty or len(df) < 20:
+        key = f"{pair}:{interval}"
+        buffer = self.ohlc_data.get(key)
+        if buffer is None or len(buffer) < 20:
             return {}
         
         indicators = {}
-        close_prices = df['close']
         
         try:
+            # Rebuild if the buffer was changed without update_ohlc_data
+            registry = self.indicator_registries.get(key)
+            if registry is None or registry.last_key != buffer.last_time:
+                registry = self._rebuild_indicators(key, buffer, lookback=500)
+                
             # Simple Moving Averages
-            indicators['sma_20'] = close_prices.rolling(window=20).mean().iloc[-1]
-            indicators['sma_50'] = close_prices.rolling(window=50).mean().iloc[-1] if len(df) >= 50 else None
-            indicators['sma_200'] = close_prices.rolling(window=200).mean().iloc[-1] if len(df) >= 200 else None
+            indicators['sma_20'] = registry.sma(20).value
+            indicators['sma_50'] = registry.sma(50).value if registry.sma(50).ready else None
+            indicators['sma_200'] = registry.sma(200).value if registry.sma(200).ready else None
             
             # Exponential Moving Averages
-            indicators['ema_12'] = close_prices.ewm(span=12, adjust=False).mean().iloc[-1]
-            indicators['ema_26'] = close_prices.ewm(span=26, adjust=False).mean().iloc[-1]
+            indicators['ema_12'] = registry.ema(12).value
+            indicators['ema_26'] = registry.ema(26).value
             
-            # MACD
-            ema_12 = close_prices.ewm(span=12, adjust=False).mean()
-            ema_26 = close_prices.ewm(span=26, adjust=False).mean()
-            macd_line = ema_12 - ema_26
-            signal_line = macd_line.ewm(span=9, adjust=False).mean()
-            indicators['macd'] = macd_line.iloc[-1]
-            indicators['macd_signal'] = signal_line.iloc[-1]
-            indicators['macd_histogram'] = indicators['macd'] - indicators['macd_signal']
+            # MACD, sharing the EMAs above
+            indicators['macd'], indicators['macd_signal'], indicators['macd_histogram'] = registry.macd(12, 26, 9).value
             
             # RSI
-            delta = close_prices.diff()
-            gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-            loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-            rs = gain / loss
-            indicators['rsi'] = 100 - (100 / (1 + rs)).iloc[-1]
+            indicators['rsi'] = registry.rsi(14).value
             
             # Bollinger Bands
-            sma_20 = close_prices.rolling(window=20).mean()
-            std_20 = close_prices.rolling(window=20).std()
-            indicators['bb_upper'] = (sma_20 + 2 * std_20).iloc[-1]
-            indicators['bb_middle'] = sma_20.iloc[-1]
-            indicators['bb_lower'] = (sma_20 - 2 * std_20).iloc[-1]
+            bb_middle, bb_upper, bb_lower = registry.bollinger_bands(20, 2.0).value
+            indicators['bb_upper'] = bb_upper
+            indicators['bb_middle'] = bb_middle
+            indicators['bb_lower'] = bb_lower
             
             # Volume indicators
-            indicators['volume_sma'] = df['volume'].rolling(window=20).mean().iloc[-1]
-            indicators['volume_ratio'] = df['volume'].iloc[-1] / indicators['volume_sma'] if indicators['volume_sma'] > 0 else 0
+            indicators['volume_sma'] = registry.sma(20, source='volume').value
+            indicators['volume_ratio'] = buffer.latest('volume') / indicators['volume_sma'] if indicators['volume_sma'] > 0 else 0
             
         except Exception as e:
             logger.error(f"Error calculating indicators for {pair}: {e}")
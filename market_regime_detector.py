@@ -13,8 +13,18 @@ from dataclasses import dataclass
 from enum import Enum
 import asyncio
 
+from src.core.indicators import RollingWindow, RollingExtreme
+
 logger = logging.getLogger(__name__)
 
+# Weight of each detection method when combining regime signals
+REGIME_METHOD_WEIGHTS = {
+    'trend': 0.4,
+    'volatility': 0.25,
+    'momentum': 0.25,
+    'breakout': 0.1
+}
+
 
 class MarketRegime(Enum):
     """Market regime types"""
@@ -38,6 +48,112 @@ class RegimeSignal:
     timestamp: datetime
     
 
+class RegimeIndicatorStream:
+    """
+    Streaming counterpart of MarketRegimeDetector._calculate_regime_indicators
+    
+    Fed one bar at a time, it keeps the rolling windows the batch calculation
+    slices from the full arrays: closes (20, 50 and the 20 before those),
+    returns (5, 20), true ranges, RSI gains and losses, volume, and rolling
+    high/low extremes. ``indicators()`` then matches the batch values for the
+    same history to floating point tolerance. The one exception is the RSI
+    window during the first 15 bars, where the batch loop skips the oldest
+    return.
+    """
+    
+    def __init__(self):
+        self.count = 0
+        self.close_20 = RollingWindow(20)
+        self.close_prior_20 = RollingWindow(20)
+        self.close_50 = RollingWindow(50)
+        self.returns_20 = RollingWindow(20)
+        self.returns_5 = RollingWindow(5)
+        self.true_range = RollingWindow(20)
+        self.gains = RollingWindow(14)
+        self.losses = RollingWindow(14)
+        self.volume_20 = RollingWindow(20)
+        self.high_20 = RollingExtreme(20, is_max=True)
+        self.low_20 = RollingExtreme(20, is_max=False)
+        self.last_close = 0.0
+        self.last_volume = 0.0
+        
+    def update(self, high: float, low: float, close: float, volume: float):
+        """Advance every window by one bar"""
+        if self.count:
+            prev_close = self.last_close
+            ret = (close - prev_close) / prev_close
+            self.returns_20.push(ret)
+            self.returns_5.push(ret)
+            self.true_range.push(max(high - low, abs(high - prev_close), abs(low - prev_close)))
+            if ret > 0:
+                self.gains.push(ret)
+                self.losses.push(0.0)
+            else:
+                self.gains.push(0.0)
+                self.losses.push(-ret)
+                
+        evicted = self.close_20.push(close)
+        if evicted is not None:
+            self.close_prior_20.push(evicted)
+        self.close_50.push(close)
+        self.volume_20.push(volume)
+        self.high_20.push(high)
+        self.low_20.push(low)
+        
+        self.count += 1
+        self.last_close = close
+        self.last_volume = volume
+        
+    def indicators(self) -> Dict[str, float]:
+        """Current indicator values, keyed like the batch calculation"""
+        close = self.last_close
+        indicators = {}
+        
+        # Trend indicators
+        indicators['sma_20'] = self.close_20.mean
+        indicators['sma_50'] = self.close_50.mean
+        indicators['price_vs_sma20'] = (close - indicators['sma_20']) / indicators['sma_20']
+        indicators['price_vs_sma50'] = (close - indicators['sma_50']) / indicators['sma_50']
+        prior = self.close_prior_20.mean
+        indicators['sma_slope_20'] = (indicators['sma_20'] - prior) / prior if self.close_prior_20.full else 0
+        
+        # Volatility indicators
+        indicators['volatility_20'] = self.returns_20.std(ddof=0)
+        indicators['volatility_5'] = self.returns_5.std(ddof=0)
+        indicators['volatility_ratio'] = indicators['volatility_5'] / indicators['volatility_20'] if indicators['volatility_20'] > 0 else 1
+        
+        # ATR (Average True Range)
+        indicators['atr'] = self.true_range.mean
+        indicators['atr_ratio'] = indicators['atr'] / close if close > 0 else 0
+        
+        # Momentum indicators
+        indicators['roc_14'] = (close - self.close_50.ago(14)) / self.close_50.ago(14) if self.count >= 15 else 0
+        indicators['roc_7'] = (close - self.close_50.ago(7)) / self.close_50.ago(7) if self.count >= 8 else 0
+        
+        # RSI approximation
+        avg_gain = self.gains.mean
+        avg_loss = self.losses.mean
+        rs = avg_gain / avg_loss if avg_loss > 0 else 100
+        indicators['rsi'] = 100 - (100 / (1 + rs))
+        
+        # Range indicators
+        lowest = self.low_20.value
+        price_range_20 = self.high_20.value - lowest
+        indicators['range_position'] = (close - lowest) / price_range_20 if price_range_20 > 0 else 0.5
+        
+        # Bollinger Band position
+        std_20 = self.close_20.std(ddof=0)
+        bb_upper = indicators['sma_20'] + (2 * std_20)
+        bb_lower = indicators['sma_20'] - (2 * std_20)
+        indicators['bb_position'] = (close - bb_lower) / (bb_upper - bb_lower) if bb_upper != bb_lower else 0.5
+        
+        # Volume indicators
+        avg_volume_20 = self.volume_20.mean
+        indicators['volume_ratio'] = self.last_volume / avg_volume_20 if avg_volume_20 > 0 else 1
+        
+        return indicators
+        
+
 class MarketRegimeDetector:
     """
     Detects market regimes using multiple technical indicators
@@ -60,6 +176,9 @@ class MarketRegimeDetector:
         self.regime_history: List[RegimeSignal] = []
         self.last_analysis_time = None
         
+        # Streaming indicator state per series, fed by update()
+        self.streams: Dict[str, RegimeIndicatorStream] = {}
+        
     def analyze_regime(self, price_data: pd.DataFrame) -> RegimeSignal:
         """
         Analyze current market regime based on price data
@@ -77,43 +196,229 @@ class MarketRegimeDetector:
                 
             # Calculate technical indicators
             indicators = self._calculate_regime_indicators(price_data)
+            signal = self._classify_regime(indicators)
             
-            # Detect regime using multiple methods
-            regimes = {
-                'trend': self._detect_trend_regime(indicators),
-                'volatility': self._detect_volatility_regime(indicators),
-                'momentum': self._detect_momentum_regime(indicators),
-                'breakout': self._detect_breakout_regime(indicators)
-            }
+            logger.info(f"📊 Market regime: {signal.regime.value} (confidence: {signal.confidence:.2f}, strength: {signal.strength:.2f})")
             
-            # Combine regime signals
-            final_regime, confidence = self._combine_regime_signals(regimes, indicators)
-            
-            # Calculate regime strength and duration
-            strength = self._calculate_regime_strength(indicators, final_regime)
-            duration = self._calculate_regime_duration(final_regime)
-            
-            # Create regime signal
-            signal = RegimeSignal(
-                regime=final_regime,
-                confidence=confidence,
-                strength=strength,
-                duration=duration,
-                indicators=indicators,
-                timestamp=datetime.now()
-            )
+            return signal
             
-            # Update state
-            self._update_regime_state(signal)
+        except Exception as e:
+            logger.error(f"Error in regime analysis: {e}")
+            return self._create_unknown_signal()
+            
+    def update(self, bar, key: str = 'default') -> RegimeSignal:
+        """
+        Streaming counterpart of analyze_regime: feed one bar, get the regime
+        
+        Each call is O(1); the indicators come from rolling state kept per
+        ``key`` (e.g. the pair), so every bar of a series must be fed in
+        order. Returns an unknown signal until lookback_periods bars are seen.
+        
+        Args:
+            bar: Mapping or Series with high, low, close and volume
+            key: Series the bar belongs to
             
-            logger.info(f"📊 Market regime: {final_regime.value} (confidence: {confidence:.2f}, strength: {strength:.2f})")
+        Returns:
+            RegimeSignal with detected regime
+        """
+        stream = self.streams.get(key)
+        if stream is None:
+            stream = self.streams[key] = RegimeIndicatorStream()
             
+        try:
+            stream.update(float(bar['high']), float(bar['low']), float(bar['close']), float(bar['volume']))
+            if stream.count < self.lookback_periods:
+                return self._create_unknown_signal()
+                
+            signal = self._classify_regime(stream.indicators())
+            logger.debug(f"Market regime for {key}: {signal.regime.value} (confidence: {signal.confidence:.2f})")
             return signal
             
         except Exception as e:
-            logger.error(f"Error in regime analysis: {e}")
+            logger.error(f"Error in streaming regime analysis for {key}: {e}")
             return self._create_unknown_signal()
             
+    def reset_stream(self, key: Optional[str] = None):
+        """Drop the streaming state of one series, or of all of them"""
+        if key is None:
+            self.streams.clear()
+        else:
+            self.streams.pop(key, None)
+            
+    def label_history(self, price_data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Label every bar of a history with the regime analyze_regime would give
+        
+        Indicators are computed for all bars at once with rolling windows and
+        the trend, volatility, momentum and breakout rules are applied column
+        wise, so row t matches ``analyze_regime(price_data.iloc[:t + 1])``
+        without calling it once per bar. Bars before lookback_periods are
+        UNKNOWN. Regime history and duration are not touched.
+        
+        Args:
+            price_data: DataFrame with OHLCV data
+            
+        Returns:
+            DataFrame indexed like price_data with regime, confidence and
+            strength columns
+        """
+        n = len(price_data)
+        ind = self._calculate_indicator_history(price_data)
+        regimes = list(MarketRegime)
+        code = {regime: i for i, regime in enumerate(regimes)}
+        
+        with np.errstate(invalid='ignore', divide='ignore'):
+            # Trend: vote of four indicators against the trend threshold
+            votes = np.stack([
+                ind['price_vs_sma20'], ind['price_vs_sma50'], ind['sma_slope_20'], ind['roc_14']
+            ])
+            up = votes > self.trend_threshold
+            down = votes < -self.trend_threshold
+            up_count = up.sum(axis=0)
+            down_count = down.sum(axis=0)
+            total = up_count + down_count
+            up_conf = np.minimum(up_count / total + (np.abs(votes) * up).sum(axis=0) / up_count, 1.0)
+            down_conf = np.minimum(down_count / total + (np.abs(votes) * down).sum(axis=0) / down_count, 1.0)
+            
+            trend_regime = np.select(
+                [total == 0, up_count > down_count, down_count > up_count],
+                [code[MarketRegime.RANGING], code[MarketRegime.TRENDING_UP], code[MarketRegime.TRENDING_DOWN]],
+                code[MarketRegime.RANGING]
+            )
+            trend_conf = np.select(
+                [total == 0, up_count > down_count, down_count > up_count],
+                [0.3, up_conf, down_conf],
+                0.4
+            )
+            
+            # Volatility
+            volatility = ind['volatility_20']
+            high_vol = (
+                (volatility > self.volatility_threshold).astype(int) +
+                (ind['atr_ratio'] > self.volatility_threshold) +
+                (ind['volatility_ratio'] > 1.5)
+            )
+            low_vol = (
+                (volatility < self.volatility_threshold * 0.5).astype(int) +
+                (ind['atr_ratio'] < self.volatility_threshold * 0.5) +
+                (ind['volatility_ratio'] < 0.7)
+            )
+            vol_regime = np.select(
+                [high_vol >= 2, low_vol >= 2],
+                [code[MarketRegime.HIGH_VOLATILITY], code[MarketRegime.LOW_VOLATILITY]],
+                code[MarketRegime.UNKNOWN]
+            )
+            vol_conf = np.select(
+                [high_vol >= 2, low_vol >= 2],
+                [np.minimum(high_vol / 3 + volatility, 1.0), np.minimum(low_vol / 3 + (1 - volatility), 1.0)],
+                0.2
+            )
+            
+            # Momentum
+            rsi, roc_7, roc_14 = ind['rsi'], ind['roc_7'], ind['roc_14']
+            momentum_rules = [
+                (rsi > 70) & (roc_7 > 0.01) & (roc_14 > 0.02),
+                (rsi < 30) & (roc_7 < -0.01) & (roc_14 < -0.02),
+                (rsi > 40) & (rsi < 60) & (np.abs(roc_7) < 0.005)
+            ]
+            momentum_regime = np.select(
+                momentum_rules,
+                [code[MarketRegime.TRENDING_UP], code[MarketRegime.TRENDING_DOWN], code[MarketRegime.RANGING]],
+                code[MarketRegime.UNKNOWN]
+            )
+            momentum_conf = np.select(momentum_rules, [0.8, 0.8, 0.6], 0.3)
+            
+            # Breakout
+            bb_position, range_position = ind['bb_position'], ind['range_position']
+            volume_ratio = ind['volume_ratio']
+            breakout = (
+                (((bb_position > 0.8) | (bb_position < 0.2)) & (volume_ratio > 1.5)).astype(int) +
+                (((range_position > 0.9) | (range_position < 0.1)) & (volume_ratio > 1.2)) +
+                (ind['volatility_ratio'] > 1.8)
+            )
+            breakout_regime = np.where(breakout >= 2, code[MarketRegime.BREAKOUT], code[MarketRegime.UNKNOWN])
+            breakout_conf = np.where(breakout >= 2, np.minimum(breakout / 3 + volume_ratio * 0.1, 1.0), 0.2)
+            
+            # Combine: each method scores the total weight behind its regime and
+            # the first method with the best score wins, as in the dict version
+            method_regimes = np.stack([trend_regime, vol_regime, momentum_regime, breakout_regime])
+            weighted = np.stack([trend_conf, vol_conf, momentum_conf, breakout_conf]) * np.array(
+                [REGIME_METHOD_WEIGHTS[m] for m in ('trend', 'volatility', 'momentum', 'breakout')]
+            )[:, None]
+            scores = np.zeros_like(weighted)
+            for j in range(len(method_regimes)):
+                scores += np.where(method_regimes == method_regimes[j], weighted[j], 0.0)
+                
+            best = np.argmax(scores, axis=0)
+            rows = np.arange(n)
+            regime = method_regimes[best, rows]
+            confidence = scores[best, rows] / sum(REGIME_METHOD_WEIGHTS.values())
+            regime = np.where(confidence < self.confidence_threshold, code[MarketRegime.UNKNOWN], regime)
+            
+            # Strength of the chosen regime
+            price_vs_sma20 = np.abs(ind['price_vs_sma20'])
+            volatility_ratio = ind['volatility_ratio']
+            strength = np.select(
+                [regime == code[r] for r in (
+                    MarketRegime.TRENDING_UP, MarketRegime.TRENDING_DOWN, MarketRegime.HIGH_VOLATILITY,
+                    MarketRegime.LOW_VOLATILITY, MarketRegime.RANGING, MarketRegime.BREAKOUT
+                )],
+                [
+                    np.minimum(price_vs_sma20 + np.abs(roc_14) + (rsi - 50) / 50, 1.0),
+                    np.minimum(price_vs_sma20 + np.abs(roc_14) + (50 - rsi) / 50, 1.0),
+                    np.minimum(volatility * 10 + volatility_ratio, 1.0),
+                    np.minimum(1.0 - volatility * 10, 1.0),
+                    np.minimum(1.0 - price_vs_sma20 * 5, 1.0),
+                    np.minimum(volume_ratio * 0.3 + volatility_ratio * 0.2, 1.0)
+                ],
+                0.1
+            )
+            
+        # Not enough history yet, as in analyze_regime
+        warmup = rows < self.lookback_periods - 1
+        regime[warmup] = code[MarketRegime.UNKNOWN]
+        confidence[warmup] = 0.0
+        strength[warmup] = 0.0
+        
+        return pd.DataFrame({
+            'regime': np.array(regimes, dtype=object)[regime],
+            'confidence': confidence,
+            'strength': strength
+        }, index=price_data.index)
+        
+    def _classify_regime(self, indicators: Dict[str, float]) -> RegimeSignal:
+        """Turn indicator values into a regime signal and record it"""
+        
+        # Detect regime using multiple methods
+        regimes = {
+            'trend': self._detect_trend_regime(indicators),
+            'volatility': self._detect_volatility_regime(indicators),
+            'momentum': self._detect_momentum_regime(indicators),
+            'breakout': self._detect_breakout_regime(indicators)
+        }
+        
+        # Combine regime signals
+        final_regime, confidence = self._combine_regime_signals(regimes, indicators)
+        
+        # Calculate regime strength and duration
+        strength = self._calculate_regime_strength(indicators, final_regime)
+        duration = self._calculate_regime_duration(final_regime)
+        
+        # Create regime signal
+        signal = RegimeSignal(
+            regime=final_regime,
+            confidence=confidence,
+            strength=strength,
+            duration=duration,
+            indicators=indicators,
+            timestamp=datetime.now()
+        )
+        
+        # Update state
+        self._update_regime_state(signal)
+        
+        return signal
+        
     def _calculate_regime_indicators(self, data: pd.DataFrame) -> Dict[str, float]:
         """Calculate technical indicators for regime detection"""
         
@@ -195,6 +500,92 @@ class MarketRegimeDetector:
         
         return indicators
         
+    def _calculate_indicator_history(self, data: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """
+        Vectorized _calculate_regime_indicators for every prefix of the data
+        
+        Windows shorter than their nominal length at the start of the series
+        cover all bars so far, like the batch slices on a short array.
+        """
+        close = data['close'].astype(float).reset_index(drop=True)
+        high = data['high'].astype(float).reset_index(drop=True)
+        low = data['low'].astype(float).reset_index(drop=True)
+        volume = data['volume'].astype(float).reset_index(drop=True)
+        n = len(close)
+        
+        indicators = {}
+        
+        with np.errstate(invalid='ignore', divide='ignore'):
+            # Trend indicators
+            sma_20 = close.rolling(20, min_periods=1).mean()
+            sma_50 = close.rolling(50, min_periods=1).mean()
+            prior_20 = close.shift(20).rolling(20).mean()
+            indicators['sma_20'] = sma_20.to_numpy()
+            indicators['sma_50'] = sma_50.to_numpy()
+            indicators['price_vs_sma20'] = ((close - sma_20) / sma_20).to_numpy()
+            indicators['price_vs_sma50'] = ((close - sma_50) / sma_50).to_numpy()
+            indicators['sma_slope_20'] = ((sma_20 - prior_20) / prior_20).fillna(0).to_numpy()
+            
+            # Volatility indicators
+            returns = close.pct_change()
+            volatility_20 = returns.rolling(20, min_periods=1).std(ddof=0).to_numpy()
+            volatility_5 = returns.rolling(5, min_periods=1).std(ddof=0).to_numpy()
+            indicators['volatility_20'] = volatility_20
+            indicators['volatility_5'] = volatility_5
+            indicators['volatility_ratio'] = np.where(volatility_20 > 0, volatility_5 / volatility_20, 1)
+            
+            # ATR (Average True Range)
+            prev_close = close.shift(1)
+            true_range = pd.concat([
+                high - low, (high - prev_close).abs(), (low - prev_close).abs()
+            ], axis=1).max(axis=1, skipna=False)
+            atr = true_range.rolling(20, min_periods=1).mean().fillna(0).to_numpy()
+            indicators['atr'] = atr
+            indicators['atr_ratio'] = np.where(close > 0, atr / close, 0)
+            
+            # Momentum indicators
+            indicators['roc_14'] = ((close - close.shift(14)) / close.shift(14)).fillna(0).to_numpy()
+            indicators['roc_7'] = ((close - close.shift(7)) / close.shift(7)).fillna(0).to_numpy()
+            
+            # RSI approximation
+            gains = returns.clip(lower=0).fillna(0)
+            losses = (-returns).clip(lower=0).fillna(0)
+            avg_gain = gains.rolling(14, min_periods=1).mean().to_numpy(copy=True)
+            avg_loss = losses.rolling(14, min_periods=1).mean().to_numpy(copy=True)
+            
+            # The batch loop skips the oldest return until 15 are available
+            gain_values, loss_values = gains.to_numpy(), losses.to_numpy()
+            avg_gain[:2] = 0
+            avg_loss[:2] = 0
+            for t in range(2, min(n, 15)):
+                avg_gain[t] = gain_values[2:t + 1].mean()
+                avg_loss[t] = loss_values[2:t + 1].mean()
+                
+            rs = np.where(avg_loss > 0, avg_gain / avg_loss, 100)
+            indicators['rsi'] = 100 - (100 / (1 + rs))
+            
+            # Range indicators
+            highest = high.rolling(20, min_periods=1).max()
+            lowest = low.rolling(20, min_periods=1).min()
+            price_range_20 = (highest - lowest).to_numpy()
+            indicators['range_position'] = np.where(
+                price_range_20 > 0, (close - lowest).to_numpy() / price_range_20, 0.5
+            )
+            
+            # Bollinger Band position
+            std_20 = close.rolling(20, min_periods=1).std(ddof=0).to_numpy()
+            bb_upper = indicators['sma_20'] + (2 * std_20)
+            bb_lower = indicators['sma_20'] - (2 * std_20)
+            indicators['bb_position'] = np.where(
+                bb_upper != bb_lower, (close.to_numpy() - bb_lower) / (bb_upper - bb_lower), 0.5
+            )
+            
+            # Volume indicators
+            avg_volume_20 = volume.rolling(20, min_periods=1).mean().to_numpy()
+            indicators['volume_ratio'] = np.where(avg_volume_20 > 0, volume.to_numpy() / avg_volume_20, 1)
+            
+        return indicators
+        
     def _detect_trend_regime(self, indicators: Dict[str, float]) -> Tuple[MarketRegime, float]:
         """Detect trending regimes"""
         
@@ -329,12 +720,7 @@ class MarketRegimeDetector:
         """Combine multiple regime detection methods"""
         
         # Weight different detection methods
-        weights = {
-            'trend': 0.4,
-            'volatility': 0.25,
-            'momentum': 0.25,
-            'breakout': 0.1
-        }
+        weights = REGIME_METHOD_WEIGHTS
         
         # Score each regime type
         regime_scores = {}
@@ -0,0 +1,176 @@
+"""
+OHLC Ring Buffer
+
+Fixed-capacity, NumPy-backed candle store for live WebSocket OHLC streams.
+Appending a candle or updating the one still forming is O(1) and, once the
+ring has grown to its working size, allocation free; readers get zero-copy
+views of the latest rows and only build a DataFrame when they ask for one.
+"""
+
+import logging
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Column name -> dtype; time is epoch microseconds (UTC)
+COLUMNS = {
+    'time': np.int64,
+    'open': np.float64,
+    'high': np.float64,
+    'low': np.float64,
+    'close': np.float64,
+    'volume': np.float64,
+    'trades': np.int64,
+}
+VALUE_COLUMNS = ('open', 'high', 'low', 'close', 'volume', 'trades')
+
+
+class OHLCRingBuffer:
+    """
+    Circular candle buffer for one (pair, interval) series
+    
+    Every row is written twice, at slot i and i + slots, so the latest ``k``
+    rows are always one contiguous slice of each column and views never need
+    to wrap around. The ring starts small and doubles until it reaches
+    capacity, so short series stay cheap; once full, each append overwrites
+    the oldest candle.
+    """
+    
+    def __init__(self, capacity: int = 10000, initial_slots: int = 1024):
+        if capacity <= 0:
+            raise ValueError(f"capacity must be positive, got {capacity}")
+            
+        self.capacity = capacity
+        self.slots = min(capacity, max(1, initial_slots))
+        self.columns = {
+            name: np.zeros(2 * self.slots, dtype=dtype) for name, dtype in COLUMNS.items()
+        }
+        self.head = 0  # Slot the next candle goes to
+        self.size = 0
+        
+    def __len__(self) -> int:
+        return self.size
+        
+    @property
+    def last_time(self) -> Optional[int]:
+        """Open time of the latest candle in epoch microseconds"""
+        if not self.size:
+            return None
+        return int(self.columns['time'][self.head - 1 + self.slots])
+        
+    def _write(self, slot: int, time_us: int, open_: float, high: float, low: float,
+               close: float, volume: float, trades: int):
+        """Write one row to a slot and its mirror"""
+        columns = self.columns
+        for i in (slot, slot + self.slots):
+            columns['time'][i] = time_us
+            columns['open'][i] = open_
+            columns['high'][i] = high
+            columns['low'][i] = low
+            columns['close'][i] = close
+            columns['volume'][i] = volume
+            columns['trades'][i] = trades
+            
+    def upsert(self, time_us: int, open_: float, high: float, low: float,
+               close: float, volume: float, trades: int = 0) -> bool:
+        """
+        Add a candle or update the one with the same open time
+        
+        Candles at or after the latest one are O(1). An older candle is
+        inserted in time order by rewriting the buffer, which only happens
+        for out-of-order messages. Returns True if a new row was added.
+        """
+        last = self.last_time
+        
+        if last is None or time_us > last:
+            if self.size == self.slots < self.capacity:
+                self._grow()
+            self._write(self.head, time_us, open_, high, low, close, volume, trades)
+            self.head = (self.head + 1) % self.slots
+            self.size = min(self.size + 1, self.slots)
+            return True
+            
+        if time_us == last:
+            self._write((self.head - 1) % self.slots, time_us, open_, high, low, close, volume, trades)
+            return False
+            
+        return self._insert(time_us, (open_, high, low, close, volume, trades))
+        
+    def _insert(self, time_us: int, values: tuple) -> bool:
+        """Slow path for a candle older than the latest one"""
+        times = self.view()['time']
+        pos = int(np.searchsorted(times, time_us))
+        
+        if pos < self.size and times[pos] == time_us:
+            slot = (self.head - self.size + pos) % self.slots
+            self._write(slot, time_us, *values)
+            return False
+            
+        if pos == 0 and self.size == self.capacity:
+            logger.debug(f"Dropping candle at {time_us}, older than the buffered window")
+            return False
+            
+        rows = {name: np.insert(column, pos, value) for (name, column), value in
+                zip(self.view().items(), (time_us, *values))}
+        rows = {name: column[-self.capacity:] for name, column in rows.items()}
+        self._load(rows, min(self.capacity, max(self.slots, len(rows['time']))))
+        return True
+        
+    def _grow(self):
+        """Double the ring, up to capacity"""
+        self._load(
+            {name: view.copy() for name, view in self.view().items()},
+            min(self.capacity, 2 * self.slots)
+        )
+        
+    def _load(self, rows: Dict[str, np.ndarray], slots: int):
+        """Replace the contents with the given columns (oldest first)"""
+        size = len(rows['time'])
+        if slots != self.slots:
+            self.slots = slots
+            self.columns = {
+                name: np.zeros(2 * slots, dtype=dtype) for name, dtype in COLUMNS.items()
+            }
+            
+        for name, column in self.columns.items():
+            column[:size] = rows[name]
+            column[slots:slots + size] = rows[name]
+        self.size = size
+        self.head = size % slots
+        
+    def view(self, lookback: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """
+        Zero-copy, read-only views of the latest ``lookback`` candles
+        
+        The views alias the buffer, so they change when the forming candle is
+        updated and are overwritten once the buffer wraps past them; copy
+        them to keep a snapshot.
+        """
+        count = self.size if lookback is None else max(0, min(lookback, self.size))
+        # The mirror half makes [head, head + slots) the whole ring in order
+        end = self.head + self.slots
+        
+        views = {}
+        for name, column in self.columns.items():
+            view = column[end - count:end]
+            view.flags.writeable = False
+            views[name] = view
+        return views
+        
+    def latest(self, name: str) -> float:
+        """Latest value of one column"""
+        if not self.size:
+            raise IndexError("OHLC buffer is empty")
+        return self.columns[name][self.head - 1 + self.slots]
+        
+    def to_frame(self, lookback: Optional[int] = None) -> pd.DataFrame:
+        """DataFrame copy of the latest candles, indexed by naive UTC time"""
+        views = self.view(lookback)
+        index = pd.DatetimeIndex(views['time'].astype('datetime64[us]'), name='time')
+        return pd.DataFrame(
+            {name: views[name].copy() for name in VALUE_COLUMNS},
+            index=index
+        )
@@ -0,0 +1,191 @@
+"""
+Order Book
+
+Per-pair L2 book for the Kraken V1 ``book`` channel. Price levels are kept
+in sorted parallel lists so updates are a binary search plus a short list
+shift, the top of book is always index 0, and the book is truncated to the
+subscribed depth and verified against Kraken's CRC32 checksum on every
+update.
+"""
+
+import logging
+import time
+import zlib
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class BookSide:
+    """
+    One side of the book as sorted parallel lists, best level first
+    
+    Bids are keyed on the negated price so both sides sort ascending. The
+    price and volume strings are kept as received because the checksum is
+    computed over them.
+    """
+    
+    __slots__ = ('descending', 'keys', 'volumes', 'price_strs', 'volume_strs')
+    
+    def __init__(self, descending: bool):
+        self.descending = descending
+        self.keys: List[float] = []
+        self.volumes: List[float] = []
+        self.price_strs: List[str] = []
+        self.volume_strs: List[str] = []
+        
+    def __len__(self) -> int:
+        return len(self.keys)
+        
+    def clear(self):
+        self.keys.clear()
+        self.volumes.clear()
+        self.price_strs.clear()
+        self.volume_strs.clear()
+        
+    def set(self, price_str: str, volume_str: str):
+        """Insert, replace or (zero volume) remove one price level"""
+        price = float(price_str)
+        volume = float(volume_str)
+        key = -price if self.descending else price
+        
+        i = bisect_left(self.keys, key)
+        exists = i < len(self.keys) and self.keys[i] == key
+        
+        if volume == 0:
+            if exists:
+                del self.keys[i], self.volumes[i], self.price_strs[i], self.volume_strs[i]
+        elif exists:
+            self.volumes[i] = volume
+            self.price_strs[i] = price_str
+            self.volume_strs[i] = volume_str
+        else:
+            self.keys.insert(i, key)
+            self.volumes.insert(i, volume)
+            self.price_strs.insert(i, price_str)
+            self.volume_strs.insert(i, volume_str)
+            
+    def truncate(self, depth: int):
+        """Drop levels beyond the subscribed depth"""
+        if len(self.keys) > depth:
+            del self.keys[depth:], self.volumes[depth:], self.price_strs[depth:], self.volume_strs[depth:]
+            
+    def price(self, i: int) -> float:
+        return -self.keys[i] if self.descending else self.keys[i]
+        
+    def levels(self, n: Optional[int] = None) -> List[Tuple[float, float]]:
+        """(price, volume) of the best ``n`` levels"""
+        count = len(self.keys) if n is None else min(n, len(self.keys))
+        return [(self.price(i), self.volumes[i]) for i in range(count)]
+        
+    def checksum_input(self, n: int = 10) -> str:
+        """Concatenated price/volume digits of the top levels, per Kraken's spec"""
+        return ''.join(
+            price.replace('.', '').lstrip('0') + volume.replace('.', '').lstrip('0')
+            for price, volume in zip(self.price_strs[:n], self.volume_strs[:n])
+        )
+        
+
+class OrderBook:
+    """
+    Depth-limited L2 order book for one pair
+    
+    Feed it the payloads of the V1 book channel: ``apply_snapshot`` for the
+    initial ``as``/``bs`` message, ``apply_update`` for each ``a``/``b``
+    update. A failed checksum marks the book out of sync until the next
+    snapshot; the caller is expected to resubscribe.
+    """
+    
+    def __init__(self, pair: str, depth: int = 10):
+        if depth <= 0:
+            raise ValueError(f"depth must be positive, got {depth}")
+            
+        self.pair = pair
+        self.max_depth = depth
+        self.bids = BookSide(descending=True)
+        self.asks = BookSide(descending=False)
+        self.synced = False
+        self.updated_at = 0.0
+        self.checksum_failures = 0
+        
+    def apply_snapshot(self, data: Dict):
+        """Replace the book with a snapshot message payload"""
+        self.bids.clear()
+        self.asks.clear()
+        
+        for level in data.get('as', ()):
+            self.asks.set(level[0], level[1])
+        for level in data.get('bs', ()):
+            self.bids.set(level[0], level[1])
+            
+        self.asks.truncate(self.max_depth)
+        self.bids.truncate(self.max_depth)
+        self.synced = True
+        self.updated_at = time.time()
+        
+    def apply_update(self, data: Dict) -> bool:
+        """
+        Apply an update payload and verify its checksum
+        
+        ``data`` holds any of ``a``, ``b`` and ``c`` (for messages carrying
+        both sides, merge the two payload dicts first). Returns False, and
+        marks the book out of sync, if the checksum does not match.
+        """
+        for level in data.get('a', ()):
+            self.asks.set(level[0], level[1])
+        for level in data.get('b', ()):
+            self.bids.set(level[0], level[1])
+            
+        self.asks.truncate(self.max_depth)
+        self.bids.truncate(self.max_depth)
+        self.updated_at = time.time()
+        
+        if 'c' in data and int(data['c']) != self.checksum():
+            self.synced = False
+            self.checksum_failures += 1
+            logger.debug(f"Checksum mismatch for {self.pair}: expected {data['c']}, got {self.checksum()}")
+            return False
+            
+        return True
+        
+    def checksum(self) -> int:
+        """CRC32 over the top 10 asks then the top 10 bids"""
+        return zlib.crc32((self.asks.checksum_input() + self.bids.checksum_input()).encode())
+        
+    @property
+    def best_bid(self) -> Optional[float]:
+        return self.bids.price(0) if self.bids.keys else None
+        
+    @property
+    def best_ask(self) -> Optional[float]:
+        return self.asks.price(0) if self.asks.keys else None
+        
+    @property
+    def mid(self) -> Optional[float]:
+        if not self.bids.keys or not self.asks.keys:
+            return None
+        return (self.bids.price(0) + self.asks.price(0)) / 2
+        
+    @property
+    def spread(self) -> Optional[float]:
+        if not self.bids.keys or not self.asks.keys:
+            return None
+        return self.asks.price(0) - self.bids.price(0)
+        
+    @property
+    def microprice(self) -> Optional[float]:
+        """Mid weighted by the opposite side's top-of-book volume"""
+        if not self.bids.keys or not self.asks.keys:
+            return None
+        bid, ask = self.bids.price(0), self.asks.price(0)
+        bid_volume, ask_volume = self.bids.volumes[0], self.asks.volumes[0]
+        return (bid * ask_volume + ask * bid_volume) / (bid_volume + ask_volume)
+        
+    def depth(self, n: Optional[int] = None) -> Dict[str, List[Tuple[float, float]]]:
+        """Best ``n`` (price, volume) levels per side, best first"""
+        return {'bids': self.bids.levels(n), 'asks': self.asks.levels(n)}
+        
+    def levels(self, side: str, n: Optional[int] = None) -> List[Tuple[float, float]]:
+        """Levels a market order on ``side`` ('buy' or 'sell') would fill against"""
+        return (self.asks if side == 'buy' else self.bids).levels(n)
@@ -5,6 +5,7 @@ Ensures orders are valid before submission to prevent costly mistakes.
 """
 
 import logging
+import time
 from typing import Dict, Optional, Tuple, List
 from dataclasses import dataclass
 from decimal import Decimal
@@ -28,9 +29,11 @@ class OrderValidator:
     Validates orders against account balance, market conditions, and safety rules
     """
     
-    def __init__(self, kraken_api, risk_manager):
+    def __init__(self, kraken_api, risk_manager, order_books=None):
         self.api = kraken_api
         self.risk_manager = risk_manager
+        # Optional live books (pair -> OrderBook), e.g. EnhancedWebSocketHandler.order_books
+        self.order_books = order_books
         
         # Safety parameters
         self.max_order_value_pct = 0.10  # Max 10% of account per order
@@ -250,28 +253,22 @@ class OrderValidator:
     async def _estimate_slippage(self, pair: str, side: str, volume: float) -> Dict:
         """Estimate potential slippage for market orders"""
         try:
-            # Get order book
-            orderbook = await self.api.get_orderbook(pair)
+            # Prefer the live websocket book, fall back to a REST snapshot
+            book = self.order_books.get(pair) if self.order_books else None
+            orders = book.levels(side) if book is not None and book.synced else []
+            total_cost, remaining_volume = self._walk_levels(orders, volume)
             
-            if side == 'buy':
-                orders = orderbook.get('asks', [])
-            else:
-                orders = orderbook.get('bids', [])
-                
-            # Calculate average fill price
-            remaining_volume = volume
-            total_cost = 0
-            
-            for price_level, level_volume, _ in orders:
-                price = float(price_level)
-                available = float(level_volume)
-                
-                fill_volume = min(remaining_volume, available)
-                total_cost += fill_volume * price
-                remaining_volume -= fill_volume
+            # The live book is truncated to the subscribed depth, so an order
+            # larger than it is priced against the deeper REST snapshot
+            if remaining_volume > 0:
+                orderbook = await self.api.get_orderbook(pair)
                 
-                if remaining_volume <= 0:
-                    break
+                if side == 'buy':
+                    orders = orderbook.get('asks', [])
+                else:
+                    orders = orderbook.get('bids', [])
+                    
+                total_cost, remaining_volume = self._walk_levels(orders, volume)
                     
             if remaining_volume > 0:
                 return {
@@ -293,6 +290,22 @@ class OrderValidator:
             logger.error(f"Slippage estimation error: {e}")
             return {'estimated_slippage': 0.01}  # Conservative estimate
             
+    @staticmethod
+    def _walk_levels(orders, volume: float) -> Tuple[float, float]:
+        """Fill volume against price levels, best first; returns (cost, unfilled volume)"""
+        remaining_volume = volume
+        total_cost = 0
+        
+        for price_level, level_volume, *_ in orders:
+            fill_volume = min(remaining_volume, float(level_volume))
+            total_cost += fill_volume * float(price_level)
+            remaining_volume -= fill_volume
+            
+            if remaining_volume <= 0:
+                break
+                
+        return total_cost, remaining_volume
+        
     async def _get_market_price(self, pair: str) -> Optional[float]:
         """Get current market price with caching"""
         cache_key = f"price_{pair}"
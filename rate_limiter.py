@@ -268,4 +268,38 @@ class AdaptiveRateLimiter(RateLimiter):
         elif utilization > 0.7:
             return max(0.5, avg_response_time * 0.5)
         else:
-            return max(0.1, avg_response_time * 0.2)
\ No newline at end of file
+            return max(0.1, avg_response_time * 0.2)
+
+
+class TokenBucket:
+    """
+    Async token bucket shared by every task using one API
+    
+    Refills at `rate` tokens per second up to `capacity`; waiters are served
+    in arrival order, so concurrent callers together never exceed the rate.
+    """
+    
+    def __init__(self, rate: float, capacity: float = 1.0):
+        if rate <= 0 or capacity < 1:
+            raise ValueError(f"Invalid token bucket: rate={rate}, capacity={capacity}")
+            
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+        
+    def _refill(self):
+        """Add the tokens accrued since the last update"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        
+    async def acquire(self, tokens: float = 1.0):
+        """Wait until `tokens` are available and take them"""
+        async with self._lock:
+            self._refill()
+            while self.tokens < tokens:
+                await asyncio.sleep((tokens - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= tokens
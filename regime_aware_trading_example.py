@@ -97,6 +97,25 @@ class RegimeAwarePortfolio:
             logger.error(f"Error in regime analysis: {e}")
             return {'error': str(e)}
             
+    def allocation_history(self, price_data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Per-bar regime labels and strategy allocations for a whole history
+        
+        Regimes are labelled once with label_history instead of analysing a
+        trailing window at every bar, so backtests can look allocations up.
+        """
+        labels = self.regime_detector.label_history(price_data)
+        
+        allocations = pd.DataFrame(
+            [self.regime_allocations[regime] for regime in labels['regime']],
+            index=labels.index
+        )
+        
+        # Same confidence haircut as analyze_market_and_trade
+        allocations.loc[labels['confidence'] < 0.6] *= 0.5
+        
+        return labels.join(allocations)
+        
     def get_regime_trading_rules(self, regime: MarketRegime) -> Dict[str, str]:
         """
         Get trading rules for each regime
@@ -178,6 +197,12 @@ async def demonstrate_regime_aware_trading():
         analysis = await portfolio.analyze_market_and_trade(data)
         results[scenario_name] = analysis
         
+        # Regime of every bar, labelled in one pass for backtesting
+        history = portfolio.allocation_history(data)
+        time_in_regime = history['regime'].map(lambda r: r.value).value_counts(normalize=True)
+        logger.info(f"🕒 Time in regime: {time_in_regime.round(2).to_dict()}")
+        logger.info(f"⚖️ Average allocations: {history[['momentum', 'mean_reversion']].mean().round(2).to_dict()}")
+        
         if 'error' not in analysis:
             # Get trading rules for detected regime
             regime = MarketRegime(analysis['regime'])
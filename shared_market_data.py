@@ -0,0 +1,121 @@
+"""
+Shared Market Data
+
+Packs OHLCV frames into named shared memory blocks so worker processes can
+attach to one copy of the dataset instead of reloading it per evaluation.
+"""
+
+import hashlib
+import logging
+from multiprocessing import shared_memory
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Value columns stored after the int64 nanosecond timestamps of each block
+VALUE_COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+
+
+class SharedMarketData:
+    """
+    Read-only OHLCV frames backed by shared memory, one block per pair
+    
+    The parent creates the blocks and passes ``spec()`` to its workers, which
+    call ``attach`` and get zero-copy DataFrames over the same pages. Only the
+    creator should ``unlink`` the blocks.
+    """
+    
+    def __init__(self, blocks: Dict[str, Tuple[shared_memory.SharedMemory, int]]):
+        self._blocks = blocks
+        
+    @classmethod
+    def create(cls, data: Dict[str, pd.DataFrame]) -> 'SharedMarketData':
+        """Copy each frame into a new shared memory block"""
+        blocks = {}
+        
+        try:
+            for pair, df in data.items():
+                rows = len(df)
+                block = shared_memory.SharedMemory(
+                    create=True, size=max(1, rows * 8 * (1 + len(VALUE_COLUMNS)))
+                )
+                blocks[pair] = (block, rows)
+                
+                timestamps, values = cls._views(block, rows)
+                timestamps[:] = pd.DatetimeIndex(df.index).as_unit('ns').asi8
+                values[:] = df[list(VALUE_COLUMNS)].to_numpy(dtype=np.float64).T
+        except Exception:
+            for block, _ in blocks.values():
+                block.close()
+                block.unlink()
+            raise
+            
+        total = sum(rows for _, rows in blocks.values())
+        logger.info(f"Shared {total} candles for {len(blocks)} pairs with worker processes")
+        return cls(blocks)
+        
+    @classmethod
+    def attach(cls, spec: Dict[str, Tuple[str, int]]) -> 'SharedMarketData':
+        """Attach to blocks created by another process"""
+        return cls({
+            pair: (shared_memory.SharedMemory(name=name), rows)
+            for pair, (name, rows) in spec.items()
+        })
+        
+    @staticmethod
+    def _views(block: shared_memory.SharedMemory, rows: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Timestamp and (column x row) value arrays over a block"""
+        timestamps = np.ndarray((rows,), dtype=np.int64, buffer=block.buf)
+        values = np.ndarray(
+            (len(VALUE_COLUMNS), rows), dtype=np.float64, buffer=block.buf, offset=rows * 8
+        )
+        return timestamps, values
+        
+    def spec(self) -> Dict[str, Tuple[str, int]]:
+        """Picklable description passed to worker processes"""
+        return {pair: (block.name, rows) for pair, (block, rows) in self._blocks.items()}
+        
+    def fingerprint(self) -> str:
+        """Content hash of every pair's timestamps and values"""
+        digest = hashlib.blake2b(digest_size=16)
+        
+        for pair in sorted(self._blocks):
+            block, rows = self._blocks[pair]
+            digest.update(f"{pair}:{rows};".encode())
+            digest.update(block.buf[:rows * 8 * (1 + len(VALUE_COLUMNS))])
+            
+        return digest.hexdigest()
+        
+    def frames(self) -> Dict[str, pd.DataFrame]:
+        """Zero-copy, read-only DataFrames over the shared blocks"""
+        frames = {}
+        
+        for pair, (block, rows) in self._blocks.items():
+            timestamps, values = self._views(block, rows)
+            values.flags.writeable = False
+            
+            index = pd.DatetimeIndex(timestamps.view('datetime64[ns]'), name='timestamp')
+            frames[pair] = pd.DataFrame(
+                {name: values[i] for i, name in enumerate(VALUE_COLUMNS)},
+                index=index,
+                copy=False
+            )
+            
+        return frames
+        
+    def close(self):
+        """Detach from the blocks in this process"""
+        for block, _ in self._blocks.values():
+            try:
+                block.close()
+            except BufferError:
+                # Frames handed out by frames() still reference the buffer
+                logger.debug(f"Shared block {block.name} still in use, left mapped")
+                
+    def unlink(self):
+        """Free the blocks; call once, from the creating process"""
+        for block, _ in self._blocks.values():
+            block.unlink()
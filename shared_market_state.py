@@ -0,0 +1,311 @@
+"""
+Shared Market State
+
+Latest ticker, top of book and recent OHLC candles per pair in one shared
+memory block, written by an out-of-process WebSocket ingestor and read by
+the trading process without any IPC round trip. Every record is guarded by
+a sequence lock, so readers never block the writer and never see a torn
+update.
+"""
+
+import logging
+import time
+from datetime import datetime
+from multiprocessing import shared_memory
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ohlc_ring_buffer import OHLCRingBuffer, VALUE_COLUMNS as OHLC_VALUE_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+# Per-pair record layouts, all float64
+TICKER_FIELDS = ('ask', 'bid', 'close', 'volume', 'vwap', 'trades', 'low', 'high', 'open', 'updated_at')
+BOOK_FIELDS = ('bid', 'bid_volume', 'ask', 'ask_volume', 'updated_at', 'synced')
+OHLC_FIELDS = ('time',) + OHLC_VALUE_COLUMNS  # time is epoch microseconds
+STATUS_FIELDS = ('connected', 'heartbeat')
+
+# Seconds a reader retries a record the writer keeps changing before giving up
+MAX_READ_WAIT = 0.1
+
+
+class SharedMarketState:
+    """
+    Seqlock-guarded market state for a fixed set of pairs and OHLC intervals
+    
+    Each ticker, book and OHLC record has a sequence counter that the single
+    writer makes odd before changing the record and even again afterwards.
+    A reader copies the record and keeps the copy only if the counter was
+    even and unchanged across the copy, retrying otherwise. Each record is
+    only a few cache lines, so retries are rare and short.
+    
+    The reading process creates the block and passes ``spec()`` to the
+    ingestor process, which calls ``attach``. Only the creator should
+    ``unlink``, so the block outlives an ingestor that crashes.
+    """
+    
+    def __init__(self, block: shared_memory.SharedMemory, pairs: List[str],
+                 intervals: List[int], ohlc_rows: int):
+        self._block = block
+        self.pairs = list(pairs)
+        self.intervals = list(intervals)
+        self.ohlc_rows = ohlc_rows
+        self._pair_index = {pair: i for i, pair in enumerate(self.pairs)}
+        self._interval_index = {interval: i for i, interval in enumerate(self.intervals)}
+        
+        (self.status, self.ticker_seq, self.tickers, self.book_seq, self.books,
+         self.ohlc_seq, self.ohlc_count, self.ohlc) = self._views(
+            block, len(self.pairs), len(self.intervals), ohlc_rows
+        )
+        
+    @staticmethod
+    def _layout(pairs: int, intervals: int, ohlc_rows: int) -> List[Tuple[str, tuple]]:
+        """(dtype, shape) of each array, in block order"""
+        series = pairs * intervals
+        return [
+            ('f8', (len(STATUS_FIELDS),)),
+            ('u8', (pairs,)),
+            ('f8', (pairs, len(TICKER_FIELDS))),
+            ('u8', (pairs,)),
+            ('f8', (pairs, len(BOOK_FIELDS))),
+            ('u8', (series,)),
+            ('i8', (series,)),
+            ('f8', (series, ohlc_rows, len(OHLC_FIELDS))),
+        ]
+        
+    @classmethod
+    def _size(cls, pairs: int, intervals: int, ohlc_rows: int) -> int:
+        return sum(8 * int(np.prod(shape)) for _, shape in cls._layout(pairs, intervals, ohlc_rows))
+        
+    @classmethod
+    def _views(cls, block: shared_memory.SharedMemory, pairs: int, intervals: int,
+               ohlc_rows: int) -> List[np.ndarray]:
+        views = []
+        offset = 0
+        for dtype, shape in cls._layout(pairs, intervals, ohlc_rows):
+            views.append(np.ndarray(shape, dtype=dtype, buffer=block.buf, offset=offset))
+            offset += 8 * int(np.prod(shape))
+        return views
+        
+    @classmethod
+    def create(cls, pairs: Iterable[str], intervals: Iterable[int] = (1,),
+               ohlc_rows: int = 500) -> 'SharedMarketState':
+        """Allocate a zeroed block for the given pairs and OHLC intervals"""
+        pairs, intervals = list(pairs), list(intervals)
+        if not pairs:
+            raise ValueError("At least one pair is required")
+        if ohlc_rows <= 0:
+            raise ValueError(f"ohlc_rows must be positive, got {ohlc_rows}")
+            
+        block = shared_memory.SharedMemory(
+            create=True, size=cls._size(len(pairs), len(intervals), ohlc_rows)
+        )
+        block.buf[:block.size] = bytes(block.size)
+        
+        logger.info(f"Shared market state for {len(pairs)} pairs in {block.size:,} bytes")
+        return cls(block, pairs, intervals, ohlc_rows)
+        
+    @classmethod
+    def attach(cls, spec: Dict) -> 'SharedMarketState':
+        """Attach to a block created by another process"""
+        return cls(
+            shared_memory.SharedMemory(name=spec['name']),
+            spec['pairs'], spec['intervals'], spec['ohlc_rows']
+        )
+        
+    def spec(self) -> Dict:
+        """Picklable description passed to the other process"""
+        return {
+            'name': self._block.name,
+            'pairs': self.pairs,
+            'intervals': self.intervals,
+            'ohlc_rows': self.ohlc_rows,
+        }
+        
+    def close(self):
+        """Detach from the block in this process"""
+        # Drop our own views first so the buffer can be released
+        self.status = self.ticker_seq = self.tickers = self.book_seq = self.books = None
+        self.ohlc_seq = self.ohlc_count = self.ohlc = None
+        try:
+            self._block.close()
+        except BufferError:
+            logger.debug(f"Shared block {self._block.name} still in use, left mapped")
+            
+    def unlink(self):
+        """Free the block; call once, from the creating process"""
+        self._block.unlink()
+        
+    def _series(self, pair: str, interval: int) -> Optional[int]:
+        i = self._pair_index.get(pair)
+        j = self._interval_index.get(interval)
+        if i is None or j is None:
+            return None
+        return i * len(self.intervals) + j
+        
+    # Writer side: the ingestor process is the only writer. Stores from one
+    # process are seen in program order on x86; weaker memory models would
+    # need explicit fences around the sequence updates.
+    
+    def write_status(self, connected: bool):
+        """Publish the ingestor's connection state and a heartbeat"""
+        self.status[1] = time.time()
+        self.status[0] = 1.0 if connected else 0.0
+        
+    def write_ticker(self, pair: str, record) -> bool:
+        """Publish a TickerRecord; returns False for pairs not in the layout"""
+        i = self._pair_index.get(pair)
+        if i is None:
+            return False
+            
+        seq = self.ticker_seq
+        seq[i] += 1
+        self.tickers[i] = [getattr(record, field) for field in TICKER_FIELDS]
+        seq[i] += 1
+        return True
+        
+    def write_book(self, pair: str, book) -> bool:
+        """Publish an OrderBook's top of book and sync state"""
+        i = self._pair_index.get(pair)
+        if i is None:
+            return False
+            
+        bids, asks = book.bids, book.asks
+        row = (
+            bids.price(0) if bids.keys else 0.0,
+            bids.volumes[0] if bids.keys else 0.0,
+            asks.price(0) if asks.keys else 0.0,
+            asks.volumes[0] if asks.keys else 0.0,
+            book.updated_at,
+            1.0 if book.synced else 0.0,
+        )
+        
+        seq = self.book_seq
+        seq[i] += 1
+        self.books[i] = row
+        seq[i] += 1
+        return True
+        
+    def write_ohlc(self, pair: str, interval: int, buffer: OHLCRingBuffer) -> bool:
+        """
+        Publish the latest ``ohlc_rows`` candles of a series, oldest first
+        
+        An update to the forming candle rewrites only the last row; a new
+        or back-filled candle recopies the window.
+        """
+        i = self._series(pair, interval)
+        if i is None:
+            return False
+            
+        views = buffer.view(self.ohlc_rows)
+        times = views['time']
+        count = len(times)
+        rows = self.ohlc[i]
+        same_window = (
+            count and count == self.ohlc_count[i]
+            and rows[0, 0] == times[0] and rows[count - 1, 0] == times[-1]
+        )
+        
+        seq = self.ohlc_seq
+        seq[i] += 1
+        if same_window:
+            rows[count - 1] = [views[name][-1] for name in OHLC_FIELDS]
+        else:
+            for j, name in enumerate(OHLC_FIELDS):
+                rows[:count, j] = views[name]
+            self.ohlc_count[i] = count
+        seq[i] += 1
+        return True
+        
+    # Reader side
+    
+    @staticmethod
+    def _read(seq: np.ndarray, i: int, copy) -> Optional[object]:
+        """Run ``copy`` until it sees a consistent record, or give up"""
+        deadline = None
+        while True:
+            start = int(seq[i])
+            if not start & 1:
+                value = copy()
+                if int(seq[i]) == start:
+                    return value
+                    
+            # Contended: let the writer finish, but not forever if it died mid-update
+            now = time.monotonic()
+            if deadline is None:
+                deadline = now + MAX_READ_WAIT
+            elif now > deadline:
+                logger.warning(f"Gave up reading shared record {i}, the writer may have died mid-update")
+                return None
+            time.sleep(0)
+            
+    @property
+    def connected(self) -> bool:
+        return bool(self.status[0])
+        
+    @property
+    def heartbeat(self) -> float:
+        """Epoch time of the ingestor's last status write"""
+        return float(self.status[1])
+        
+    def read_ticker(self, pair: str) -> Optional[Dict]:
+        """Latest ticker as a dict shaped like TickerRecord.to_dict, or None"""
+        i = self._pair_index.get(pair)
+        if i is None:
+            return None
+            
+        row = self._read(self.ticker_seq, i, self.tickers[i].tolist)
+        if row is None or not row[-1]:
+            return None
+            
+        ticker = dict(zip(TICKER_FIELDS, row))
+        ticker['trades'] = int(ticker['trades'])
+        updated_at = ticker.pop('updated_at')
+        ticker['last_update'] = datetime.fromtimestamp(updated_at).isoformat()
+        return ticker
+        
+    def read_book(self, pair: str) -> Optional[Dict]:
+        """Top of book with mid and spread, or None while the book is out of sync"""
+        i = self._pair_index.get(pair)
+        if i is None:
+            return None
+            
+        row = self._read(self.book_seq, i, self.books[i].tolist)
+        if row is None or not row[5] or not row[0] or not row[2]:
+            return None
+            
+        book = dict(zip(BOOK_FIELDS[:5], row))
+        book['mid'] = (book['bid'] + book['ask']) / 2
+        book['spread'] = book['ask'] - book['bid']
+        return book
+        
+    def read_ohlc(self, pair: str, interval: int = 1,
+                  lookback: Optional[int] = None) -> Optional[np.ndarray]:
+        """Copy of the latest candles as a (rows x OHLC_FIELDS) array"""
+        i = self._series(pair, interval)
+        if i is None:
+            return None
+            
+        def copy():
+            count = int(self.ohlc_count[i])
+            start = count if lookback is None else min(lookback, count)
+            return self.ohlc[i, count - start:count].copy()
+            
+        return self._read(self.ohlc_seq, i, copy)
+        
+    def get_ohlc_dataframe(self, pair: str, interval: int = 1,
+                           lookback: Optional[int] = None) -> pd.DataFrame:
+        """Latest candles in the frame shape of OHLCRingBuffer.to_frame"""
+        rows = self.read_ohlc(pair, interval, lookback)
+        if rows is None or not len(rows):
+            return pd.DataFrame()
+            
+        index = pd.DatetimeIndex(rows[:, 0].astype(np.int64).astype('datetime64[us]'), name='time')
+        frame = pd.DataFrame(
+            {name: rows[:, j + 1] for j, name in enumerate(OHLC_VALUE_COLUMNS)},
+            index=index
+        )
+        frame['trades'] = frame['trades'].astype(np.int64)
+        return frame
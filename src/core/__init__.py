@@ -1,27 +1,32 @@
 """
 Core components for algorithmic trading
+
+Exports are resolved on first access so that importing a single submodule,
+e.g. ``src.core.indicators``, does not pull in the trading, risk and
+monitoring stack.
 """
-from src.core.trade import TradeExecutor
-from src.core.risk import RiskManager
-from src.core.portfolio import PortfolioManager
-from src.core.technical import EnhancedTechnicalAnalysis
-from src.core.monitor import MonitoringSystem, SystemMonitor
-from src.core.performance import PerformanceMonitor
-from src.core.strategies import (
-    TradingStrategy,
-    TrendFollowingStrategy,
-    MeanReversionStrategy
-)
+from importlib import import_module
+
+_EXPORTS = {
+    'TradeExecutor': 'src.core.trade',
+    'RiskManager': 'src.core.risk',
+    'PortfolioManager': 'src.core.portfolio',
+    'EnhancedTechnicalAnalysis': 'src.core.technical',
+    'IndicatorRegistry': 'src.core.indicators',
+    'MonitoringSystem': 'src.core.monitor',
+    'SystemMonitor': 'src.core.monitor',
+    'PerformanceMonitor': 'src.core.performance',
+    'TradingStrategy': 'src.core.strategies',
+    'TrendFollowingStrategy': 'src.core.strategies',
+    'MeanReversionStrategy': 'src.core.strategies',
+}
+
+__all__ = list(_EXPORTS)
+
 
-__all__ = [
-    'TradeExecutor',
-    'RiskManager',
-    'PortfolioManager',
-    'EnhancedTechnicalAnalysis',
-    'MonitoringSystem',
-    'SystemMonitor',
-    'PerformanceMonitor',
-    'TradingStrategy',
-    'TrendFollowingStrategy',
-    'MeanReversionStrategy'
-]
\ No newline at end of file
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(_EXPORTS[name]), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,471 @@
+"""
+Streaming Indicators
+
+O(1)-per-bar versions of the pandas indicator calculations, so a strategy
+can keep its indicators current from live candles instead of recomputing
+them over the whole frame. Each indicator matches its pandas counterpart
+to floating point tolerance and can revise the latest bar while its candle
+is still forming. RollingWindow and RollingExtreme are the shared rolling
+primitives, also used by the market regime detector.
+"""
+
+import math
+from collections import deque
+from typing import Callable, Dict, Optional, Tuple
+
+NAN = float('nan')
+
+
+class RollingWindow:
+    """Ring buffer with running sum and sliding Welford variance"""
+    
+    __slots__ = ('period', 'values', 'head', 'count', 'mean', 'm2', 'nans', 'nonzero')
+    
+    def __init__(self, period: int):
+        self.period = period
+        self.values = [0.0] * period
+        self.head = 0
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.nans = 0  # NaN inputs in the window; they leave mean and m2 alone
+        self.nonzero = 0
+        
+    def push(self, value: float, revise: bool = False) -> Optional[float]:
+        """
+        Append a value, or replace the latest one when revising; returns the
+        value evicted to make room once the window is full
+        """
+        value = float(value)
+        if revise and self.count:
+            slot = (self.head - 1) % self.period
+            self._swap(self.values[slot], value, self.count)
+            self.values[slot] = value
+            return None
+            
+        evicted = None
+        if self.count < self.period:
+            self.count += 1
+            if value != 0:
+                self.nonzero += 1
+            if value != value:
+                self.nans += 1
+            else:
+                n = self.count - self.nans
+                delta = value - self.mean
+                self.mean += delta / n
+                self.m2 += delta * (value - self.mean)
+        else:
+            evicted = self.values[self.head]
+            self._swap(evicted, value, self.period)
+            
+        self.values[self.head] = value
+        self.head = (self.head + 1) % self.period
+        return evicted
+        
+    def _swap(self, old: float, new: float, count: int):
+        """Replace one value of the window with another"""
+        self.nonzero += (new != 0) - (old != 0)
+        if old != old and new != new:
+            return
+        if old != old:
+            self.nans -= 1
+            n = count - self.nans
+            delta = new - self.mean
+            self.mean += delta / n
+            self.m2 += delta * (new - self.mean)
+        elif new != new:
+            n = count - self.nans
+            self.nans += 1
+            if n > 1:
+                old_mean = self.mean
+                self.mean = (self.mean * n - old) / (n - 1)
+                self.m2 -= (old - old_mean) * (old - self.mean)
+            else:
+                self.mean = 0.0
+                self.m2 = 0.0
+        else:
+            n = count - self.nans
+            old_mean = self.mean
+            self.mean += (new - old) / n
+            self.m2 += (new - old) * (new - self.mean + old - old_mean)
+            
+        if self.m2 < 0:
+            self.m2 = 0.0
+            
+    @property
+    def full(self) -> bool:
+        return self.count == self.period and not self.nans
+        
+    def std(self, ddof: int = 1) -> float:
+        n = self.count - self.nans
+        return math.sqrt(self.m2 / (n - ddof)) if n > ddof else NAN
+        
+    def latest(self) -> float:
+        return self.values[(self.head - 1) % self.period]
+        
+    def ago(self, periods: int) -> float:
+        """Value pushed ``periods`` pushes before the latest one"""
+        return self.values[(self.head - 1 - periods) % self.period]
+        
+
+class RollingExtreme:
+    """Rolling max or min over a fixed window using a monotonic deque"""
+    
+    __slots__ = ('period', 'values', 'seq', 'order', 'is_max')
+    
+    def __init__(self, period: int, is_max: bool):
+        self.period = period
+        self.values = [0.0] * period
+        self.seq = 0
+        self.order = deque()
+        self.is_max = is_max
+        
+    def _dominates(self, a: float, b: float) -> bool:
+        return a >= b if self.is_max else a <= b
+        
+    def push(self, value: float, revise: bool = False):
+        """Append a value, or replace the latest one when revising"""
+        order = self.order
+        period = self.period
+        
+        if revise and self.seq:
+            last = self.seq - 1
+            previous = self.values[last % period]
+            self.values[last % period] = value
+            if not self._dominates(value, previous):
+                # The bar moved against the extreme; rebuild from the window
+                order.clear()
+                for s in range(max(0, self.seq - period), self.seq):
+                    self._append(s)
+                return
+            if order and order[-1] == last:
+                order.pop()
+            self._append(last)
+            return
+            
+        self.values[self.seq % period] = value
+        self._append(self.seq)
+        self.seq += 1
+        
+        if order[0] <= self.seq - 1 - period:
+            order.popleft()
+            
+    def _append(self, s: int):
+        values = self.values
+        period = self.period
+        value = values[s % period]
+        while self.order and self._dominates(value, values[self.order[-1] % period]):
+            self.order.pop()
+        self.order.append(s)
+        
+    @property
+    def value(self) -> float:
+        return self.values[self.order[0] % self.period] if self.order else NAN
+        
+
+class Indicator:
+    """
+    Base class for streaming indicators
+    
+    ``update(bar)`` consumes one OHLCV bar in O(1); ``update(bar, revise=True)``
+    replaces the latest bar instead, for candles that are still forming.
+    ``value`` holds the current reading and is NaN until the indicator has
+    seen enough bars, like the leading rows of the pandas calculation.
+    """
+    
+    def __init__(self, source: str = 'close'):
+        self.source = source
+        self.count = 0
+        
+    def update(self, bar, revise: bool = False):
+        self.push(float(bar[self.source]), revise)
+        
+    def push(self, value: float, revise: bool = False):
+        raise NotImplementedError
+        
+    def _advance(self, revise: bool):
+        if not (revise and self.count):
+            self.count += 1
+            
+    @property
+    def value(self):
+        raise NotImplementedError
+        
+    @property
+    def ready(self) -> bool:
+        value = self.value
+        if isinstance(value, tuple):
+            value = value[-1]
+        return value == value
+        
+
+class SMA(Indicator):
+    """Simple moving average, as prices.rolling(window=period).mean()"""
+    
+    def __init__(self, period: int, source: str = 'close'):
+        super().__init__(source)
+        self.period = period
+        self.window = RollingWindow(period)
+        
+    def push(self, value: float, revise: bool = False):
+        self._advance(revise)
+        self.window.push(value, revise)
+        
+    @property
+    def value(self) -> float:
+        return self.window.mean if self.window.full else NAN
+        
+    def std(self, ddof: int = 1) -> float:
+        """Rolling standard deviation over the same window"""
+        return self.window.std(ddof) if self.window.full else NAN
+        
+
+class EMA(Indicator):
+    """Exponential moving average, as prices.ewm(span=period, adjust=False).mean()"""
+    
+    def __init__(self, period: int, source: str = 'close'):
+        super().__init__(source)
+        self.period = period
+        self.alpha = 2.0 / (period + 1)
+        self.previous = NAN
+        self.current = NAN
+        
+    def push(self, value: float, revise: bool = False):
+        if not (revise and self.count):
+            self.previous = self.current
+        self._advance(revise)
+        
+        if self.count == 1:
+            self.current = value
+        else:
+            self.current = self.alpha * value + (1 - self.alpha) * self.previous
+            
+    @property
+    def value(self) -> float:
+        return self.current
+        
+
+class RSI(Indicator):
+    """
+    Relative Strength Index over simple rolling means of gains and losses,
+    as EnhancedTechnicalAnalysis.calculate_rsi
+    """
+    
+    def __init__(self, period: int = 14, source: str = 'close'):
+        super().__init__(source)
+        self.period = period
+        self.gains = RollingWindow(period)
+        self.losses = RollingWindow(period)
+        self.previous = NAN
+        self.current = NAN
+        
+    def push(self, value: float, revise: bool = False):
+        if not (revise and self.count):
+            self.previous = self.current
+        self._advance(revise)
+        self.current = value
+        
+        # The first bar has no change and counts as zero gain and loss
+        delta = value - self.previous if self.count > 1 else 0.0
+        self.gains.push(delta if delta > 0 else 0.0, revise)
+        self.losses.push(-delta if delta < 0 else 0.0, revise)
+        
+    @property
+    def value(self) -> float:
+        if not self.gains.full:
+            return NAN
+            
+        # Snap round-off residue so an all-gain window reads 100, not ~100
+        gain = self.gains.mean if self.gains.nonzero else 0.0
+        loss = self.losses.mean if self.losses.nonzero else 0.0
+        if loss == 0:
+            return 100.0 if gain > 0 else NAN
+        return 100 - (100 / (1 + gain / loss))
+        
+
+class ATR(Indicator):
+    """Average True Range over a simple rolling mean, as calculate_atr"""
+    
+    def __init__(self, period: int = 14):
+        super().__init__()
+        self.period = period
+        self.true_range = RollingWindow(period)
+        self.previous_close = NAN
+        self.close = NAN
+        
+    def update(self, bar, revise: bool = False):
+        if not (revise and self.count):
+            self.previous_close = self.close
+        self._advance(revise)
+        
+        high, low, close = float(bar['high']), float(bar['low']), float(bar['close'])
+        self.close = close
+        
+        tr = high - low
+        if self.count > 1:
+            tr = max(tr, abs(high - self.previous_close), abs(low - self.previous_close))
+        self.true_range.push(tr, revise)
+        
+    @property
+    def value(self) -> float:
+        return self.true_range.mean if self.true_range.full else NAN
+        
+
+class MACD(Indicator):
+    """MACD line, signal and histogram built on shared fast and slow EMAs"""
+    
+    def __init__(self, fast: EMA, slow: EMA, signal_period: int = 9):
+        super().__init__(fast.source)
+        self.fast = fast
+        self.slow = slow
+        self.signal = EMA(signal_period)
+        
+    def update(self, bar, revise: bool = False):
+        # fast and slow are updated by the registry before this indicator
+        self._advance(revise)
+        self.signal.push(self.fast.value - self.slow.value, revise)
+        
+    @property
+    def macd(self) -> float:
+        return self.fast.value - self.slow.value
+        
+    @property
+    def value(self) -> Tuple[float, float, float]:
+        macd = self.macd
+        signal = self.signal.value
+        return macd, signal, macd - signal
+        
+
+class BollingerBands(Indicator):
+    """Bollinger Bands sharing the window of their middle SMA"""
+    
+    def __init__(self, middle: SMA, std_dev: float = 2.0):
+        super().__init__(middle.source)
+        self.middle = middle
+        self.std_dev = std_dev
+        
+    def update(self, bar, revise: bool = False):
+        self._advance(revise)
+        
+    @property
+    def value(self) -> Tuple[float, float, float]:
+        middle = self.middle.value
+        std = self.middle.std()
+        return middle, middle + std * self.std_dev, middle - std * self.std_dev
+        
+
+class Stochastic(Indicator):
+    """Stochastic %K and %D, as calculate_stochastic"""
+    
+    def __init__(self, k_period: int = 14, d_period: int = 3):
+        super().__init__()
+        self.k_period = k_period
+        self.highest = RollingExtreme(k_period, is_max=True)
+        self.lowest = RollingExtreme(k_period, is_max=False)
+        self.d = SMA(d_period)
+        self.k = NAN
+        
+    def update(self, bar, revise: bool = False):
+        self._advance(revise)
+        self.highest.push(float(bar['high']), revise)
+        self.lowest.push(float(bar['low']), revise)
+        
+        if self.count < self.k_period:
+            self.k = NAN
+        else:
+            lowest, highest = self.lowest.value, self.highest.value
+            close = float(bar['close'])
+            if highest != lowest:
+                self.k = 100 * (close - lowest) / (highest - lowest)
+            else:
+                self.k = NAN if close == lowest else math.copysign(math.inf, close - lowest)
+        self.d.push(self.k, revise)
+        
+    @property
+    def value(self) -> Tuple[float, float]:
+        return self.k, self.d.value
+        
+
+class IndicatorRegistry:
+    """
+    Streaming indicators for one OHLCV series, shared by parameters
+    
+    Asking for the same indicator twice returns the same object, and
+    composite indicators request their inputs through the registry, so one
+    EMA26 feeds MACD and any other consumer. Register indicators before
+    feeding bars; one registered later only starts warming up from the next
+    bar. ``update`` advances every indicator in dependency order.
+    """
+    
+    def __init__(self):
+        self._indicators: Dict[tuple, Indicator] = {}
+        self.count = 0
+        self.last_key = None  # Caller-defined key of the latest bar, e.g. its timestamp
+        
+    def __len__(self) -> int:
+        return len(self._indicators)
+        
+    def _get(self, key: tuple, factory: Callable[[], Indicator]) -> Indicator:
+        indicator = self._indicators.get(key)
+        if indicator is None:
+            # Dependencies created by the factory register first
+            indicator = factory()
+            self._indicators[key] = indicator
+        return indicator
+        
+    def sma(self, period: int, source: str = 'close') -> SMA:
+        return self._get(('sma', period, source), lambda: SMA(period, source))
+        
+    def ema(self, period: int, source: str = 'close') -> EMA:
+        return self._get(('ema', period, source), lambda: EMA(period, source))
+        
+    def rsi(self, period: int = 14) -> RSI:
+        return self._get(('rsi', period), lambda: RSI(period))
+        
+    def atr(self, period: int = 14) -> ATR:
+        return self._get(('atr', period), lambda: ATR(period))
+        
+    def macd(self, fast_period: int = 12, slow_period: int = 26, signal_period: int = 9) -> MACD:
+        return self._get(
+            ('macd', fast_period, slow_period, signal_period),
+            lambda: MACD(self.ema(fast_period), self.ema(slow_period), signal_period)
+        )
+        
+    def bollinger_bands(self, period: int = 20, std_dev: float = 2.0) -> BollingerBands:
+        return self._get(
+            ('bollinger_bands', period, std_dev),
+            lambda: BollingerBands(self.sma(period), std_dev)
+        )
+        
+    def stochastic(self, k_period: int = 14, d_period: int = 3) -> Stochastic:
+        return self._get(('stochastic', k_period, d_period), lambda: Stochastic(k_period, d_period))
+        
+    def update(self, bar, revise: bool = False, key=None):
+        """Feed one bar to every indicator, or revise the latest one"""
+        if not (revise and self.count):
+            self.count += 1
+        self.last_key = key
+        
+        for indicator in self._indicators.values():
+            indicator.update(bar, revise)
+            
+    def replay(self, df):
+        """Feed every row of an OHLCV DataFrame, keyed by its index"""
+        columns = {name: df[name].to_numpy(dtype=float) for name in ('open', 'high', 'low', 'close', 'volume') if name in df}
+        bar = {}
+        for i, key in enumerate(df.index):
+            for name, values in columns.items():
+                bar[name] = values[i]
+            self.update(bar, key=key)
+            
+    def reset(self):
+        """Forget all bars while keeping the registered indicators"""
+        factories = list(self._indicators)
+        self._indicators.clear()
+        self.count = 0
+        self.last_key = None
+        
+        for key in factories:
+            kind, *params = key
+            getattr(self, kind)(*params)
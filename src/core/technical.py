@@ -1,9 +1,11 @@
 import pandas as pd
 import numpy as np
-from typing import Tuple, List, Dict
+from typing import Tuple, List, Dict, Optional
 from dataclasses import dataclass
 import logging
 
+from src.core.indicators import IndicatorRegistry
+
 @dataclass
 class IndicatorSignal:
     value: float
@@ -13,6 +15,10 @@ class IndicatorSignal:
 class EnhancedTechnicalAnalysis:
     """Enhanced technical analysis and indicator calculations"""
     
+    def __init__(self):
+        # Streaming indicators per (pair, interval), kept in step with the frames passed in
+        self.registries: Dict[Tuple[str, int], IndicatorRegistry] = {}
+    
     @staticmethod
     def calculate_sma(prices: pd.Series, period: int) -> pd.Series:
         """Calculate Simple Moving Average"""
@@ -117,41 +123,139 @@ class EnhancedTechnicalAnalysis:
             logging.error(f"Error calculating Stochastic: {e}")
             return pd.Series(), pd.Series()
 
+    @staticmethod
+    def _new_registry() -> IndicatorRegistry:
+        """Registry with every indicator analyze_price_action reads"""
+        registry = IndicatorRegistry()
+        registry.sma(20)
+        registry.sma(50)
+        registry.rsi()
+        registry.bollinger_bands()
+        registry.macd()
+        registry.stochastic()
+        registry.sma(20, source='volume')
+        registry.atr()
+        return registry
+    
+    @staticmethod
+    def _bar_interval(df: pd.DataFrame) -> int:
+        """Bar length of df in minutes, from its last two rows (0 for one row)"""
+        if len(df) < 2:
+            return 0
+        return int((df.index[-1] - df.index[-2]).total_seconds() // 60)
+        
+    def _sync_registry(self, df: pd.DataFrame, pair: str,
+                       interval: Optional[int] = None) -> Optional[IndicatorRegistry]:
+        """
+        Bring the streaming indicators of the pair and interval up to the
+        last row of df
+        
+        Only rows after the last bar seen are fed, and that bar is revised in
+        case its candle was still forming. Frames that do not continue the
+        previous one are replayed from scratch. The interval (minutes) is read
+        from the index when not given, so frames of different timeframes for
+        one pair keep separate indicators. Returns None for frames without a
+        DatetimeIndex, which cannot be matched to earlier calls.
+        """
+        if df.empty or not isinstance(df.index, pd.DatetimeIndex):
+            return None
+            
+        key = (pair, interval if interval is not None else self._bar_interval(df))
+        registry = self.registries.get(key)
+        if registry is None:
+            registry = self.registries[key] = self._new_registry()
+            
+        index = df.index
+        pos = len(df) - 1
+        last = registry.last_key
+        if last is not None:
+            while pos >= 0 and index[pos] > last:
+                pos -= 1
+                
+        if last is None or pos < 0 or index[pos] != last:
+            registry.reset()
+            registry.replay(df)
+            return registry
+            
+        columns = [df[name] for name in ('open', 'high', 'low', 'close', 'volume')]
+        for p in range(pos, len(df)):
+            bar = {series.name: series.iat[p] for series in columns}
+            registry.update(bar, revise=(p == pos), key=index[p])
+            
+        return registry
+    
+    def _latest_indicators(self, df: pd.DataFrame, pair: str,
+                           interval: Optional[int] = None) -> Dict[str, float]:
+        """Latest value of each indicator, streamed when df allows it"""
+        registry = self._sync_registry(df, pair, interval)
+        
+        if registry is not None:
+            _, bb_upper, bb_lower = registry.bollinger_bands().value
+            macd, macd_signal, _ = registry.macd().value
+            k, _ = registry.stochastic().value
+            return {
+                'sma_20': registry.sma(20).value,
+                'sma_50': registry.sma(50).value,
+                'rsi': registry.rsi().value,
+                'bb_upper': bb_upper,
+                'bb_lower': bb_lower,
+                'macd': macd,
+                'macd_signal': macd_signal,
+                'stoch_k': k,
+                'volume_sma': registry.sma(20, source='volume').value,
+                'atr': registry.atr().value
+            }
+            
+        close = df['close']
+        high = df['high']
+        low = df['low']
+        _, bb_upper, bb_lower = self.calculate_bollinger_bands(close)
+        macd, macd_signal, _ = self.calculate_macd(close)
+        k, _ = self.calculate_stochastic(high, low, close)
+        return {
+            'sma_20': self.calculate_sma(close, 20).iloc[-1],
+            'sma_50': self.calculate_sma(close, 50).iloc[-1],
+            'rsi': self.calculate_rsi(close).iloc[-1],
+            'bb_upper': bb_upper.iloc[-1],
+            'bb_lower': bb_lower.iloc[-1],
+            'macd': macd.iloc[-1],
+            'macd_signal': macd_signal.iloc[-1],
+            'stoch_k': k.iloc[-1],
+            'volume_sma': self.calculate_sma(df['volume'], 20).iloc[-1],
+            'atr': self.calculate_atr(high, low, close).iloc[-1]
+        }
+
     def analyze_price_action(
         self,
         df: pd.DataFrame,
-        pair: str
+        pair: str,
+        interval: Optional[int] = None
     ) -> Dict[str, IndicatorSignal]:
         """Comprehensive price action analysis"""
         try:
             results = {}
             
             # Calculate all indicators
-            close = df['close']
-            high = df['high']
-            low = df['low']
+            latest = self._latest_indicators(df, pair, interval)
+            close = df['close'].iloc[-1]
             
             # SMA Crossover
-            sma_20 = self.calculate_sma(close, 20)
-            sma_50 = self.calculate_sma(close, 50)
-            
             results['sma_cross'] = IndicatorSignal(
-                value=sma_20.iloc[-1],
-                signal="BUY" if sma_20.iloc[-1] > sma_50.iloc[-1] else "SELL",
+                value=latest['sma_20'],
+                signal="BUY" if latest['sma_20'] > latest['sma_50'] else "SELL",
                 description="Moving Average Crossover"
             )
             
             # RSI
-            rsi = self.calculate_rsi(close)
+            rsi = latest['rsi']
             results['rsi'] = IndicatorSignal(
-                value=rsi.iloc[-1],
-                signal="SELL" if rsi.iloc[-1] > 70 else "BUY" if rsi.iloc[-1] < 30 else "NEUTRAL",
+                value=rsi,
+                signal="SELL" if rsi > 70 else "BUY" if rsi < 30 else "NEUTRAL",
                 description="Relative Strength Index"
             )
             
             # Bollinger Bands
-            bb_mid, bb_upper, bb_lower = self.calculate_bollinger_bands(close)
-            bb_pct = (close.iloc[-1] - bb_lower.iloc[-1]) / (bb_upper.iloc[-1] - bb_lower.iloc[-1]) * 100
+            bb_pct = (close - latest['bb_lower']) / (latest['bb_upper'] - latest['bb_lower']) * 100
             
             results['bb'] = IndicatorSignal(
                 value=bb_pct,
@@ -160,33 +264,30 @@ class EnhancedTechnicalAnalysis:
             )
             
             # MACD
-            macd, signal, hist = self.calculate_macd(close)
             results['macd'] = IndicatorSignal(
-                value=macd.iloc[-1],
-                signal="BUY" if macd.iloc[-1] > signal.iloc[-1] else "SELL",
+                value=latest['macd'],
+                signal="BUY" if latest['macd'] > latest['macd_signal'] else "SELL",
                 description="MACD Crossover"
             )
             
             # Stochastic
-            k, d = self.calculate_stochastic(high, low, close)
+            k = latest['stoch_k']
             results['stoch'] = IndicatorSignal(
-                value=k.iloc[-1],
-                signal="SELL" if k.iloc[-1] > 80 else "BUY" if k.iloc[-1] < 20 else "NEUTRAL",
+                value=k,
+                signal="SELL" if k > 80 else "BUY" if k < 20 else "NEUTRAL",
                 description="Stochastic Oscillator"
             )
             
             # Volume Analysis
-            volume = df['volume']
-            vol_sma = self.calculate_sma(volume, 20)
+            volume = df['volume'].iloc[-1]
             results['volume'] = IndicatorSignal(
-                value=volume.iloc[-1],
-                signal="STRONG" if volume.iloc[-1] > vol_sma.iloc[-1] * 1.5 else "WEAK",
+                value=volume,
+                signal="STRONG" if volume > latest['volume_sma'] * 1.5 else "WEAK",
                 description="Volume Strength"
             )
             
             # Trend Strength
-            atr = self.calculate_atr(high, low, close)
-            atr_pct = (atr.iloc[-1] / close.iloc[-1]) * 100
+            atr_pct = (latest['atr'] / close) * 100
             
             results['trend_strength'] = IndicatorSignal(
                 value=atr_pct,
@@ -204,12 +305,13 @@ class EnhancedTechnicalAnalysis:
         self,
         df: pd.DataFrame,
         pair: str,
-        risk_params: Dict
+        risk_params: Dict,
+        interval: Optional[int] = None
     ) -> Dict[str, any]:
         """Generate trading signals with risk management"""
         try:
             # Get all indicator signals
-            analysis = self.analyze_price_action(df, pair)
+            analysis = self.analyze_price_action(df, pair, interval)
             
             # Weight each indicator
             indicator_weights = {
@@ -247,7 +349,11 @@ class EnhancedTechnicalAnalysis:
             risk_per_trade = risk_params.get('risk_per_trade', 0.01)
             
             current_price = df['close'].iloc[-1]
-            atr = self.calculate_atr(df['high'], df['low'], df['close']).iloc[-1]
+            registry = self._sync_registry(df, pair, interval)
+            if registry is not None:
+                atr = registry.atr().value
+            else:
+                atr = self.calculate_atr(df['high'], df['low'], df['close']).iloc[-1]
             stop_distance = atr * 2
             
             # Determine signal and position size
@@ -0,0 +1,51 @@
+"""
+CandleAggregator must not pass off the bar trades started in as complete
+
+Run from the repository root:
+    python -m unittest discover -s src/tests -t src
+"""
+
+import unittest
+
+import pandas as pd
+
+from candle_aggregator import CandleAggregator
+
+HOUR = 3600
+T0 = 1_700_000_000 - 1_700_000_000 % HOUR
+
+
+def stream(aggregator, start, end, step=20):
+    for t in range(start, end, step):
+        aggregator.add_trade('XBT/USD', 100.0, 1.0, t)
+
+
+class PartialBarTest(unittest.TestCase):
+
+    def test_first_bar_of_each_interval_is_partial(self):
+        aggregator = CandleAggregator((1, 5, 60))
+        stream(aggregator, T0 + 1810, T0 + 2 * HOUR + 60)
+
+        self.assertEqual(aggregator.partial_start('XBT/USD', 60), T0)
+        self.assertEqual(aggregator.partial_start('XBT/USD', 5), T0 + 1800)
+        self.assertEqual(aggregator.partial_start('XBT/USD', 1), T0 + 1800)
+        self.assertIsNone(aggregator.partial_start('ETH/USD', 60))
+
+    def test_seed_replaces_partial_bar(self):
+        aggregator = CandleAggregator((1, 60))
+        stream(aggregator, T0 + 1810, T0 + 2 * HOUR + 60)
+        self.assertEqual(aggregator.get_bars('XBT/USD', 60)['volume'].iat[0], 90)
+
+        seed = pd.DataFrame(
+            {'open': [99.0], 'high': [101.0], 'low': [98.0], 'close': [100.0], 'volume': [180.0]},
+            index=pd.to_datetime([T0], unit='s')
+        )
+        aggregator.seed('XBT/USD', 60, seed)
+
+        self.assertIsNone(aggregator.partial_start('XBT/USD', 60))
+        self.assertEqual(aggregator.partial_start('XBT/USD', 1), T0 + 1800)
+        self.assertEqual(aggregator.get_bars('XBT/USD', 60)['volume'].iat[0], 180)
+
+
+if __name__ == '__main__':
+    unittest.main()
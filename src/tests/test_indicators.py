@@ -0,0 +1,135 @@
+"""
+Streaming indicators must agree with the pandas calculations
+
+Run from the repository root:
+    python -m unittest discover -s src/tests -t src
+"""
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from src.core.indicators import IndicatorRegistry, RollingWindow
+from src.core.technical import EnhancedTechnicalAnalysis
+
+
+def make_bars(n: int = 400, seed: int = 3) -> pd.DataFrame:
+    """Random-walk OHLCV bars with a flat stretch, where RSI is undefined"""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    close[150:200] = close[149]
+    high = close * (1 + rng.uniform(0, 0.005, n))
+    low = close * (1 - rng.uniform(0, 0.005, n))
+    high[150:200] = low[150:200] = close[149]
+    return pd.DataFrame({
+        'open': close,
+        'high': high,
+        'low': low,
+        'close': close,
+        'volume': rng.uniform(1, 100, n),
+    }, index=pd.date_range('2024-01-01', periods=n, freq='5min'))
+
+
+def new_registry() -> IndicatorRegistry:
+    registry = IndicatorRegistry()
+    registry.sma(20)
+    registry.ema(12)
+    registry.rsi()
+    registry.atr()
+    registry.bollinger_bands()
+    registry.macd()
+    registry.stochastic()
+    return registry
+
+
+def streamed(registry: IndicatorRegistry) -> dict:
+    middle, upper, lower = registry.bollinger_bands().value
+    macd, signal, histogram = registry.macd().value
+    k, d = registry.stochastic().value
+    return {
+        'sma': registry.sma(20).value,
+        'ema': registry.ema(12).value,
+        'rsi': registry.rsi().value,
+        'atr': registry.atr().value,
+        'bb_middle': middle,
+        'bb_upper': upper,
+        'bb_lower': lower,
+        'macd': macd,
+        'macd_signal': signal,
+        'macd_histogram': histogram,
+        'stoch_k': k,
+        'stoch_d': d,
+    }
+
+
+def batch(df: pd.DataFrame) -> pd.DataFrame:
+    ta = EnhancedTechnicalAnalysis
+    close, high, low = df['close'], df['high'], df['low']
+    middle, upper, lower = ta.calculate_bollinger_bands(close)
+    macd, signal, histogram = ta.calculate_macd(close)
+    k, d = ta.calculate_stochastic(high, low, close)
+    return pd.DataFrame({
+        'sma': ta.calculate_sma(close, 20),
+        'ema': ta.calculate_ema(close, 12),
+        'rsi': ta.calculate_rsi(close),
+        'atr': ta.calculate_atr(high, low, close),
+        'bb_middle': middle,
+        'bb_upper': upper,
+        'bb_lower': lower,
+        'macd': macd,
+        'macd_signal': signal,
+        'macd_histogram': histogram,
+        'stoch_k': k,
+        'stoch_d': d,
+    })
+
+
+class StreamingIndicatorParityTest(unittest.TestCase):
+    """IndicatorRegistry fed bar by bar vs. EnhancedTechnicalAnalysis"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.bars = make_bars()
+        cls.expected = batch(cls.bars)
+
+    def assert_row_close(self, actual, i, msg):
+        for name, value in actual.items():
+            np.testing.assert_allclose(
+                value, self.expected[name].iat[i], rtol=1e-8, atol=1e-9, err_msg=f"{msg} {name}"
+            )
+
+    def test_update_matches_pandas(self):
+        registry = new_registry()
+        for i in range(len(self.bars)):
+            registry.update(self.bars.iloc[i])
+            self.assert_row_close(streamed(registry), i, f"bar {i}")
+
+    def test_flat_prices_give_nan_rsi(self):
+        registry = new_registry()
+        for i in range(200):
+            registry.update(self.bars.iloc[i])
+        # A window of unchanged closes has no gains or losses
+        self.assertTrue(np.isnan(registry.rsi().value))
+        self.assertTrue(np.isnan(self.expected['rsi'].iat[199]))
+
+    def test_revised_bars_match_pandas(self):
+        registry = new_registry()
+        columns = ('open', 'high', 'low', 'close', 'volume')
+        for i in range(len(self.bars)):
+            bar = self.bars.iloc[i]
+            forming = {name: bar[name] for name in columns}
+            forming['close'] = forming['high'] = bar['close'] * 1.01
+            registry.update(forming)
+            registry.update(bar, revise=True)
+            self.assert_row_close(streamed(registry), i, f"bar {i}")
+
+    def test_rolling_window_counts_nonzero_values(self):
+        window = RollingWindow(3)
+        for value in (np.float64(1.0), 0.0, 2.0, 3.0, 0.0, 0.0, 0.0):
+            window.push(value)
+        self.assertEqual(window.nonzero, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
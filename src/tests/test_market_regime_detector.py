@@ -0,0 +1,93 @@
+"""
+Streaming regime detection must agree with the batch calculation
+
+Run from the repository root:
+    python -m unittest discover -s src/tests -t src
+"""
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from market_regime_detector import MarketRegime, MarketRegimeDetector
+
+
+def make_bars(n: int = 600, seed: int = 1) -> pd.DataFrame:
+    """Random-walk OHLCV bars whose drift and volatility change every 100 bars"""
+    rng = np.random.default_rng(seed)
+    drift = np.repeat(rng.normal(0, 0.002, n // 100 + 1), 100)[:n]
+    scale = np.repeat(rng.uniform(0.001, 0.01, n // 100 + 1), 100)[:n]
+    close = 50000 * np.exp(np.cumsum(drift + rng.normal(0, 1, n) * scale))
+    return pd.DataFrame({
+        'open': close,
+        'high': close * (1 + rng.uniform(0, 0.004, n)),
+        'low': close * (1 - rng.uniform(0, 0.004, n)),
+        'close': close,
+        'volume': rng.uniform(1, 100, n),
+    }, index=pd.date_range('2024-01-01', periods=n, freq='5min'))
+
+
+class StreamingRegimeParityTest(unittest.TestCase):
+    """MarketRegimeDetector.update() fed bar by bar vs. the batch methods"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.bars = make_bars()
+
+    def assert_indicators_close(self, actual, expected, msg=None):
+        self.assertEqual(actual.keys(), expected.keys(), msg)
+        for name, value in expected.items():
+            np.testing.assert_allclose(actual[name], value, rtol=1e-8, atol=1e-12, err_msg=f"{msg} {name}")
+
+    def test_update_matches_batch_indicators(self):
+        streaming = MarketRegimeDetector()
+        batch = MarketRegimeDetector()
+
+        for k in range(len(self.bars)):
+            signal = streaming.update(self.bars.iloc[k], key='XBTUSD')
+            if k + 1 < streaming.lookback_periods:
+                self.assertEqual(signal.regime, MarketRegime.UNKNOWN)
+                continue
+
+            expected = batch._calculate_regime_indicators(self.bars.iloc[:k + 1])
+            self.assert_indicators_close(signal.indicators, expected, f"bar {k}")
+
+    def test_update_matches_analyze_regime(self):
+        streaming = MarketRegimeDetector()
+        batch = MarketRegimeDetector()
+        regimes = set()
+
+        for k in range(len(self.bars)):
+            signal = streaming.update(self.bars.iloc[k], key='XBTUSD')
+            if k + 1 < streaming.lookback_periods:
+                continue
+
+            expected = batch.analyze_regime(self.bars.iloc[:k + 1])
+            self.assertEqual(signal.regime, expected.regime, f"bar {k}")
+            np.testing.assert_allclose(signal.confidence, expected.confidence, rtol=1e-8, err_msg=f"bar {k}")
+            np.testing.assert_allclose(signal.strength, expected.strength, rtol=1e-8, atol=1e-12, err_msg=f"bar {k}")
+            self.assertEqual(signal.duration, expected.duration, f"bar {k}")
+            regimes.add(signal.regime)
+
+        # The series is meant to exercise more than one regime
+        self.assertGreater(len(regimes), 1)
+
+    def test_streams_are_independent_per_key(self):
+        detector = MarketRegimeDetector()
+        other = make_bars(seed=2)
+
+        for k in range(len(self.bars)):
+            detector.update(self.bars.iloc[k], key='XBTUSD')
+            signal = detector.update(other.iloc[k], key='ETHUSD')
+
+        expected = MarketRegimeDetector()._calculate_regime_indicators(other)
+        self.assert_indicators_close(signal.indicators, expected)
+
+        detector.reset_stream('ETHUSD')
+        self.assertNotIn('ETHUSD', detector.streams)
+        self.assertIn('XBTUSD', detector.streams)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+"""
+OrderBook checksums and slippage estimates from the live book
+
+Run from the repository root:
+    python -m unittest discover -s src/tests -t src
+"""
+
+import asyncio
+import unittest
+
+from order_book import OrderBook
+from order_validator import OrderValidator
+
+# Example book from Kraken's WebSocket v1 checksum documentation
+KRAKEN_ASKS = ['0.05005', '0.05010', '0.05015', '0.05020', '0.05025',
+               '0.05030', '0.05035', '0.05040', '0.05045', '0.05050']
+KRAKEN_BIDS = ['0.05000', '0.04995', '0.04990', '0.04980', '0.04975',
+               '0.04970', '0.04965', '0.04960', '0.04955', '0.04950']
+KRAKEN_CHECKSUM = 974947235
+
+
+def snapshot(asks, bids, volume='0.00000500'):
+    return {
+        'as': [[price, volume, '1534614057.321597'] for price in asks],
+        'bs': [[price, volume, '1534614057.321597'] for price in bids],
+    }
+
+
+class FakeApi:
+    """REST client whose book is deeper than the websocket subscription"""
+
+    def __init__(self, asks):
+        self.asks = asks
+        self.calls = 0
+
+    async def get_orderbook(self, pair):
+        self.calls += 1
+        return {'asks': self.asks, 'bids': []}
+
+
+class OrderBookTest(unittest.TestCase):
+
+    def test_checksum_matches_kraken_example(self):
+        book = OrderBook('XBT/USD', 10)
+        book.apply_snapshot(snapshot(KRAKEN_ASKS, KRAKEN_BIDS))
+        self.assertEqual(book.checksum(), KRAKEN_CHECKSUM)
+
+    def test_checksum_mismatch_unsyncs_book(self):
+        book = OrderBook('XBT/USD', 10)
+        book.apply_snapshot(snapshot(KRAKEN_ASKS, KRAKEN_BIDS))
+        book.apply_update({'a': [['0.05005', '0.00000000', '1534614248.123678']], 'c': '0'})
+        self.assertFalse(book.synced)
+
+    def test_slippage_falls_back_to_rest_past_live_depth(self):
+        book = OrderBook('XBTUSD', 10)
+        asks = [f"{100 + i:.1f}" for i in range(10)]
+        book.apply_snapshot(snapshot(asks, ['99.0'], volume='1.0'))
+        deep = [[f"{100 + i:.1f}", '1.0', 0] for i in range(30)]
+        api = FakeApi(deep)
+        validator = OrderValidator(api, None, order_books={'XBTUSD': book})
+
+        # Within the live book: no REST request
+        result = asyncio.run(validator._estimate_slippage('XBTUSD', 'buy', 5.0))
+        self.assertEqual(api.calls, 0)
+        self.assertAlmostEqual(result['estimated_slippage'], 0.02)
+
+        # Deeper than the live book: priced against the REST snapshot
+        result = asyncio.run(validator._estimate_slippage('XBTUSD', 'buy', 20.0))
+        self.assertEqual(api.calls, 1)
+        self.assertNotIn('warning', result)
+        self.assertAlmostEqual(result['estimated_slippage'], 0.095)
+
+
+if __name__ == '__main__':
+    unittest.main()
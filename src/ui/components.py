@@ -20,6 +20,8 @@ from textual.widgets import (
     Sparkline
 )
 from textual.reactive import reactive
+
+from order_book import OrderBook
 # ------------------------------------------------------------------------------
 
 ########################################################################
@@ -703,12 +705,20 @@ class EnhancedOrderBook(Static):
             table.add_column("Size", width=20)
             table.add_column("Total", width=20)
 
-    def update_book(self, book_data: dict):
+    def update_book(self, book_data):
+        """Render an OrderBook, or a dict of {price: size} per side."""
         if not book_data:
             return
 
+        if isinstance(book_data, OrderBook):
+            # Levels are already sorted best first
+            levels = book_data.depth(10)
+            bids, asks = levels["bids"], levels["asks"]
+        else:
+            bids = sorted(book_data["bids"].items(), reverse=True)[:10]
+            asks = sorted(book_data["asks"].items())[:10]
+
         self.bids_table.clear()
-        bids = sorted(book_data["bids"].items(), reverse=True)[:10]
         total = 0
         for price, size in bids:
             total += size
@@ -719,7 +729,6 @@ class EnhancedOrderBook(Static):
             )
 
         self.asks_table.clear()
-        asks = sorted(book_data["asks"].items())[:10]
         total = 0
         for price, size in asks:
             total += size
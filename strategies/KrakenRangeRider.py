@@ -35,12 +35,26 @@ class RangeTradingStrategy(TradingStrategy):
         if not self.kraken_api:
             raise ValueError("kraken_api instance must be provided in config")
 
+        # Optional EnhancedWebSocketHandler whose live bars, built from the
+        # trade stream, stand in for REST while the pair's trades are
+        # subscribed and flowing; REST responses seed its candles otherwise
+        self.ws_handler = config.get('websocket_handler')
+
     def fetch_and_process_ohlc(self) -> Optional[pd.DataFrame]:
         """
         Fetch and process OHLC data from Kraken.
         
+        Live bars from the WebSocket handler are used while they are current
+        and hold the full lookback; otherwise the REST response is used and
+        seeds them.
+        
         :return: Processed DataFrame or None on error
         """
+        if self.ws_handler is not None:
+            bars = self.ws_handler.live_bars(self.pair, self.interval, self.lookback, include_forming=True)
+            if bars is not None:
+                return bars
+
         try:
             # Fetch OHLC data
             ohlc_response = self.kraken_api.get_ohlc_data(self.pair, interval=self.interval)
@@ -71,6 +85,9 @@ class RangeTradingStrategy(TradingStrategy):
             df.set_index("time", inplace=True)
             df.sort_index(inplace=True)
 
+            if self.ws_handler is not None and self.interval in self.ws_handler.candles.intervals:
+                self.ws_handler.candles.seed(self.ws_handler.ws_pair(self.pair), self.interval, df)
+
             return df
 
         except Exception as e:
@@ -70,6 +70,11 @@ class ROC_MomentumSwing(TradingStrategy):
             'enableRateLimit': True
         })
 
+        # Optional EnhancedWebSocketHandler whose live bars, built from the
+        # trade stream, stand in for fetch_ohlcv while the pair's trades are
+        # subscribed and flowing; exchange responses seed its candles otherwise
+        self.ws_handler = config.get("websocket_handler")
+
         # Track current position and entry price in memory
         self.current_position = 'flat'
         self.entry_price = None
@@ -80,12 +85,33 @@ class ROC_MomentumSwing(TradingStrategy):
     def fetch_ohlcv(self, symbol: str, timeframe: str, limit: int = 100) -> pd.DataFrame:
         """
         Fetch OHLCV data from Kraken using ccxt. Returns a pandas DataFrame.
+        Served from the WebSocket handler's live bars while they are current
+        and hold ``limit`` bars (the last one forming, as from the exchange).
         """
+        interval = self.timeframe_minutes(timeframe)
+        handler = self.ws_handler
+
+        if handler is not None:
+            bars = handler.live_bars(symbol, interval, limit - 1, include_forming=True)
+            if bars is not None:
+                df = bars.reset_index().rename(columns={'time': 'timestamp'})
+                return df[['timestamp', 'open', 'high', 'low', 'close', 'volume']]
+
         data = self.exchange.fetch_ohlcv(symbol, timeframe=timeframe, limit=limit)
         df = pd.DataFrame(data, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
         df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+
+        if handler is not None and interval in handler.candles.intervals:
+            # ccxt symbols such as BTC/USD are XBT/USD on the V1 WebSocket API
+            handler.candles.seed(handler.ws_pair(symbol), interval, df.set_index('timestamp'))
         return df
 
+    @staticmethod
+    def timeframe_minutes(timeframe: str) -> int:
+        """ccxt timeframe such as '15m', '1h' or '1d' in minutes"""
+        units = {'m': 1, 'h': 60, 'd': 1440, 'w': 10080}
+        return int(timeframe[:-1]) * units[timeframe[-1]]
+
     def calculate_roc(self, df: pd.DataFrame, period: int) -> pd.DataFrame:
         """
         Calculate Rate of Change (ROC).
@@ -3,6 +3,11 @@ Grid Trading Strategy
 
 Places buy and sell orders at regular intervals around current price.
 Works well in sideways/choppy markets with regular oscillations.
+
+Grid levels rest as limit orders in the backtester's order book, so they
+fill at their level price when a bar's high/low reaches it. Each filled
+buy is answered with a sell one grid step higher, and each filled sell
+with a buy one step lower.
 """
 
 import pandas as pd
@@ -50,7 +55,7 @@ class GridTradingStrategy:
         self.price_history = {}
         
     def analyze(self, market_data: Dict[str, pd.Series]) -> List[Dict]:
-        """Analyze market data and generate grid trading signals"""
+        """Keep each pair's grid of resting orders up to date; returns no market signals"""
         signals = []
         
         for pair, current_price_data in market_data.items():
@@ -86,40 +91,37 @@ class GridTradingStrategy:
         return signals
         
     def _manage_grid(self, pair: str, df: pd.DataFrame) -> List[Dict]:
-        """Manage grid for a specific pair"""
-        signals = []
+        """Manage grid for a specific pair; orders go straight to the order book"""
         current_price = df['close'].iloc[-1]
         
+        # Settle the grid orders filled since the last bar
+        if pair in self.grids:
+            self._process_fills(pair, self.grids[pair])
+            
         # Initialize or check if grid needs rebalancing
         if pair not in self.grids or self._should_rebalance_grid(pair, current_price):
             # Calculate optimal grid parameters
             volatility = self._calculate_volatility(df['close'])
             grid_spacing = self._calculate_optimal_spacing(volatility)
             
-            # Create new grid
-            new_grid = self._create_grid(pair, current_price, grid_spacing)
-            
             if pair in self.grids:
                 logger.info(f"🔄 Rebalancing grid for {pair} at ${current_price:.2f}")
+                self._cancel_grid_orders(self.grids[pair])
             else:
                 logger.info(f"🎯 Creating new grid for {pair} at ${current_price:.2f}")
                 
-            self.grids[pair] = new_grid
+            self.grids[pair] = self._create_grid(pair, current_price, grid_spacing)
             
-        # Check for grid level triggers
-        grid = self.grids[pair]
-        triggered_signals = self._check_grid_triggers(pair, current_price, grid)
-        signals.extend(triggered_signals)
-        
-        return signals
+        return []
         
     def _create_grid(self, pair: str, center_price: float, spacing: float) -> Dict:
-        """Create a new trading grid"""
+        """Create a new trading grid and rest its orders"""
         grid = {
             'center_price': center_price,
             'spacing': spacing,
             'buy_levels': [],
             'sell_levels': [],
+            'orders': {},  # txid -> level
             'filled_levels': set(),
             'created_at': datetime.now()
         }
@@ -130,6 +132,7 @@ class GridTradingStrategy:
             grid['buy_levels'].append({
                 'price': buy_price,
                 'level': -i,
+                'side': 'buy',
                 'status': 'pending'
             })
             
@@ -139,9 +142,20 @@ class GridTradingStrategy:
             grid['sell_levels'].append({
                 'price': sell_price,
                 'level': i,
+                'side': 'sell',
                 'status': 'pending'
             })
             
+        for level in grid['buy_levels']:
+            self._place_grid_buy(pair, grid, level)
+            
+        # Inventory from earlier grids is offered evenly across the sell levels
+        held = self.positions[pair]['total_volume'] if pair in self.positions else 0
+        if held > 0 and grid['sell_levels']:
+            volume = held / len(grid['sell_levels'])
+            for level in grid['sell_levels']:
+                self._place_grid_order(pair, grid, level, volume)
+                
         return grid
         
     def _should_rebalance_grid(self, pair: str, current_price: float) -> bool:
@@ -156,120 +170,118 @@ class GridTradingStrategy:
         price_change = abs(current_price - center_price) / center_price
         return price_change > self.rebalance_threshold
         
-    def _check_grid_triggers(self, pair: str, current_price: float, grid: Dict) -> List[Dict]:
-        """Check if any grid levels are triggered"""
-        signals = []
+    def _place_grid_buy(self, pair: str, grid: Dict, level: Dict) -> Optional[str]:
+        """Rest a buy limit at a grid level, within the position limit"""
+        account_balance = self._get_account_balance()
+        position_value = account_balance * self.position_size_pct
         
-        # Check buy levels
-        for level in grid['buy_levels']:
-            if level['status'] == 'pending' and current_price <= level['price']:
-                # Trigger buy order
-                signal = self._create_grid_buy_signal(pair, level, current_price)
-                if signal:
-                    signals.append(signal)
-                    level['status'] = 'filled'
-                    grid['filled_levels'].add(level['level'])
-                    
-        # Check sell levels
-        for level in grid['sell_levels']:
-            if level['status'] == 'pending' and current_price >= level['price']:
-                # Trigger sell order (only if we have position)
-                signal = self._create_grid_sell_signal(pair, level, current_price)
-                if signal:
-                    signals.append(signal)
-                    level['status'] = 'filled'
-                    grid['filled_levels'].add(level['level'])
-                    
-        return signals
+        # Resting buys count towards the limit, as they may all fill
+        committed = self._get_current_exposure(pair) + sum(
+            open_level['volume'] * open_level['price']
+            for open_level in grid['orders'].values() if open_level['side'] == 'buy'
+        )
+        if committed + position_value > account_balance * self.max_position_pct:
+            logger.debug(f"Grid buy at level {level['level']} skipped for {pair}: position limit reached")
+            return None
+            
+        return self._place_grid_order(pair, grid, level, position_value / level['price'])
         
-    def _create_grid_buy_signal(self, pair: str, level: Dict, current_price: float) -> Optional[Dict]:
-        """Create buy signal for grid level"""
+    def _place_grid_order(self, pair: str, grid: Dict, level: Dict, volume: float) -> Optional[str]:
+        """Rest a limit order for a grid level"""
         try:
-            # Calculate position size
-            account_balance = await self._get_account_balance()
-            position_value = account_balance * self.position_size_pct
-            volume = position_value / current_price
-            
-            # Check maximum position limit
-            current_exposure = self._get_current_exposure(pair)
-            if current_exposure + position_value > account_balance * self.max_position_pct:
-                logger.warning(f"Grid buy skipped for {pair}: position limit reached")
-                return None
-                
-            # Update position tracking
-            if pair not in self.positions:
-                self.positions[pair] = {
-                    'total_volume': 0,
-                    'avg_price': 0,
-                    'grid_levels': []
-                }
-                
-            pos = self.positions[pair]
-            new_total_volume = pos['total_volume'] + volume
-            new_avg_price = (pos['avg_price'] * pos['total_volume'] + current_price * volume) / new_total_volume
-            
-            pos['total_volume'] = new_total_volume
-            pos['avg_price'] = new_avg_price
-            pos['grid_levels'].append(level['level'])
-            
-            logger.info(f"🟢 GRID BUY {pair}: ${current_price:.2f} (Level {level['level']}, "
-                       f"Volume: {volume:.6f})")
-            
-            return {
-                'action': 'buy',
-                'pair': pair,
-                'volume': volume,
-                'price': current_price,
-                'reason': f'grid_level_{level["level"]}'
-            }
-            
+            result = self.api.create_order(
+                pair=pair,
+                side=level['side'],
+                order_type='limit',
+                volume=volume,
+                price=level['price']
+            )
         except Exception as e:
-            logger.error(f"Error creating grid buy signal: {e}")
+            logger.error(f"Error placing grid {level['side']} for {pair}: {e}")
             return None
             
-    def _create_grid_sell_signal(self, pair: str, level: Dict, current_price: float) -> Optional[Dict]:
-        """Create sell signal for grid level"""
-        try:
-            # Only sell if we have a position
-            if pair not in self.positions or self.positions[pair]['total_volume'] <= 0:
-                return None
-                
-            pos = self.positions[pair]
-            
-            # Calculate volume to sell (proportional to grid level)
-            sell_ratio = self.position_size_pct  # Sell same proportion as we buy
-            volume = pos['total_volume'] * sell_ratio
-            
-            # Don't sell more than we have
-            volume = min(volume, pos['total_volume'])
+        txid = result['txid'][0]
+        level.update(txid=txid, volume=volume, status='open')
+        grid['orders'][txid] = level
+        return txid
+        
+    def _cancel_grid_orders(self, grid: Dict):
+        """Cancel every order of a grid still resting in the book"""
+        for txid, level in grid['orders'].items():
+            try:
+                self.api.cancel_order(txid)
+                level['status'] = 'cancelled'
+            except Exception as e:
+                logger.error(f"Error cancelling grid order {txid}: {e}")
+        grid['orders'].clear()
+        
+    def _process_fills(self, pair: str, grid: Dict):
+        """Book the grid orders that filled and rest their counter orders"""
+        if not grid['orders']:
+            return
             
-            if volume <= 0:
-                return None
+        statuses = self.api.query_orders(list(grid['orders']))
+        for txid, level in list(grid['orders'].items()):
+            info = statuses.get(txid)
+            if info is None or info['status'] == 'open':
+                continue
                 
-            # Update position
-            pos['total_volume'] -= volume
-            if level['level'] in pos['grid_levels']:
-                pos['grid_levels'].remove(level['level'])
+            del grid['orders'][txid]
+            if info['status'] != 'closed':
+                level['status'] = 'cancelled'
+                continue
                 
-            # Calculate P&L
-            pnl = (current_price - pos['avg_price']) * volume
-            pnl_pct = (current_price - pos['avg_price']) / pos['avg_price']
-            
-            logger.info(f"🔴 GRID SELL {pair}: ${current_price:.2f} (Level {level['level']}, "
-                       f"Volume: {volume:.6f}, P&L: ${pnl:.2f}, {pnl_pct:.1%})")
+            level['status'] = 'filled'
+            grid['filled_levels'].add(level['level'])
+            price = float(info['price'])
+            volume = float(info['vol_exec'])
             
-            return {
-                'action': 'sell',
-                'pair': pair,
-                'volume': volume,
-                'price': current_price,
-                'reason': f'grid_level_{level["level"]}'
+            if level['side'] == 'buy':
+                self._record_buy(pair, level, price, volume)
+                counter = {'price': level['price'] * (1 + grid['spacing']), 'level': level['level'] + 1,
+                           'side': 'sell', 'status': 'pending'}
+                self._place_grid_order(pair, grid, counter, volume)
+            else:
+                self._record_sell(pair, level, price, volume)
+                counter = {'price': level['price'] * (1 - grid['spacing']), 'level': level['level'] - 1,
+                           'side': 'buy', 'status': 'pending'}
+                self._place_grid_buy(pair, grid, counter)
+                
+    def _record_buy(self, pair: str, level: Dict, price: float, volume: float):
+        """Track a filled grid buy"""
+        if pair not in self.positions:
+            self.positions[pair] = {
+                'total_volume': 0,
+                'avg_price': 0,
+                'grid_levels': []
             }
             
-        except Exception as e:
-            logger.error(f"Error creating grid sell signal: {e}")
-            return None
+        pos = self.positions[pair]
+        new_total_volume = pos['total_volume'] + volume
+        pos['avg_price'] = (pos['avg_price'] * pos['total_volume'] + price * volume) / new_total_volume
+        pos['total_volume'] = new_total_volume
+        pos['grid_levels'].append(level['level'])
+        
+        logger.info(f"🟢 GRID BUY {pair}: ${price:.2f} (Level {level['level']}, "
+                   f"Volume: {volume:.6f})")
+        
+    def _record_sell(self, pair: str, level: Dict, price: float, volume: float):
+        """Track a filled grid sell"""
+        pos = self.positions.get(pair)
+        if pos is None:
+            return
+            
+        pos['total_volume'] = max(pos['total_volume'] - volume, 0)
+        if level['level'] - 1 in pos['grid_levels']:
+            pos['grid_levels'].remove(level['level'] - 1)
             
+        # Calculate P&L
+        pnl = (price - pos['avg_price']) * volume
+        pnl_pct = (price - pos['avg_price']) / pos['avg_price'] if pos['avg_price'] else 0
+        
+        logger.info(f"🔴 GRID SELL {pair}: ${price:.2f} (Level {level['level']}, "
+                   f"Volume: {volume:.6f}, P&L: ${pnl:.2f}, {pnl_pct:.1%})")
+        
     def _calculate_volatility(self, prices: pd.Series) -> float:
         """Calculate price volatility"""
         if len(prices) < 2:
@@ -294,11 +306,10 @@ class GridTradingStrategy:
         pos = self.positions[pair]
         return pos['total_volume'] * pos['avg_price']
         
-    async def _get_account_balance(self) -> float:
+    def _get_account_balance(self) -> float:
         """Get account balance"""
         try:
-            balance = await self.api.get_account_balance()
-            return float(balance.get('ZUSD', 10000))
+            return float(self.api.current_capital)  # Backtesting engine cash
         except:
             return 10000
             
@@ -10,6 +10,13 @@ import numpy as np
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 import logging
+import sys
+from pathlib import Path
+
+# Add parent directory for the backtesting engine
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backtesting_engine import SignalArrays, first_true
 
 logger = logging.getLogger(__name__)
 
@@ -131,7 +138,7 @@ class MeanReversionStrategy:
             
             if oversold_condition:
                 # Calculate position size
-                account_balance = await self._get_account_balance()
+                account_balance = self._get_account_balance()
                 position_value = account_balance * self.position_size_pct
                 volume = position_value / current_price
                 
@@ -206,6 +213,73 @@ class MeanReversionStrategy:
                 
         return None
         
+    def generate_signals(self, pair: str, ohlcv: pd.DataFrame) -> Optional[SignalArrays]:
+        """
+        Precompute entries and exits over the full history (backtest fast path)
+        
+        Uses the same RSI, Bollinger Band and volume rules as analyze(), with
+        every indicator computed once over the whole series.
+        """
+        close_series = ohlcv['close'].astype(float)
+        close = close_series.to_numpy()
+        volume = ohlcv['volume'].to_numpy(dtype=float)
+        n = len(close)
+        
+        entries = np.zeros(n, dtype=bool)
+        exits = np.zeros(n, dtype=bool)
+        min_history = max(self.rsi_period, self.bb_period) + 5
+        if n < min_history:
+            return SignalArrays(entries, exits, self.position_size_pct)
+            
+        rsi = self._calculate_rsi(close_series).to_numpy()
+        bb_upper, bb_middle, bb_lower = self._calculate_bollinger_bands(close_series)
+        bb_middle = bb_middle.to_numpy()
+        bb_lower = bb_lower.to_numpy()
+        avg_volume = ohlcv['volume'].rolling(20, min_periods=1).mean().to_numpy()
+        
+        with np.errstate(invalid='ignore'):
+            oversold = (
+                (rsi < self.oversold_threshold) &
+                (close < bb_lower) &
+                (volume >= avg_volume * self.min_volume_ratio)
+            )
+            indicator_exit = (
+                ((rsi > 50) & (close > bb_middle)) |
+                (rsi > self.overbought_threshold)
+            )
+        oversold[:min_history - 1] = False
+        
+        candidates = np.flatnonzero(oversold)
+        indicator_exits = np.flatnonzero(indicator_exit)
+        next_allowed = 0
+        
+        while True:
+            k = np.searchsorted(candidates, next_allowed)
+            if k == len(candidates):
+                break
+            entry = int(candidates[k])
+            entries[entry] = True
+            
+            stop_loss = close[entry] * (1 - self.stop_loss_pct)
+            take_profit = min(close[entry] * (1 + self.take_profit_pct), bb_middle[entry])
+            start = entry + 1
+            
+            price_exit = first_true(
+                lambda s: (close[s] <= stop_loss) | (close[s] >= take_profit),
+                start, n
+            )
+            r = np.searchsorted(indicator_exits, start)
+            indicator_exit_bar = int(indicator_exits[r]) if r < len(indicator_exits) else None
+            
+            exit_points = [b for b in (price_exit, indicator_exit_bar) if b is not None]
+            if not exit_points:
+                break
+            exit_bar = min(exit_points)
+            exits[exit_bar] = True
+            next_allowed = exit_bar + 1
+            
+        return SignalArrays(entries, exits, self.position_size_pct)
+        
     def _calculate_rsi(self, prices: pd.Series, period: Optional[int] = None) -> pd.Series:
         """Calculate RSI indicator"""
         if period is None:
@@ -243,11 +317,10 @@ class MeanReversionStrategy:
         
         return upper_band, sma, lower_band
         
-    async def _get_account_balance(self) -> float:
+    def _get_account_balance(self) -> float:
         """Get account balance in USD"""
         try:
-            balance = await self.api.get_account_balance()
-            return float(balance.get('ZUSD', 10000))
+            return float(self.api.current_capital)  # Backtesting engine cash
         except:
             return 10000
             
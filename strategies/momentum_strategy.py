@@ -23,6 +23,8 @@ except ImportError:
     MarketRegimeDetector = None
     MarketRegime = None
 
+from backtesting_engine import SignalArrays, first_true
+
 logger = logging.getLogger(__name__)
 
 
@@ -63,7 +65,8 @@ class MomentumStrategy:
         
         # State tracking
         self.positions = {}
-        self.last_trade_time = {}
+        self.bar_index = {}        # Bars seen per pair, minus one
+        self.last_trade_time = {}  # Bar index of each pair's last trade
         self.price_history = {}
         
     def analyze(self, market_data: Dict[str, pd.Series]) -> List[Dict]:
@@ -79,6 +82,7 @@ class MomentumStrategy:
                     self.price_history[pair] = []
                     
                 # Add current price data
+                self.bar_index[pair] = self.bar_index.get(pair, -1) + 1
                 self.price_history[pair].append({
                     'timestamp': current_price_data.name,
                     'open': current_price_data['open'],
@@ -88,6 +92,10 @@ class MomentumStrategy:
                     'volume': current_price_data['volume']
                 })
                 
+                # Advance the pair's streaming regime state on every bar
+                if self.regime_detector is not None:
+                    self.regime_detector.update(current_price_data, key=pair)
+                    
                 # Keep only recent history
                 if len(self.price_history[pair]) > self.lookback_period * 2:
                     self.price_history[pair] = self.price_history[pair][-self.lookback_period * 2:]
@@ -120,9 +128,7 @@ class MomentumStrategy:
         regime_info = None
         if self.regime_detector is not None:
             try:
-                # Prepare data for regime analysis
-                regime_data = df[['open', 'high', 'low', 'close', 'volume']].copy()
-                regime_signal = self.regime_detector.analyze_regime(regime_data)
+                # Latest signal recorded by update() for this bar
                 regime_info = self.regime_detector.get_regime_for_strategy('momentum')
                 
                 # Apply regime-based adjustments
@@ -140,9 +146,11 @@ class MomentumStrategy:
             except Exception as e:
                 logger.warning(f"Regime detection failed for {pair}: {e}")
         
-        # Check cooldown
+        # Check cooldown, counted in bars; the history is capped, so its
+        # length cannot tell how long ago the last trade was
+        current_bar = self.bar_index.get(pair, len(df) - 1)
         if pair in self.last_trade_time:
-            time_since_trade = len(df) - self.last_trade_time[pair]
+            time_since_trade = current_bar - self.last_trade_time[pair]
             if time_since_trade < self.cooldown_periods:
                 return None
                 
@@ -180,7 +188,7 @@ class MomentumStrategy:
             
             if breakout_condition:
                 # Calculate position size
-                account_balance = await self._get_account_balance()
+                account_balance = self._get_account_balance()
                 position_value = account_balance * self.position_size_pct
                 volume = position_value / current_price
                 
@@ -193,7 +201,7 @@ class MomentumStrategy:
                     'take_profit': current_price * (1 + self.take_profit_pct)
                 }
                 
-                self.last_trade_time[pair] = len(df) - 1
+                self.last_trade_time[pair] = current_bar
                 
                 logger.info(f"🟢 MOMENTUM BUY {pair}: ${current_price:.2f} (momentum: {price_change:.1%})")
                 
@@ -229,7 +237,7 @@ class MomentumStrategy:
                 
                 # Remove position
                 del self.positions[pair]
-                self.last_trade_time[pair] = len(df) - 1
+                self.last_trade_time[pair] = current_bar
                 
                 pnl = (current_price - entry_price) * volume
                 pnl_pct = (current_price - entry_price) / entry_price
@@ -247,6 +255,80 @@ class MomentumStrategy:
                 
         return None
         
+    def generate_signals(self, pair: str, ohlcv: pd.DataFrame) -> Optional[SignalArrays]:
+        """
+        Precompute entries and exits over the full history (backtest fast path)
+        
+        Applies the same breakout, stop loss, take profit, momentum reversal
+        and cooldown rules as analyze(), with the cooldown counted in bars.
+        Returns None when regime detection is enabled, since regimes are
+        evaluated bar by bar.
+        """
+        if self.regime_detector is not None:
+            return None
+            
+        close = ohlcv['close'].to_numpy(dtype=float)
+        volume = ohlcv['volume'].to_numpy(dtype=float)
+        n = len(close)
+        lookback = self.lookback_period
+        
+        entries = np.zeros(n, dtype=bool)
+        exits = np.zeros(n, dtype=bool)
+        if n < max(lookback, 1):
+            return SignalArrays(entries, exits, self.position_size_pct)
+            
+        # Rolling indicators, aligned so index t sees the same window as analyze()
+        recent_high = ohlcv['high'].rolling(lookback).max().to_numpy()
+        avg_volume = ohlcv['volume'].rolling(lookback).mean().to_numpy()
+        base_close = np.full(n, np.nan)
+        base_close[lookback - 1:] = close[:n - lookback + 1]
+        price_change = (close - base_close) / base_close
+        
+        with np.errstate(invalid='ignore'):
+            breakout = (
+                (close > recent_high * (1 + self.momentum_threshold / 2)) &
+                (price_change > self.momentum_threshold) &
+                (volume > avg_volume * self.volume_threshold)
+            )
+            
+        # Three consecutive declining closes within the last five bars
+        declining = np.zeros(n, dtype=bool)
+        declining[1:] = close[1:] < close[:-1]
+        reversal = np.zeros(n, dtype=bool)
+        reversal[4:] = declining[1:-3] & declining[2:-2] & declining[3:-1]
+        
+        candidates = np.flatnonzero(breakout)
+        reversals = np.flatnonzero(reversal)
+        cooldown = max(self.cooldown_periods, 1)
+        next_allowed = 0
+        
+        while True:
+            k = np.searchsorted(candidates, next_allowed)
+            if k == len(candidates):
+                break
+            entry = int(candidates[k])
+            entries[entry] = True
+            
+            stop_loss = close[entry] * (1 - self.stop_loss_pct)
+            take_profit = close[entry] * (1 + self.take_profit_pct)
+            start = entry + cooldown
+            
+            price_exit = first_true(
+                lambda s: (close[s] <= stop_loss) | (close[s] >= take_profit),
+                start, n
+            )
+            r = np.searchsorted(reversals, start)
+            reversal_exit = int(reversals[r]) if r < len(reversals) else None
+            
+            exit_points = [b for b in (price_exit, reversal_exit) if b is not None]
+            if not exit_points:
+                break
+            exit_bar = min(exit_points)
+            exits[exit_bar] = True
+            next_allowed = exit_bar + cooldown
+            
+        return SignalArrays(entries, exits, self.position_size_pct)
+        
     def _check_momentum_reversal(self, df: pd.DataFrame) -> bool:
         """Check if momentum is reversing"""
         if len(df) < 5:
@@ -266,11 +348,10 @@ class MomentumStrategy:
         # Consider momentum reversal if 3+ declining periods
         return declining_periods >= 3
         
-    async def _get_account_balance(self) -> float:
+    def _get_account_balance(self) -> float:
         """Get account balance in USD"""
         try:
-            balance = await self.api.get_account_balance()
-            return float(balance.get('ZUSD', 10000))  # Default for backtesting
+            return float(self.api.current_capital)  # Backtesting engine cash
         except:
             return 10000  # Default for backtesting
             
@@ -294,5 +375,6 @@ class MomentumStrategy:
     def reset(self):
         """Reset strategy state"""
         self.positions.clear()
+        self.bar_index.clear()
         self.last_trade_time.clear()
         self.price_history.clear()
\ No newline at end of file
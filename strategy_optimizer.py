@@ -10,18 +10,93 @@ import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 from typing import Dict, List, Tuple, Any, Optional
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, replace
 import json
+import hashlib
 import itertools
+import math
+import os
 import random
+from collections import OrderedDict
+from contextlib import asynccontextmanager
 from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
 import multiprocessing
 
 from backtesting_engine import BacktestingEngine
 from historical_data_manager import HistoricalDataManager
+from shared_market_data import SharedMarketData
 
 logger = logging.getLogger(__name__)
 
+# Fidelity modes for grid and random search
+SEARCH_MODES = ('full', 'halving')
+
+# Kraken-style timeframes as pandas frequencies, for BacktestingEngine sample data
+PANDAS_FREQUENCIES = {'1m': '1min', '5m': '5min', '15m': '15min', '1h': '1h', '4h': '4h', '1d': '1D'}
+
+# Per-process state of optimizer workers, set once by _init_worker
+_worker_data: Optional[SharedMarketData] = None
+_worker_frames: Dict[str, pd.DataFrame] = {}
+_worker_engine: Optional[BacktestingEngine] = None
+_worker_config: Optional['OptimizationConfig'] = None
+
+
+def _init_worker(data_spec: Dict[str, Tuple[str, int]], config: 'OptimizationConfig'):
+    """Attach the shared market data and receive the run's config once per worker"""
+    global _worker_data, _worker_frames, _worker_engine, _worker_config
+    
+    _worker_data = SharedMarketData.attach(data_spec)
+    _worker_frames = _worker_data.frames()
+    _worker_engine = BacktestingEngine(initial_capital=10000)
+    _worker_config = config
+    
+
+def _evaluate_chunk(
+    parameter_sets: List[Dict[str, Any]],
+    window: Optional[Tuple[datetime, datetime]] = None
+) -> List[Optional[Dict]]:
+    """Evaluate a batch of parameter sets in one task, optionally on a sub-window"""
+    config = _worker_config
+    if window is not None:
+        config = replace(config, start_date=window[0], end_date=window[1])
+    return [_evaluate_in_worker(parameters, config) for parameters in parameter_sets]
+    
+
+def _evaluate_in_worker(parameters: Dict[str, Any], config: 'OptimizationConfig') -> Optional[Dict]:
+    """Backtest one parameter set against the pre-attached data"""
+    try:
+        backtest_result = _worker_engine.backtest_strategy(
+            strategy_class=config.strategy_class,
+            pairs=config.pairs,
+            start_date=config.start_date,
+            end_date=config.end_date,
+            market_data=_worker_frames,
+            **parameters
+        )
+        
+        # Extract performance metrics
+        metrics = {
+            'total_return_pct': backtest_result.total_return_pct,
+            'sharpe_ratio': backtest_result.sharpe_ratio,
+            'sortino_ratio': backtest_result.sortino_ratio,
+            'max_drawdown_pct': backtest_result.max_drawdown_pct,
+            'win_rate': backtest_result.win_rate,
+            'profit_factor': backtest_result.profit_factor,
+            'total_trades': backtest_result.total_trades,
+            'volatility': backtest_result.volatility
+        }
+        
+        return {
+            'metrics': metrics,
+            'backtest': backtest_result,
+            'fitness': StrategyOptimizer._calculate_fitness(metrics, config.optimization_metric)
+        }
+        
+    except Exception as e:
+        logger.error(f"Error evaluating parameters {parameters}: {e}")
+        return None
+        
 
 @dataclass
 class ParameterRange:
@@ -59,16 +134,150 @@ class OptimizationConfig:
     elite_percentage: float = 0.2
     mutation_rate: float = 0.1
     crossover_rate: float = 0.7
+    search_mode: str = 'full'  # 'full' or 'halving' (successive halving for grid/random)
+    halving_eta: int = 3  # Keep the top 1/eta of candidates at each rung
+    halving_rungs: int = 3  # Number of rungs; the last one uses the full date range
     
 
+@dataclass
+class WalkForwardFold:
+    """One train/test split of a walk-forward run"""
+    train_start: datetime
+    train_end: datetime
+    test_start: datetime
+    test_end: datetime
+    parameters: Dict[str, Any] = field(default_factory=dict)
+    train_fitness: Optional[float] = None
+    test_metrics: Dict[str, float] = field(default_factory=dict)
+    test_fitness: Optional[float] = None
+    
+
+@dataclass
+class WalkForwardResult:
+    """Out-of-sample results of a walk-forward optimization"""
+    folds: List[WalkForwardFold]
+    oos_equity_curve: pd.Series  # Test-window equity curves chained end to end
+    oos_metrics: Dict[str, float]
+    
+
+class FitnessCache:
+    """
+    Content-addressed store of backtest metrics with LRU eviction
+    
+    Keys hash the strategy class, normalized parameters, pairs, date range,
+    timeframe and a fingerprint of the market data. Only metrics are kept,
+    so fitness is recomputed for whichever metric a run optimizes. The cache
+    lives in memory during a run and is persisted as JSON between runs.
+    """
+    
+    def __init__(self, path: Optional[str] = None, max_entries: int = 100_000):
+        self.path = Path(path) if path else None
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        
+        if self.path and self.path.exists():
+            try:
+                with open(self.path) as f:
+                    self._entries = OrderedDict(json.load(f))
+                logger.info(f"Loaded {len(self._entries)} cached fitness results from {self.path}")
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable fitness cache {self.path}: {e}")
+                
+    def __len__(self) -> int:
+        return len(self._entries)
+        
+    @staticmethod
+    def make_key(
+        parameters: Dict[str, Any],
+        config: 'OptimizationConfig',
+        data_fingerprint: str
+    ) -> str:
+        """Hash everything that determines a backtest's outcome"""
+        strategy = config.strategy_class
+        payload = {
+            'strategy': f"{strategy.__module__}.{strategy.__qualname__}",
+            'parameters': {
+                name: FitnessCache._normalize(value)
+                for name, value in sorted(parameters.items())
+            },
+            'pairs': list(config.pairs),
+            'start_date': config.start_date.isoformat(),
+            'end_date': config.end_date.isoformat(),
+            'timeframe': config.timeframe,
+            'data': data_fingerprint,
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+        
+    @staticmethod
+    def _normalize(value: Any) -> Any:
+        """Canonical form of a parameter value, so near-identical floats collide"""
+        if isinstance(value, (bool, np.bool_)):
+            return bool(value)
+        if isinstance(value, (int, np.integer)):
+            return int(value)
+        if isinstance(value, (float, np.floating)):
+            value = float(f"{float(value):.10g}")
+            return int(value) if value.is_integer() else value
+        return value
+        
+    def get(self, key: str) -> Optional[Dict]:
+        """Look up cached metrics, marking the entry as recently used"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+            
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+        
+    def put(self, key: str, metrics: Dict[str, float]):
+        """Store metrics, evicting the least recently used entries over the cap"""
+        self._entries[key] = {'metrics': {
+            name: int(value) if isinstance(value, (int, np.integer)) else float(value)
+            for name, value in metrics.items()
+        }}
+        self._entries.move_to_end(key)
+        
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            
+    def save(self):
+        """Persist the cache in LRU order"""
+        if not self.path:
+            return
+            
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(list(self._entries.items()), f)
+        os.replace(tmp_path, self.path)
+        
+
 class StrategyOptimizer:
     """
     Advanced strategy parameter optimization using genetic algorithms
     """
     
-    def __init__(self, data_manager: HistoricalDataManager = None):
+    def __init__(
+        self,
+        data_manager: HistoricalDataManager = None,
+        max_workers: Optional[int] = None,  # Defaults to every core
+        chunk_size: Optional[int] = None,  # Parameter sets per task, auto if None
+        evaluation_timeout: float = 300,  # Seconds allowed per parameter set
+        cache_path: Optional[str] = "optimization_cache/fitness_cache.json",  # None keeps it in memory
+        cache_max_entries: int = 100_000
+    ):
         self.data_manager = data_manager
         self.optimization_history = []
+        self.max_workers = max_workers or multiprocessing.cpu_count()
+        self.chunk_size = chunk_size
+        self.evaluation_timeout = evaluation_timeout
+        self.fitness_cache = FitnessCache(cache_path, max_entries=cache_max_entries)
+        self._data_fingerprint: Optional[str] = None
+        self._executor: Optional[ProcessPoolExecutor] = None
         
     async def optimize_parameters(
         self,
@@ -81,15 +290,188 @@ class StrategyOptimizer:
         logger.info(f"🧬 Starting {method} optimization for {config.strategy_class.__name__}")
         logger.info(f"Optimizing {config.optimization_metric} over {len(config.parameter_ranges)} parameters")
         
+        search = self._get_search(method, config)
+        
+        async with self._evaluation_pool(config):
+            return await search(config)
+            
+    async def walk_forward(
+        self,
+        config: OptimizationConfig,
+        method: str = 'grid',
+        n_folds: int = 12,
+        train_ratio: float = 3.0,  # Train window length in test windows
+        anchored: bool = False  # Anchored train windows grow from start_date
+    ) -> WalkForwardResult:
+        """
+        Walk-forward optimization with out-of-sample scoring
+        
+        Splits start_date..end_date into n_folds consecutive test windows, each
+        preceded by its train window (rolling, or anchored at start_date like a
+        time-series k-fold split). Parameters are optimized on every train
+        window concurrently on one worker pool sharing the loaded data, then
+        the winners are backtested on their test windows and the test equity
+        curves are chained into one out-of-sample curve.
+        """
+        if n_folds < 1 or train_ratio <= 0:
+            raise ValueError(f"Invalid walk-forward split: n_folds={n_folds}, train_ratio={train_ratio}")
+            
+        search = self._get_search(method, config)
+        folds = self._walk_forward_folds(config, n_folds, train_ratio, anchored)
+        
+        logger.info(f"🚶 Walk-forward {method} optimization for {config.strategy_class.__name__}: "
+                   f"{n_folds} {'anchored' if anchored else 'rolling'} folds")
+        
+        async with self._evaluation_pool(config):
+            # Optimize every train window at once; the folds share the worker pool
+            fold_results = await asyncio.gather(*(
+                search(replace(config, start_date=fold.train_start, end_date=fold.train_end))
+                for fold in folds
+            ), return_exceptions=True)
+            
+            for i, (fold, results) in enumerate(zip(folds, fold_results)):
+                if isinstance(results, Exception) or not results:
+                    logger.error(f"Fold {i + 1}: optimization failed: {results}")
+                    continue
+                fold.parameters = results[0].parameters
+                fold.train_fitness = results[0].fitness_score
+                
+            # Score the winners out of sample, bypassing the fitness cache for full backtests
+            scored = [fold for fold in folds if fold.train_fitness is not None]
+            test_results = await asyncio.gather(*(
+                self._dispatch_evaluations([fold.parameters], window=(fold.test_start, fold.test_end))
+                for fold in scored
+            ))
+            
+        curves = []
+        for fold, (result,) in zip(scored, test_results):
+            if result is None:
+                continue
+            fold.test_metrics = result['metrics']
+            fold.test_fitness = result['fitness']
+            curves.append(result['backtest'].equity_curve['equity'])
+            
+            logger.info(f"Fold {fold.test_start:%Y-%m-%d}..{fold.test_end:%Y-%m-%d}: "
+                       f"train fitness {fold.train_fitness:.4f}, "
+                       f"test {config.optimization_metric} {fold.test_metrics.get(config.optimization_metric, 0):.4f}")
+            
+        equity, metrics = self._stitch_equity_curves(curves)
+        logger.info(f"Walk-forward completed. Out-of-sample return: {metrics.get('total_return_pct', 0):.2%}")
+        
+        return WalkForwardResult(folds=folds, oos_equity_curve=equity, oos_metrics=metrics)
+        
+    def _walk_forward_folds(
+        self,
+        config: OptimizationConfig,
+        n_folds: int,
+        train_ratio: float,
+        anchored: bool
+    ) -> List[WalkForwardFold]:
+        """Split the date range into consecutive train/test windows"""
+        span = config.end_date - config.start_date
+        test_length = span / (n_folds + train_ratio)
+        train_length = test_length * train_ratio
+        
+        folds = []
+        for k in range(n_folds):
+            test_start = config.start_date + train_length + test_length * k
+            folds.append(WalkForwardFold(
+                train_start=config.start_date if anchored else test_start - train_length,
+                train_end=test_start,
+                test_start=test_start,
+                test_end=test_start + test_length
+            ))
+            
+        return folds
+        
+    def _stitch_equity_curves(self, curves: List[pd.Series]) -> Tuple[pd.Series, Dict[str, float]]:
+        """Chain test-window equity curves, compounding each from the previous end"""
+        if not curves:
+            return pd.Series(dtype=float, name='equity'), {}
+            
+        engine = BacktestingEngine(initial_capital=10000)
+        capital = engine.initial_capital
+        
+        scaled = []
+        for curve in curves:
+            scaled.append(curve * (capital / engine.initial_capital))
+            capital = scaled[-1].iloc[-1]
+            
+        equity = pd.concat(scaled)
+        # Adjacent windows share their boundary bar
+        equity = equity[~equity.index.duplicated(keep='first')].rename('equity')
+        
+        daily_returns = equity.pct_change().resample('D').sum()
+        metrics = {
+            'total_return_pct': equity.iloc[-1] / engine.initial_capital - 1,
+            'sharpe_ratio': engine._calculate_sharpe_ratio(daily_returns),
+            'sortino_ratio': engine._calculate_sortino_ratio(daily_returns),
+            'max_drawdown_pct': engine._calculate_max_drawdown(equity)[1],
+            'volatility': daily_returns.std() * np.sqrt(252)
+        }
+        return equity, metrics
+        
+    def _get_search(self, method: str, config: OptimizationConfig):
+        """Resolve a search method name, validating the config's search mode"""
         if method == 'genetic':
-            return await self._genetic_optimization(config)
+            search = self._genetic_optimization
         elif method == 'grid':
-            return await self._grid_search_optimization(config)
+            search = self._grid_search_optimization
         elif method == 'random':
-            return await self._random_search_optimization(config)
+            search = self._random_search_optimization
         else:
             raise ValueError(f"Unknown optimization method: {method}")
             
+        if config.search_mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode: {config.search_mode}")
+            
+        return search
+        
+    @asynccontextmanager
+    async def _evaluation_pool(self, config: OptimizationConfig):
+        """Load the data once and run a worker pool attached to it"""
+        # Workers attach to the shared dataset and get the config a single time
+        market_data = SharedMarketData.create(await self._load_market_data(config))
+        self._data_fingerprint = market_data.fingerprint()
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            initializer=_init_worker,
+            initargs=(market_data.spec(), config)
+        )
+        logger.info(f"Evaluation pool started with {self.max_workers} workers")
+        
+        hits, misses = self.fitness_cache.hits, self.fitness_cache.misses
+        try:
+            yield
+        finally:
+            # Joining the workers blocks, so keep it off the event loop
+            executor, self._executor = self._executor, None
+            await asyncio.get_running_loop().run_in_executor(None, executor.shutdown)
+            market_data.close()
+            market_data.unlink()
+            
+            logger.info(f"Fitness cache: {self.fitness_cache.hits - hits} hits, "
+                       f"{self.fitness_cache.misses - misses} misses, {len(self.fitness_cache)} entries")
+            self.fitness_cache.save()
+            
+    async def _load_market_data(self, config: OptimizationConfig) -> Dict[str, pd.DataFrame]:
+        """Load OHLCV data for every pair of the optimization window"""
+        data = {}
+        
+        for pair in config.pairs:
+            if self.data_manager is not None:
+                data[pair] = await self.data_manager.get_historical_data(
+                    pair, config.timeframe, config.start_date, config.end_date
+                )
+            else:
+                if config.timeframe not in PANDAS_FREQUENCIES:
+                    raise ValueError(f"Unsupported timeframe: {config.timeframe}")
+                data[pair] = BacktestingEngine().load_historical_data(
+                    pair, config.start_date, config.end_date, PANDAS_FREQUENCIES[config.timeframe]
+                )
+                
+        return data
+        
     async def _genetic_optimization(self, config: OptimizationConfig) -> List[OptimizationResult]:
         """Genetic algorithm optimization"""
         
@@ -157,15 +539,17 @@ class StrategyOptimizer:
         # Generate all parameter combinations
         param_combinations = self._generate_grid_combinations(config.parameter_ranges)
         
-        if len(param_combinations) > 1000:
+        # Successive halving affords more candidates for the same backtest budget
+        max_combinations = int(1000 / self._search_cost(config))
+        if len(param_combinations) > max_combinations:
             logger.warning(f"Grid search has {len(param_combinations)} combinations. This may take a while.")
             # Sample randomly if too many combinations
-            param_combinations = random.sample(param_combinations, 1000)
+            param_combinations = random.sample(param_combinations, max_combinations)
             
         logger.info(f"Testing {len(param_combinations)} parameter combinations")
         
         # Evaluate all combinations
-        fitness_scores = await self._evaluate_population(param_combinations, config)
+        param_combinations, fitness_scores = await self._evaluate_candidates(param_combinations, config)
         
         # Create results
         results = []
@@ -192,16 +576,16 @@ class StrategyOptimizer:
     async def _random_search_optimization(self, config: OptimizationConfig) -> List[OptimizationResult]:
         """Random search optimization"""
         
-        # Generate random parameter combinations
+        # Generate random parameter combinations (more of them under successive halving)
         population = []
-        for _ in range(config.max_iterations):
+        for _ in range(int(config.max_iterations / self._search_cost(config))):
             params = self._generate_random_parameters(config.parameter_ranges)
             population.append(params)
             
         logger.info(f"Testing {len(population)} random parameter combinations")
         
         # Evaluate population
-        fitness_scores = await self._evaluate_population(population, config)
+        population, fitness_scores = await self._evaluate_candidates(population, config)
         
         # Create results
         results = []
@@ -225,6 +609,67 @@ class StrategyOptimizer:
         
         return results[:15]  # Return top 15
         
+    def _search_cost(self, config: OptimizationConfig) -> float:
+        """Backtest cost per candidate relative to one full-range evaluation"""
+        if config.search_mode != 'halving':
+            return 1.0
+            
+        # Each rung keeps 1/eta of the candidates on an eta times longer window
+        eta = max(2, config.halving_eta)
+        rungs = max(1, config.halving_rungs)
+        return rungs / eta ** (rungs - 1)
+        
+    async def _evaluate_candidates(
+        self,
+        candidates: List[Dict[str, Any]],
+        config: OptimizationConfig
+    ) -> Tuple[List[Dict[str, Any]], List[Optional[Dict]]]:
+        """Evaluate candidates at the configured fidelity, returning (candidates, scores)"""
+        if config.search_mode == 'halving':
+            return await self._successive_halving(candidates, config)
+            
+        return candidates, await self._evaluate_population(candidates, config)
+        
+    async def _successive_halving(
+        self,
+        candidates: List[Dict[str, Any]],
+        config: OptimizationConfig
+    ) -> Tuple[List[Dict[str, Any]], List[Optional[Dict]]]:
+        """
+        Multi-fidelity evaluation (successive halving)
+        
+        Every candidate is first backtested on a short prefix of the date
+        range; only the top 1/eta advance to a window eta times longer, until
+        the survivors of the last rung are scored on the full range. Returns
+        the final rung's candidates and scores, comparable with a full search.
+        """
+        eta = max(2, config.halving_eta)
+        rungs = max(1, config.halving_rungs)
+        span = config.end_date - config.start_date
+        scores: List[Optional[Dict]] = []
+        
+        for rung in range(rungs):
+            fraction = eta ** -(rungs - 1 - rung)
+            rung_config = replace(config, end_date=config.start_date + span * fraction)
+            
+            logger.info(f"Halving rung {rung + 1}/{rungs}: {len(candidates)} candidates "
+                       f"on {fraction:.1%} of the date range")
+            scores = await self._evaluate_population(candidates, rung_config)
+            
+            if rung == rungs - 1:
+                break
+                
+            # Promote the best 1/eta (failed evaluations rank last)
+            order = sorted(
+                range(len(candidates)),
+                key=lambda i: scores[i]['fitness'] if scores[i] is not None else float('-inf'),
+                reverse=True
+            )
+            keep = order[:max(1, math.ceil(len(candidates) / eta))]
+            candidates = [candidates[i] for i in keep]
+            
+        return candidates, scores
+        
     def _generate_initial_population(self, config: OptimizationConfig) -> List[Dict[str, Any]]:
         """Generate initial population for genetic algorithm"""
         population = []
@@ -295,112 +740,99 @@ class StrategyOptimizer:
         population: List[Dict[str, Any]], 
         config: OptimizationConfig
     ) -> List[Optional[Dict]]:
-        """Evaluate fitness of entire population"""
+        """
+        Evaluate fitness of entire population
         
-        # Use multiprocessing for parallel evaluation
-        with ProcessPoolExecutor(max_workers=min(4, multiprocessing.cpu_count())) as executor:
-            tasks = []
-            
-            for params in population:
-                task = executor.submit(
-                    self._evaluate_single_parameters_sync,
-                    params,
-                    config
-                )
-                tasks.append(task)
+        Parameter sets already in the fitness cache, or repeated within the
+        population, are not backtested again. Cached results carry metrics
+        and fitness but no backtest.
+        """
+        results: List[Optional[Dict]] = [None] * len(population)
+        pending: Dict[str, List[int]] = {}
+        
+        for i, params in enumerate(population):
+            key = FitnessCache.make_key(params, config, self._data_fingerprint)
+            if key in pending:
+                pending[key].append(i)
+                continue
+                
+            cached = self.fitness_cache.get(key)
+            if cached is not None:
+                results[i] = {
+                    'metrics': cached['metrics'],
+                    'backtest': None,
+                    'fitness': self._calculate_fitness(cached['metrics'], config.optimization_metric)
+                }
+            else:
+                pending[key] = [i]
+                
+        logger.info(f"Fitness cache: {len(population) - len(pending)}/{len(population)} "
+                   f"parameter sets reused, {len(pending)} to backtest")
+        
+        evaluated = await self._dispatch_evaluations(
+            [population[indices[0]] for indices in pending.values()],
+            window=(config.start_date, config.end_date)
+        )
+        
+        for (key, indices), result in zip(pending.items(), evaluated):
+            if result is not None:
+                self.fitness_cache.put(key, result['metrics'])
+            for i in indices:
+                results[i] = result
                 
-            # Collect results
-            results = []
-            for i, task in enumerate(tasks):
-                try:
-                    result = task.result(timeout=300)  # 5 minute timeout per evaluation
-                    results.append(result)
-                    
-                    if (i + 1) % 10 == 0:
-                        logger.info(f"Evaluated {i + 1}/{len(population)} parameter sets")
-                        
-                except Exception as e:
-                    logger.error(f"Error evaluating parameters {i}: {e}")
-                    results.append(None)
-                    
         return results
         
-    def _evaluate_single_parameters_sync(
-        self, 
-        parameters: Dict[str, Any], 
-        config: OptimizationConfig
-    ) -> Optional[Dict]:
-        """Synchronous version for multiprocessing"""
-        
-        try:
-            # Run backtest in new event loop
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
+    async def _dispatch_evaluations(
+        self,
+        population: List[Dict[str, Any]],
+        window: Optional[Tuple[datetime, datetime]] = None
+    ) -> List[Optional[Dict]]:
+        """Backtest parameter sets on the worker pool, in input order"""
+        results: List[Optional[Dict]] = [None] * len(population)
+        if not population:
+            return results
             
+        # Small chunks keep every worker busy while amortizing task overhead
+        chunk_size = self.chunk_size or max(1, math.ceil(len(population) / (self.max_workers * 4)))
+        loop = asyncio.get_running_loop()
+        
+        async def run_chunk(start: int, chunk: List[Dict[str, Any]]) -> Tuple[int, List[Optional[Dict]]]:
             try:
-                result = loop.run_until_complete(
-                    self._evaluate_single_parameters(parameters, config)
-                )
-                return result
-            finally:
-                loop.close()
+                future = self._executor.submit(_evaluate_chunk, chunk, window)
+                return start, await asyncio.wrap_future(future, loop=loop)
+            except Exception as e:
+                logger.error(f"Error evaluating parameter sets {start}-{start + len(chunk) - 1}: {e}")
+                return start, [None] * len(chunk)
                 
-        except Exception as e:
-            logger.error(f"Error in sync evaluation: {e}")
-            return None
-            
-    async def _evaluate_single_parameters(
-        self, 
-        parameters: Dict[str, Any], 
-        config: OptimizationConfig
-    ) -> Optional[Dict]:
-        """Evaluate single parameter set"""
-        
+        # Worst case wall time if every evaluation ran into its timeout
+        rounds = math.ceil(len(population) / self.max_workers)
+        pending = [
+            asyncio.ensure_future(run_chunk(start, population[start:start + chunk_size]))
+            for start in range(0, len(population), chunk_size)
+        ]
+        
+        # Collect results as they complete
+        evaluated = 0
         try:
-            # Create backtesting engine
-            engine = BacktestingEngine(
-                initial_capital=10000,
-                data_manager=self.data_manager,
-                use_real_data=True
-            )
-            
-            # Run backtest
-            backtest_result = await engine.backtest_strategy(
-                strategy_class=config.strategy_class,
-                pairs=config.pairs,
-                start_date=config.start_date,
-                end_date=config.end_date,
-                **parameters
-            )
-            
-            # Extract performance metrics
-            metrics = {
-                'total_return_pct': backtest_result.total_return_pct,
-                'sharpe_ratio': backtest_result.sharpe_ratio,
-                'sortino_ratio': backtest_result.sortino_ratio,
-                'max_drawdown_pct': backtest_result.max_drawdown_pct,
-                'win_rate': backtest_result.win_rate,
-                'profit_factor': backtest_result.profit_factor,
-                'total_trades': backtest_result.total_trades,
-                'volatility': backtest_result.volatility
-            }
-            
-            # Calculate fitness score
-            fitness_score = self._calculate_fitness(metrics, config.optimization_metric)
-            
-            await engine.close()
-            
-            return {
-                'metrics': metrics,
-                'backtest': backtest_result,
-                'fitness': fitness_score
-            }
-            
-        except Exception as e:
-            logger.error(f"Error evaluating parameters {parameters}: {e}")
-            return None
+            for next_done in asyncio.as_completed(pending, timeout=self.evaluation_timeout * rounds):
+                start, chunk_results = await next_done
+                results[start:start + len(chunk_results)] = chunk_results
+                
+                previous, evaluated = evaluated, evaluated + len(chunk_results)
+                if evaluated // 10 > previous // 10:
+                    logger.info(f"Evaluated {evaluated}/{len(population)} parameter sets")
+                    
+        except asyncio.TimeoutError:
+            logger.error(f"Evaluation timed out with {len(population) - evaluated} parameter sets pending")
+            # Cancelling a chunk also cancels its pool task if no worker has picked it up yet
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
             
-    def _calculate_fitness(self, metrics: Dict[str, float], optimization_metric: str) -> float:
+        return results
+        
+    @staticmethod
+    def _calculate_fitness(metrics: Dict[str, float], optimization_metric: str) -> float:
         """Calculate fitness score for parameter set"""
         
         # Primary metric
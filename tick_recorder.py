@@ -0,0 +1,284 @@
+"""
+Tick Recorder
+
+Captures raw WebSocket frames with their receive timestamps into compact,
+gzip-compressed, append-only logs rotated by size or age, and replays them
+into a handler at the recorded pace, accelerated, or as fast as it can
+process them, reporting throughput and latency percentiles. A recording
+stands in for the live exchange when reproducing or load-testing handler
+changes.
+
+Each log line is ``<receive time, epoch ns> <frame>``.
+"""
+
+import asyncio
+import glob
+import gzip
+import logging
+import os
+import threading
+import time
+from array import array
+from collections import deque
+from dataclasses import dataclass
+from itertools import islice
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+RECORDING_SUFFIX = '.frames.gz'
+
+# Shortest gap between paced frames worth sleeping for, in seconds
+MIN_SLEEP = 0.001
+
+
+class TickRecorder:
+    """
+    Append-only, rotating frame log
+    
+    ``record`` only appends the line to a queue; a writer thread compresses
+    and writes it in batches (zlib releases the GIL), so recording costs the
+    receive loop about a microsecond per frame. The writer drains the queue
+    on its own timer every ``flush_interval`` seconds, or as soon as
+    ``batch_size`` frames are waiting, and writes each batch with a sync
+    flush, so a crash loses at most that much, even when the stream goes
+    quiet, and files stay readable.
+    A new file is started once the current one exceeds ``max_bytes`` of
+    compressed output or has been open for ``max_seconds``.
+    """
+    
+    def __init__(
+        self,
+        directory: str,
+        prefix: str = 'kraken',
+        max_bytes: int = 64 * 1024 * 1024,
+        max_seconds: float = 3600.0,
+        flush_interval: float = 1.0,
+        batch_size: int = 1000,
+        compresslevel: int = 1
+    ):
+        if max_bytes <= 0:
+            raise ValueError(f"max_bytes must be positive, got {max_bytes}")
+        if max_seconds <= 0:
+            raise ValueError(f"max_seconds must be positive, got {max_seconds}")
+            
+        self.directory = directory
+        self.prefix = prefix
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.compresslevel = compresslevel
+        
+        self.files: List[str] = []
+        self.frames = 0
+        # deque appends and pops are atomic, so the writer drains it unlocked
+        self._pending: deque = deque()
+        self._wake = threading.Event()
+        self._stopping = False
+        self._writer: Optional[threading.Thread] = None
+        
+        os.makedirs(directory, exist_ok=True)
+        
+    def record(self, frame, received_ns: Optional[int] = None):
+        """Append one frame, stamped with its receive time (now by default)"""
+        if received_ns is None:
+            received_ns = time.time_ns()
+        if isinstance(frame, (bytes, bytearray)):
+            frame = frame.decode('utf-8')
+            
+        # Raw newlines can only appear between JSON tokens, never inside strings
+        frame = frame.replace('\n', ' ')
+        pending = self._pending
+        pending.append(f"{received_ns} {frame}\n")
+        self.frames += 1
+        
+        if self._writer is None:
+            self._start_writer()
+        if len(pending) >= self.batch_size:
+            self._wake.set()
+            
+    def _start_writer(self):
+        self._stopping = False
+        self._writer = threading.Thread(target=self._write_batches, name='tick-recorder', daemon=True)
+        self._writer.start()
+        
+    def flush(self):
+        """Hand the frames recorded so far to the writer thread"""
+        if self._pending and self._writer is not None:
+            self._wake.set()
+            
+    def close(self):
+        """Write everything recorded and finish the current file"""
+        if self._writer is not None:
+            self._stopping = True
+            self._wake.set()
+            self._writer.join()
+            self._writer = None
+            
+    def _open(self) -> Tuple[BinaryIO, gzip.GzipFile]:
+        now = time.time()
+        name = f"{self.prefix}-{time.strftime('%Y%m%d-%H%M%S', time.gmtime(now))}-{len(self.files):04d}"
+        path = os.path.join(self.directory, name + RECORDING_SUFFIX)
+        
+        raw = open(path, 'ab')
+        self.files.append(path)
+        logger.info(f"Recording WebSocket frames to {path}")
+        return raw, gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=self.compresslevel)
+        
+    def _write_batches(self):
+        """Writer thread: compress batches into the current file, rotating it"""
+        raw = file = None
+        opened_at = 0.0
+        pending = self._pending
+        
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            # Read before draining, so every frame recorded before close() is written
+            stopping = self._stopping
+            
+            batch = [pending.popleft() for _ in range(len(pending))]
+            if not batch:
+                if stopping:
+                    break
+                continue
+                
+            try:
+                if file is None:
+                    raw, file = self._open()
+                    opened_at = time.time()
+                    
+                file.write(''.join(batch).encode('utf-8'))
+                file.flush()
+                
+                if raw.tell() >= self.max_bytes or time.time() - opened_at >= self.max_seconds:
+                    file.close()
+                    raw.close()
+                    raw = file = None
+            except Exception as e:
+                logger.error(f"Error writing {len(batch)} recorded frames: {e}")
+                
+            if stopping:
+                break
+                
+        if file is not None:
+            file.close()
+            raw.close()
+            
+
+def recording_files(path: str) -> List[str]:
+    """A recording file, or every recording in a directory in time order"""
+    if os.path.isdir(path):
+        return sorted(glob.glob(os.path.join(path, '*' + RECORDING_SUFFIX)))
+    return [path]
+    
+
+def read_frames(path: str) -> Iterator[Tuple[int, str]]:
+    """(receive time ns, frame) pairs from a recording file or directory"""
+    for file_path in recording_files(path):
+        try:
+            with gzip.open(file_path, 'rt', encoding='utf-8') as f:
+                for line in f:
+                    received_ns, _, frame = line.rstrip('\n').partition(' ')
+                    if frame:
+                        yield int(received_ns), frame
+        except EOFError:
+            # A recorder that died mid-file leaves it without a trailer
+            logger.warning(f"{file_path} is truncated, replayed up to its last flush")
+            
+
+@dataclass
+class ReplayReport:
+    """Outcome of one replay; latencies are per frame in microseconds"""
+    messages: int
+    elapsed: float
+    latencies_us: np.ndarray
+    errors: int = 0
+    
+    @property
+    def throughput(self) -> float:
+        return self.messages / self.elapsed if self.elapsed > 0 else 0.0
+        
+    def percentiles(self, q: Tuple[float, ...] = (50, 90, 99, 99.9)) -> Dict[float, float]:
+        if not self.messages:
+            return {p: 0.0 for p in q}
+        return dict(zip(q, np.percentile(self.latencies_us, q).tolist()))
+        
+    def histogram(self) -> List[Tuple[float, int]]:
+        """Frame counts per power-of-two latency bucket, as (upper bound µs, count)"""
+        if not self.messages:
+            return []
+        top = max(1, int(np.ceil(np.log2(max(self.latencies_us.max(), 1.0)))))
+        edges = np.concatenate(([0.0], 2.0 ** np.arange(0, top + 1)))
+        counts, _ = np.histogram(self.latencies_us, bins=edges)
+        return [(float(edge), int(count)) for edge, count in zip(edges[1:], counts) if count]
+        
+    def summary(self) -> str:
+        pct = '  '.join(f"p{p:g} {v:.1f}µs" for p, v in self.percentiles().items())
+        return f"{self.messages:,} frames in {self.elapsed:.2f}s ({self.throughput:,.0f}/s), {pct}, {self.errors} errors"
+        
+
+class TickReplayer:
+    """
+    Feeds recorded frames to a handler's ``_handle_message``
+    
+    ``speed`` 1.0 replays at the recorded pace, 10.0 ten times faster and
+    0 as fast as the handler keeps up. When paced, a frame's latency runs
+    from when it is due to when the handler has processed it, so it grows
+    if the handler falls behind; at full speed it is the processing time.
+    Pacing is accurate to about a millisecond. Frames are streamed, so a
+    ``read_frames`` iterator replays a recording of any size in constant
+    memory apart from the latencies, and is consumed by one run.
+    KrakenWebSocketHandlerV2 routes V2 frames to ``_handle_v2_message``
+    itself, so both APIs replay the same way.
+    """
+    
+    def __init__(self, frames: Iterable[Tuple[int, str]], speed: float = 0.0):
+        if speed < 0:
+            raise ValueError(f"speed must be 0 (unpaced) or positive, got {speed}")
+            
+        self.frames = frames
+        self.speed = speed
+        
+    async def run(self, handler, limit: Optional[int] = None) -> ReplayReport:
+        frames = self.frames if limit is None else islice(self.frames, limit)
+        
+        latencies = array('d')
+        record_latency = latencies.append
+        errors_before = getattr(handler, '_error_count', 0)
+        perf_counter = time.perf_counter_ns
+        handle = handler._handle_message
+        speed = self.speed
+        
+        start = perf_counter()
+        first_ns = None
+        
+        for received_ns, frame in frames:
+            if first_ns is None:
+                first_ns = received_ns
+            now = perf_counter()
+            if speed:
+                due = start + (received_ns - first_ns) / speed
+                # Event loop timers are only about 1ms accurate, so shorter
+                # gaps are not slept and their frames handled a little early
+                delay = (due - now) / 1e9
+                if delay > MIN_SLEEP:
+                    await asyncio.sleep(delay)
+                    now = perf_counter()
+                due = max(due, now)
+            else:
+                due = now
+                
+            await handle(frame)
+            record_latency((perf_counter() - due) / 1000)
+            
+        elapsed = (perf_counter() - start) / 1e9
+        return ReplayReport(
+            messages=len(latencies),
+            elapsed=elapsed,
+            latencies_us=np.frombuffer(latencies, dtype=np.float64),
+            errors=getattr(handler, '_error_count', 0) - errors_before
+        )
@@ -0,0 +1,219 @@
+"""
+Trade Tape
+
+Fixed-capacity store of the latest trades for one pair, fed by the WebSocket
+trade channel. Appends are O(1) and allocation free, and rolling aggregates
+(VWAP, buy/sell volume imbalance, trade rate) over any number of time
+windows are kept up to date incrementally, so reading them never re-scans
+the tape.
+"""
+
+import logging
+from array import array
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Column name -> array typecode; time is exchange epoch seconds, side is
+# +1 buy / -1 sell, market is 1 for market orders and 0 for limit orders
+COLUMNS = {
+    'price': 'd',
+    'volume': 'd',
+    'time': 'd',
+    'side': 'b',
+    'market': 'B',
+}
+
+# Running totals of every trade before each row, used for window aggregates
+TOTAL_COLUMNS = ('volume_before', 'notional_before', 'buy_volume_before')
+
+
+class TradeWindow:
+    """
+    The trades of the last ``seconds``, as the sequence number of the oldest
+    
+    The window ends at the latest trade, or at ``now`` when the caller
+    expires it explicitly. It can never hold more trades than the tape keeps.
+    """
+    
+    __slots__ = ('seconds', 'tail')
+    
+    def __init__(self, seconds: float, tail: int = 0):
+        if seconds <= 0:
+            raise ValueError(f"window must be positive, got {seconds}")
+            
+        self.seconds = float(seconds)
+        self.tail = tail
+        
+
+class TradeTape:
+    """
+    Circular trade buffer for one pair with incremental window aggregates
+    
+    Like OHLCRingBuffer, every row is written at slot i and i + capacity so
+    the latest trades are always one contiguous, zero-copy slice. Columns
+    are stdlib arrays rather than NumPy arrays because per-element writes
+    from Python are several times cheaper; ``view`` still exposes them as
+    NumPy arrays without copying.
+    
+    Each row also records the tape's running volume, notional and buy volume
+    before it, so a window's sums are the current totals minus those of its
+    oldest trade and moving a window is just advancing that trade.
+    """
+    
+    def __init__(self, capacity: int = 1000, windows: Iterable[float] = (60.0, 300.0)):
+        if capacity <= 0:
+            raise ValueError(f"capacity must be positive, got {capacity}")
+            
+        self.capacity = capacity
+        self.columns = {
+            name: array(typecode, bytes(2 * capacity * array(typecode).itemsize))
+            for name, typecode in COLUMNS.items()
+        }
+        self.totals = {name: array('d', bytes(capacity * 8)) for name in TOTAL_COLUMNS}
+        # Hot-path aliases
+        self._price = self.columns['price']
+        self._volume = self.columns['volume']
+        self._time = self.columns['time']
+        self._side = self.columns['side']
+        self._market = self.columns['market']
+        self._volume_before = self.totals['volume_before']
+        self._notional_before = self.totals['notional_before']
+        self._buy_volume_before = self.totals['buy_volume_before']
+        self.total = 0  # Trades ever appended; the next sequence number
+        self.volume = 0.0
+        self.notional = 0.0
+        self.buy_volume = 0.0
+        self.windows: Dict[float, TradeWindow] = {}
+        
+        for seconds in windows:
+            self.add_window(seconds)
+            
+    def __len__(self) -> int:
+        return min(self.total, self.capacity)
+        
+    def add_window(self, seconds: float) -> TradeWindow:
+        """Track another window over the trades already buffered"""
+        seconds = float(seconds)
+        if seconds not in self.windows:
+            window = self.windows[seconds] = TradeWindow(seconds, self.total - len(self))
+            if self.total:
+                self._expire(window, self.latest_time)
+        return self.windows[seconds]
+        
+    def append(self, price: float, volume: float, time_: float, side: int, market: bool = False):
+        """Add one trade; trades are expected in exchange time order"""
+        seq = self.total
+        capacity = self.capacity
+        slot = seq % capacity
+        mirror = slot + capacity
+        market = 1 if market else 0
+        
+        self._price[slot] = self._price[mirror] = price
+        self._volume[slot] = self._volume[mirror] = volume
+        times = self._time
+        times[slot] = times[mirror] = time_
+        self._side[slot] = self._side[mirror] = side
+        self._market[slot] = self._market[mirror] = market
+        
+        self._volume_before[slot] = self.volume
+        self._notional_before[slot] = self.notional
+        self._buy_volume_before[slot] = self.buy_volume
+        self.volume += volume
+        self.notional += price * volume
+        if side > 0:
+            self.buy_volume += volume
+        self.total = seq + 1
+        
+        # Windows still holding the overwritten trade lose it first
+        oldest = seq + 1 - capacity
+        for window in self.windows.values():
+            tail = window.tail if window.tail > oldest else oldest
+            cutoff = time_ - window.seconds
+            while tail < seq and times[tail % capacity] <= cutoff:
+                tail += 1
+            window.tail = tail
+            
+    def _expire(self, window: TradeWindow, now: float):
+        """Drop trades at or before now - window.seconds"""
+        cutoff = now - window.seconds
+        times = self.columns['time']
+        while window.tail < self.total and times[window.tail % self.capacity] <= cutoff:
+            window.tail += 1
+            
+    def expire(self, now: float):
+        """Advance every window to ``now`` (exchange epoch seconds)"""
+        for window in self.windows.values():
+            self._expire(window, now)
+            
+    @property
+    def latest_time(self) -> Optional[float]:
+        if not self.total:
+            return None
+        return self.columns['time'][(self.total - 1) % self.capacity]
+        
+    def stats(self, seconds: float = 60.0, now: Optional[float] = None) -> Dict:
+        """
+        Rolling aggregates for one tracked window
+        
+        With ``now`` the window is first expired to that time; otherwise it
+        ends at the latest trade.
+        """
+        window = self.windows.get(float(seconds))
+        if window is None:
+            raise ValueError(f"Window {seconds}s is not tracked, call add_window first")
+            
+        if now is not None:
+            self._expire(window, now)
+            
+        count = self.total - window.tail
+        if count:
+            slot = window.tail % self.capacity
+            volume = self.volume - self.totals['volume_before'][slot]
+            notional = self.notional - self.totals['notional_before'][slot]
+            buy_volume = self.buy_volume - self.totals['buy_volume_before'][slot]
+        else:
+            volume = notional = buy_volume = 0.0
+        sell_volume = volume - buy_volume
+        
+        return {
+            'window': window.seconds,
+            'trades': count,
+            'volume': volume,
+            'vwap': notional / volume if volume > 0 else None,
+            'buy_volume': buy_volume,
+            'sell_volume': sell_volume,
+            'imbalance': (buy_volume - sell_volume) / volume if volume > 0 else 0.0,
+            'trade_rate': count / window.seconds,
+        }
+        
+    def view(self, lookback: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Zero-copy, read-only views of the latest ``lookback`` trades, oldest first"""
+        count = len(self) if lookback is None else max(0, min(lookback, len(self)))
+        end = self.total % self.capacity + self.capacity
+        
+        views = {}
+        for name, column in self.columns.items():
+            view = np.frombuffer(column, dtype=column.typecode)[end - count:end]
+            view.flags.writeable = False
+            views[name] = view
+        return views
+        
+    def to_dicts(self, lookback: Optional[int] = None) -> List[Dict]:
+        """Latest trades as dicts in the shape the handler used to store"""
+        views = self.view(lookback)
+        return [
+            {
+                "price": price,
+                "volume": volume,
+                "time": time_,
+                "side": "buy" if side > 0 else "sell",
+                "market": "m" if market else "l",
+            }
+            for price, volume, time_, side, market in zip(
+                views['price'].tolist(), views['volume'].tolist(), views['time'].tolist(),
+                views['side'].tolist(), views['market'].tolist()
+            )
+        ]
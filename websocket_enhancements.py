@@ -6,11 +6,16 @@ Integrates with the existing EnhancedWebSocketHandler
 
 import asyncio
 import logging
+import multiprocessing
+import time
 from typing import Optional, Dict, List, Callable
 from datetime import datetime
 from threading import Thread, Lock
 
-from websocket_handler import EnhancedWebSocketHandler
+import pandas as pd
+
+from shared_market_state import SharedMarketState
+from websocket_handler import EnhancedWebSocketHandler, WS_ASSET_NAMES, json_loads
 from kraken_utils import (
     KrakenDataManager, 
     KrakenPairConverter, 
@@ -49,43 +54,63 @@ class KrakenWebSocketHandlerV2(EnhancedWebSocketHandler):
         """
         Subscribe to multiple OHLC intervals for multiple pairs
         Feature from my_kraken_bot
+        
+        Sends one message per interval and shard instead of one per pair.
+        Each interval is recorded on the shards as "ohlc-<interval>", so it
+        is resubscribed after a reconnect like any other channel.
         """
-        for pair in pairs:
-            for interval in intervals:
-                msg = KrakenWebSocketEnhancer.create_subscription_message(
-                    'ohlc', [pair], interval=interval, snapshot=True
-                )
-                
-                if self.api_version == 'v2':
-                    msg['method'] = 'subscribe'
-                    msg['params'] = {
-                        'channel': 'ohlc',
-                        'symbol': [pair],
-                        'interval': interval,
-                        'snapshot': True
-                    }
-                    del msg['event']
-                    del msg['pair']
-                    del msg['subscription']
-                
-                await self.ensure_connection()
-                if self.connected:
-                    await self.websocket.send(json.dumps(msg))
+        await self.ensure_connection()
+        
+        for interval in intervals:
+            channel = f"ohlc-{interval}"
+            for shard, shard_pairs in self._partition(pairs).items():
+                if not await shard.subscribe(channel, shard_pairs):
+                    self.logger.warning(f"[{shard.name}] Subscribed to {channel} {shard_pairs} while disconnected")
                     
-                    # Track subscription
+                # Track subscription
+                for pair in shard_pairs:
                     if pair not in self.ohlc_subscriptions:
                         self.ohlc_subscriptions[pair] = []
                     if interval not in self.ohlc_subscriptions[pair]:
                         self.ohlc_subscriptions[pair].append(interval)
                 
                 await asyncio.sleep(0.1)  # Rate limiting
+                
+    def ws_pair(self, pair: str) -> str:
+        """Pair as this handler's API names it; V2 uses BTC/USD where V1 has XBT/USD"""
+        if self.api_version != 'v2':
+            return super().ws_pair(pair)
+            
+        v2_names = {v1: v2 for v2, v1 in WS_ASSET_NAMES.items()}
+        base, sep, quote = pair.partition('/')
+        if not sep:
+            return pair
+        return f"{v2_names.get(base, base)}/{v2_names.get(quote, quote)}"
+        
+    def _subscription_message(self, event: str, channel: str, pairs: List[str]) -> Dict:
+        """
+        V2 subscribe/unsubscribe message when on the V2 API, so shard
+        resubscriptions use the same format as the original requests
+        """
+        if self.api_version != 'v2':
+            return super()._subscription_message(event, channel, pairs)
+            
+        name, _, interval = channel.partition('-')
+        params = {'channel': name, 'symbol': list(pairs)}
+        if name == 'ohlc' and interval:
+            params['interval'] = int(interval)
+        elif name == 'book':
+            params['depth'] = self.book_depth
+        if event == 'subscribe' and name in ('ohlc', 'book'):
+            params['snapshot'] = True
+        return {'method': event, 'params': params}
     
     async def _handle_message(self, message: str):
         """
         Override to add V2 message handling and enhanced data management
         """
         try:
-            data = json.loads(message)
+            data = json_loads(message)
             
             # V2 API message format
             if self.api_version == 'v2' and isinstance(data, dict):
@@ -93,8 +118,8 @@ class KrakenWebSocketHandlerV2(EnhancedWebSocketHandler):
                     await self._handle_v2_message(data)
                     return
             
-            # V1 API - use parent handler but enhance with data manager
-            await super()._handle_message(message)
+            # V1 API - use parent handler on the decoded message, enhanced with data manager
+            await self._handle_data(data, message)
             
             # Additional processing for OHLC data
             if isinstance(data, list) and len(data) >= 4:
@@ -103,8 +128,10 @@ class KrakenWebSocketHandlerV2(EnhancedWebSocketHandler):
                 if channel_type == 'ohlc':
                     interval = metadata.get('interval', 1)
                     candle_data = data[1]
+                    if isinstance(candle_data, list):
+                        candle_data = self._convert_v1_ohlc(candle_data, interval)
                     if isinstance(candle_data, dict):
-                        self.data_manager.update_ohlc_data(pair, candle_data, interval)
+                        self._handle_ohlc(pair, candle_data, interval)
                         
         except Exception as e:
             self.logger.error(f"Error in enhanced message handler: {e}")
@@ -128,15 +155,39 @@ class KrakenWebSocketHandlerV2(EnhancedWebSocketHandler):
                 pair = candle.get('symbol')
                 interval = candle.get('interval', 1)
                 if pair:
-                    self.data_manager.update_ohlc_data(pair, candle, interval)
+                    self._handle_ohlc(pair, candle, interval)
                     
         elif channel == 'trade':
             # Handle trades similar to V1
             for trade in data.get('data', []):
                 pair = trade.get('symbol')
                 if pair:
-                    self._handle_trades(pair, [self._convert_v2_trade(trade)])
+                    bars = self._handle_trades(pair, [self._convert_v2_trade(trade)])
+                    if bars and self.dispatcher.subscribers:
+                        await self._publish_bars(bars)
     
+    def _handle_ohlc(self, pair: str, candle: Dict, interval: int):
+        """Store one V1 or V2 candle in the data manager"""
+        return self.data_manager.update_ohlc_data(pair, candle, interval)
+        
+    def _convert_v1_ohlc(self, v1_candle: List, interval: int) -> Dict:
+        """
+        Convert a V1 OHLC array to the candle dict the data manager expects
+        
+        V1 sends [time, etime, open, high, low, close, vwap, volume, count],
+        where time is the last update and etime the end of the interval, so
+        the candle's open time is etime minus the interval.
+        """
+        return {
+            'time': float(v1_candle[1]) - interval * 60,
+            'open': v1_candle[2],
+            'high': v1_candle[3],
+            'low': v1_candle[4],
+            'close': v1_candle[5],
+            'volume': v1_candle[7],
+            'count': v1_candle[8]
+        }
+        
     def _convert_v2_ticker(self, v2_ticker: Dict) -> Dict:
         """
         Convert V2 ticker format to V1 format for compatibility
@@ -208,10 +259,10 @@ class KrakenWebSocketHandlerV2(EnhancedWebSocketHandler):
                 'timestamp': datetime.now().isoformat()
             }
             
-            # Add recent trades if available
+            # Add recent trades and rolling trade flow if available
             if pair in self._trades_data:
-                recent_trades = self._trades_data[pair][-10:]  # Last 10 trades
-                snapshot[pair]['recent_trades'] = recent_trades
+                snapshot[pair]['recent_trades'] = self.get_trades_data(pair, 10)  # Last 10 trades
+                snapshot[pair]['trade_stats'] = self.get_trade_stats(pair)
         
         return snapshot
 
@@ -239,7 +290,6 @@ class ThreadedWebSocketManager:
         self.thread.start()
         
         # Wait for the handler to be ready
-        import time
         timeout = 10
         start = time.time()
         while not self.handler.connected and time.time() - start < timeout:
@@ -292,6 +342,205 @@ class ThreadedWebSocketManager:
             return self.handler.get_technical_indicators(pair, interval)
 
 
+class SharedStatePublisher(KrakenWebSocketHandlerV2):
+    """
+    Handler for the ingestor process that mirrors every ticker, book and
+    OHLC update into a SharedMarketState
+    """
+    
+    def __init__(self, state: SharedMarketState, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.state = state
+        
+    def _handle_ticker(self, pair: str, data: Dict):
+        super()._handle_ticker(pair, data)
+        record = self._ticker_data.get(pair)
+        if record is not None:
+            self.state.write_ticker(pair, record)
+            
+    def _handle_orderbook(self, pair: str, data: Dict):
+        super()._handle_orderbook(pair, data)
+        book = self.order_books.get(pair)
+        if book is not None:
+            self.state.write_book(pair, book)
+            
+    def _handle_ohlc(self, pair: str, candle: Dict, interval: int):
+        buffer = super()._handle_ohlc(pair, candle, interval)
+        if buffer is not None:
+            self.state.write_ohlc(pair, interval, buffer)
+        return buffer
+        
+
+async def _ingest(state: SharedMarketState, handler_kwargs: Dict, stop_event):
+    """Run a publisher until the parent sets stop_event"""
+    handler = SharedStatePublisher(state, **handler_kwargs)
+    
+    async def subscribe():
+        await handler.start()
+        await handler.subscribe('ticker', state.pairs)
+        await handler.subscribe('book', state.pairs)
+        await handler.subscribe_ohlc_multi(state.pairs, state.intervals)
+        
+    setup = asyncio.create_task(subscribe())
+    try:
+        while not stop_event.is_set():
+            state.write_status(handler.connected)
+            await asyncio.sleep(0.5)
+    finally:
+        setup.cancel()
+        await asyncio.gather(setup, return_exceptions=True)
+        await handler.close()
+        state.write_status(False)
+        
+
+def _run_ingestor(spec: Dict, handler_kwargs: Dict, stop_event):
+    """Entry point of the ingestor process"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    state = SharedMarketState.attach(spec)
+    try:
+        asyncio.run(_ingest(state, handler_kwargs, stop_event))
+    except Exception as e:
+        logging.error(f"Error in WebSocket ingestor process: {e}")
+    finally:
+        state.close()
+        
+
+class ProcessWebSocketManager:
+    """
+    Runs the WebSocket ingest in a separate process
+    
+    The child process owns the connection and all message parsing, so it
+    never competes for this process's GIL. It publishes the latest ticker,
+    top of book and OHLC candles of the given pairs into shared memory, and
+    the read methods below copy them out directly, with no IPC round trip.
+    Drop-in for ThreadedWebSocketManager where only those are needed.
+    """
+    
+    def __init__(
+        self,
+        pairs: List[str],
+        intervals: List[int] = [1],
+        ohlc_rows: int = 500,
+        handler_kwargs: Optional[Dict] = None,
+        heartbeat_timeout: float = 5.0
+    ):
+        """
+        :param pairs: Pairs to subscribe to and share
+        :param intervals: OHLC intervals in minutes to subscribe to and share
+        :param ohlc_rows: Latest candles shared per (pair, interval)
+        :param handler_kwargs: Picklable KrakenWebSocketHandlerV2 arguments
+        :param heartbeat_timeout: Seconds without an ingestor heartbeat (sent
+            every 0.5s) after which it is no longer considered connected
+        """
+        self.pairs = list(pairs)
+        self.intervals = list(intervals)
+        self.ohlc_rows = ohlc_rows
+        self.handler_kwargs = handler_kwargs or {}
+        self.heartbeat_timeout = heartbeat_timeout
+        self.state: Optional[SharedMarketState] = None
+        self.process = None
+        self._stop_event = None
+        self._running = False
+        
+    @property
+    def connected(self) -> bool:
+        """
+        Whether the ingestor is alive, reports a connection and has written
+        a heartbeat recently; a crashed or hung ingestor leaves the shared
+        flag set, so the flag alone is not enough
+        """
+        state = self.state
+        return (
+            state is not None and state.connected
+            and time.time() - state.heartbeat < self.heartbeat_timeout
+            and self.process is not None and self.process.is_alive()
+        )
+        
+    def start(self, timeout: float = 10):
+        """Start the ingestor process and wait up to timeout for it to connect"""
+        if self._running:
+            return
+            
+        self.state = SharedMarketState.create(self.pairs, self.intervals, self.ohlc_rows)
+        # Spawn, not fork: the child must not inherit this process's event loop or threads
+        context = multiprocessing.get_context('spawn')
+        self._stop_event = context.Event()
+        self.process = context.Process(
+            target=_run_ingestor,
+            args=(self.state.spec(), self.handler_kwargs, self._stop_event),
+            name='websocket-ingestor',
+            daemon=True
+        )
+        self.process.start()
+        self._running = True
+        
+        start = time.time()
+        while not self.connected and time.time() - start < timeout and self.process.is_alive():
+            time.sleep(0.1)
+            
+    def stop(self, timeout: float = 5):
+        """Stop the ingestor process and free the shared memory"""
+        if not self._running:
+            return
+            
+        self._running = False
+        self._stop_event.set()
+        self.process.join(timeout=timeout)
+        if self.process.is_alive():
+            logging.warning("WebSocket ingestor did not stop in time, terminating it")
+            self.process.terminate()
+            self.process.join()
+            
+        self.state.close()
+        self.state.unlink()
+        self.state = None
+        
+    def get_ticker_data(self, pairs: List[str] = None) -> Dict:
+        """Latest tickers in the shape of EnhancedWebSocketHandler.get_ticker_data"""
+        if self.state is None:
+            return {}
+            
+        result = {}
+        for pair in pairs or self.pairs:
+            ticker = self.state.read_ticker(pair)
+            if ticker is not None:
+                ticker['status'] = 'active'
+                result[pair] = ticker
+            elif pairs:
+                result[pair] = {
+                    'ask': 0.0, 'bid': 0.0, 'close': 0.0, 'volume': 0.0, 'vwap': 0.0,
+                    'trades': 0, 'low': 0.0, 'high': 0.0, 'open': 0.0,
+                    'last_update': None, 'status': 'initializing'
+                }
+        return result
+        
+    def get_top_of_book(self, pair: str) -> Optional[Dict]:
+        """Best bid/ask with volumes, mid and spread, or None while out of sync"""
+        return self.state.read_book(pair) if self.state is not None else None
+        
+    def get_ohlc_dataframe(self, pair: str, interval: int = 1, 
+                           lookback: Optional[int] = None) -> pd.DataFrame:
+        """Latest shared candles as a DataFrame"""
+        if self.state is None:
+            return pd.DataFrame()
+        return self.state.get_ohlc_dataframe(pair, interval, lookback)
+        
+    def get_market_snapshot(self, pairs: List[str]) -> Dict:
+        """Ticker and top of book per pair; no trades or indicators cross the process boundary"""
+        tickers = self.get_ticker_data(pairs)
+        return {
+            pair: {
+                'ticker': tickers.get(pair, {}),
+                'book': self.get_top_of_book(pair),
+                'timestamp': datetime.now().isoformat()
+            }
+            for pair in pairs
+        }
+
+
 # Example usage function
 def create_enhanced_websocket_handler(
     api_version: str = 'v1',
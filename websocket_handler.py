@@ -2,14 +2,253 @@ import asyncio
 import json
 import logging
 import socket
+import time
 import traceback
 import websockets
 from typing import List, Dict, Optional, Set, Callable
 from datetime import datetime
-from collections import defaultdict
 import psutil
 import ssl
 
+from callback_dispatcher import CallbackDispatcher, OverflowPolicy
+from candle_aggregator import Bar, CandleAggregator
+from order_book import OrderBook
+from tick_recorder import TickRecorder
+from trade_tape import TradeTape
+
+try:
+    import orjson
+    json_loads = orjson.loads
+    JSON_BACKEND = "orjson"
+except ImportError:
+    # Fallback to the standard library decoder
+    json_loads = json.loads
+    JSON_BACKEND = "json"
+
+# Assets the V1 API names differently from the V2 API and ccxt
+WS_ASSET_NAMES = {"BTC": "XBT", "DOGE": "XDG"}
+
+
+class TickerRecord:
+    """
+    Latest ticker values for one pair, updated in place on every tick
+
+    Reads like the ticker dicts it replaces (``record["close"]``,
+    ``record.get(...)``, ``to_dict()``); the update time is kept as an epoch
+    float and only formatted when a dict is requested.
+    """
+
+    __slots__ = ("ask", "bid", "close", "volume", "vwap", "trades", "low", "high", "open", "updated_at")
+
+    FIELDS = ("ask", "bid", "close", "volume", "vwap", "trades", "low", "high", "open")
+
+    def __init__(self):
+        self.ask = 0.0
+        self.bid = 0.0
+        self.close = 0.0
+        self.volume = 0.0
+        self.vwap = 0.0
+        self.trades = 0
+        self.low = 0.0
+        self.high = 0.0
+        self.open = 0.0
+        self.updated_at = 0.0
+
+    def __getitem__(self, key: str):
+        if key in self.FIELDS:
+            return getattr(self, key)
+        if key == "last_update":
+            return self.last_update
+        raise KeyError(key)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.FIELDS or key == "last_update"
+
+    def get(self, key: str, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    @property
+    def last_update(self) -> Optional[str]:
+        return datetime.fromtimestamp(self.updated_at).isoformat() if self.updated_at else None
+
+    def to_dict(self) -> Dict:
+        data = {field: getattr(self, field) for field in self.FIELDS}
+        data["last_update"] = self.last_update
+        return data
+
+    def copy(self) -> Dict:
+        return self.to_dict()
+
+
+class WebSocketShard:
+    """
+    One WebSocket connection carrying a subset of the handler's pairs.
+    
+    Each shard connects, reconnects and resubscribes on its own and feeds
+    raw frames into the handler's shared message queue, so a reconnect on
+    one shard never stalls data arriving on the others.
+    """
+
+    def __init__(self, handler: "EnhancedWebSocketHandler", index: int):
+        self.handler = handler
+        self.index = index
+        self.name = f"shard-{index}"
+        self.websocket = None
+        self.state = "disconnected"
+        self.connected_event = asyncio.Event()
+        self.subscriptions: Dict[str, Set[str]] = {}  # channel -> pairs
+        self.message_count = 0
+        self.reconnect_count = 0
+
+    @property
+    def connected(self) -> bool:
+        return self.websocket is not None and self.connected_event.is_set()
+
+    @property
+    def pair_count(self) -> int:
+        return len(set().union(*self.subscriptions.values())) if self.subscriptions else 0
+
+    async def send(self, message: Dict) -> bool:
+        """Send a message if connected; returns whether it was sent."""
+        if not self.connected:
+            return False
+        await self.websocket.send(json.dumps(message))
+        return True
+
+    async def subscribe(self, channel: str, pairs: List[str]) -> bool:
+        """Record a subscription and send it as one batched message if connected."""
+        self.subscriptions.setdefault(channel, set()).update(pairs)
+        return await self.send(self.handler._subscription_message("subscribe", channel, pairs))
+
+    async def unsubscribe(self, channel: str, pairs: List[str]) -> bool:
+        """Forget a subscription and send the unsubscribe message if connected."""
+        subscribed = self.subscriptions.get(channel)
+        if subscribed is not None:
+            subscribed.difference_update(pairs)
+            if not subscribed:
+                del self.subscriptions[channel]
+        return await self.send(self.handler._subscription_message("unsubscribe", channel, pairs))
+
+    async def _resubscribe(self):
+        """Resubscribe to this shard's channels after (re)connect, one message per channel."""
+        for channel, pairs in list(self.subscriptions.items()):
+            try:
+                await self.send(self.handler._subscription_message("subscribe", channel, sorted(pairs)))
+                self.handler.logger.info(f"[{self.name}] Resubscribed to {channel} for {len(pairs)} pairs")
+            except Exception as e:
+                self.handler.logger.error(f"[{self.name}] Error resubscribing to {channel}: {e}")
+
+    def _set_disconnected(self):
+        self.websocket = None
+        self.connected_event.clear()
+        self.handler._update_connection_state()
+
+    async def run(self):
+        """
+        Maintain this shard's connection with comprehensive error handling and logging.
+        """
+        handler = self.handler
+        logger = handler.logger
+
+        while handler._running:
+            try:
+                # Log detailed connection attempt information
+                logger.info(f"[{self.name}] Attempting WebSocket connection to {handler.wss_uri}")
+                logger.info("Connection parameters:")
+                logger.info(f"  Max Retries: {handler.max_retries}")
+                logger.info(f"  Retry Delay: {handler.retry_delay}")
+
+                # Scan network connections before attempting to connect
+                handler._scan_network_connections()
+
+                # Track when we started the connection attempt
+                connection_start = datetime.now()
+                self.state = "connecting"
+
+                async with websockets.connect(
+                    handler.wss_uri, 
+                    ssl=handler.ssl_context,
+                    ping_interval=20,    # Ping every 20 seconds
+                    ping_timeout=10      # Wait 10 seconds for ping response
+                ) as websocket:
+                    # Mark a successful connection
+                    self.websocket = websocket
+                    self.state = "connected"
+                    self.connected_event.set()
+                    handler._update_connection_state()
+
+                    # Log that the connection succeeded
+                    handler._log_connection_attempt(success=True)
+
+                    logger.info(f"[{self.name}] WebSocket connected successfully!")
+                    elapsed = datetime.now() - connection_start
+                    logger.info(f"Connection established in {elapsed}")
+                    logger.info(f"Local Address: {websocket.local_address}")
+                    logger.info(f"Remote Address: {websocket.remote_address}")
+                    
+                    # Resubscribe to any channels we had subscribed to before disconnect
+                    await self._resubscribe()
+
+                    # Main connection loop
+                    queue = handler._message_queue
+                    while handler._running:
+                        try:
+                            message = await websocket.recv()
+                            self.message_count += 1
+                            if handler.recorder is not None:
+                                handler.recorder.record(message)
+                            await queue.put(message)
+                        except websockets.ConnectionClosed:
+                            logger.warning(f"[{self.name}] WebSocket connection closed")
+                            break
+                        except Exception as recv_error:
+                            logger.error(f"[{self.name}] Error receiving message: {recv_error}")
+                            break
+
+            except Exception as connect_error:
+                # Log the failure
+                handler._log_connection_attempt(success=False, error=connect_error)
+
+                logger.error(f"[{self.name}] WebSocket Connection Failed!")
+                logger.error(f"Error Details: {type(connect_error).__name__}")
+                logger.error(f"Error Message: {str(connect_error)}")
+                logger.error(traceback.format_exc())
+
+                # Additional checks for specific error strings
+                if "Name or service not known" in str(connect_error):
+                    logger.critical("DNS resolution failed. Check your network and WebSocket URI.")
+                elif "Connection refused" in str(connect_error):
+                    logger.critical("Connection refused. Verify WebSocket server is running.")
+                elif "SSL" in str(connect_error):
+                    logger.critical("SSL/TLS connection error. Check your SSL configuration.")
+
+                # Update connection status
+                self.state = "error"
+                self._set_disconnected()
+                self.reconnect_count += 1
+                handler._reconnect_count += 1
+
+                # Retry after delay if still running
+                if handler._running:
+                    await asyncio.sleep(handler.retry_delay)
+
+            finally:
+                # Cleanup connection state; if not in an error state, set to disconnected
+                if self.state != "error":
+                    self.state = "disconnected"
+                self._set_disconnected()
+
+    def metrics(self) -> Dict:
+        return {
+            "state": self.state,
+            "pairs": self.pair_count,
+            "messages": self.message_count,
+            "reconnects": self.reconnect_count,
+        }
+
 
 class EnhancedWebSocketHandler:
     def __init__(
@@ -19,7 +258,13 @@ class EnhancedWebSocketHandler:
         retry_delay: int = 5,
         portfolio_manager=None,
         ssl_context: Optional[ssl.SSLContext] = None,
-        logger: Optional[logging.Logger] = None
+        logger: Optional[logging.Logger] = None,
+        book_depth: int = 10,
+        trade_capacity: int = 1000,
+        trade_windows: tuple = (60.0, 300.0),
+        num_shards: int = 1,
+        recorder: Optional[TickRecorder] = None,
+        candle_intervals: tuple = (1, 5, 15, 60)
     ):
         """
         Initialize the WebSocket handler with enhanced configuration and logging.
@@ -30,6 +275,12 @@ class EnhancedWebSocketHandler:
         :param portfolio_manager: Optional portfolio manager to update
         :param ssl_context: Optional SSL context for secure connections
         :param logger: Optional logger to use (if None, uses a default logger)
+        :param book_depth: Order book depth to subscribe to and keep per pair
+        :param trade_capacity: Number of recent trades kept per pair
+        :param trade_windows: Rolling trade aggregate windows in seconds
+        :param num_shards: Number of WebSocket connections to spread pairs across
+        :param recorder: Optional TickRecorder that logs every received frame for replay
+        :param candle_intervals: Bar intervals in minutes built from the trade stream
         """
         # If no logger is provided, create or get a module-level logger
         self.logger = logger if logger else logging.getLogger(__name__)
@@ -40,11 +291,14 @@ class EnhancedWebSocketHandler:
         self.retry_delay = retry_delay
         self.ssl_context = ssl_context or self._create_default_ssl_context()
 
+        if num_shards <= 0:
+            raise ValueError(f"num_shards must be positive, got {num_shards}")
+
         # WebSocket and Connection State
-        self.websocket = None
+        self.shards = [WebSocketShard(self, i) for i in range(num_shards)]
+        self._pair_shards: Dict[str, WebSocketShard] = {}
         self._running = False
-        self._connected = False
-        self._connected_event = asyncio.Event()
+        self._connected_event = asyncio.Event()  # Set while any shard is connected
         
         # Enhanced Connection Tracking
         self.connection_state = "disconnected"
@@ -59,17 +313,22 @@ class EnhancedWebSocketHandler:
         # Portfolio and Callback Management
         self.portfolio_manager = portfolio_manager
         self._tasks = []
-        self._callbacks: Dict[str, List[Callable]] = defaultdict(list)
+        self.dispatcher = CallbackDispatcher()
 
         # Queues and Synchronization
         self._message_queue: Optional[asyncio.Queue] = None
-        self._callback_queue: Optional[asyncio.Queue] = None
         self._data_lock: Optional[asyncio.Lock] = None
 
         # Data Caches
-        self._ticker_data: Dict[str, Dict] = {}
-        self._orderbook_data: Dict[str, Dict] = {}
-        self._trades_data: Dict[str, List] = {}
+        self._ticker_data: Dict[str, TickerRecord] = {}
+        self.book_depth = book_depth
+        self.order_books: Dict[str, OrderBook] = {}
+        self._book_resyncs: Dict[str, asyncio.Task] = {}  # In flight, dropped when done
+        self.recorder = recorder
+        self.trade_capacity = trade_capacity
+        self.trade_windows = trade_windows
+        self._trades_data: Dict[str, TradeTape] = {}
+        self.candles = CandleAggregator(candle_intervals)
 
         # Performance and Logging Metrics
         self._message_count = 0
@@ -77,9 +336,6 @@ class EnhancedWebSocketHandler:
         self._reconnect_count = 0
         self._last_update = datetime.now()
 
-        # Track active subscriptions
-        self._active_subscriptions: Set[str] = set()
-
     def _create_default_ssl_context(self) -> ssl.SSLContext:
         """
         Create a default SSL context with enhanced security settings.
@@ -156,15 +412,68 @@ class EnhancedWebSocketHandler:
 
     @property
     def connected(self) -> bool:
-        """Property to check if websocket is connected."""
-        return self._connected and self.websocket is not None
+        """Property to check if any shard's websocket is connected."""
+        return any(shard.connected for shard in self.shards)
+
+    @property
+    def websocket(self):
+        """The first shard's connection, for callers sending raw messages."""
+        return self.shards[0].websocket
+
+    def _update_connection_state(self):
+        """Derive the overall connection state from the shards."""
+        connected = sum(shard.connected for shard in self.shards)
+        if connected:
+            self._connected_event.set()
+            self.connection_state = "connected" if connected == len(self.shards) else "degraded"
+        else:
+            self._connected_event.clear()
+            if any(shard.state == "error" for shard in self.shards):
+                self.connection_state = "error"
+            else:
+                self.connection_state = "disconnected"
+
+    def shard_for(self, pair: str) -> WebSocketShard:
+        """Shard carrying a pair; new pairs go to the least loaded shard."""
+        shard = self._pair_shards.get(pair)
+        if shard is None:
+            counts = {s.index: 0 for s in self.shards}
+            for assigned in self._pair_shards.values():
+                counts[assigned.index] += 1
+            shard = self._pair_shards[pair] = self.shards[min(counts, key=counts.get)]
+        return shard
+
+    def _partition(self, pairs: List[str]) -> Dict[WebSocketShard, List[str]]:
+        """Group pairs by the shard that carries them."""
+        groups: Dict[WebSocketShard, List[str]] = {}
+        for pair in pairs:
+            groups.setdefault(self.shard_for(pair), []).append(pair)
+        return groups
+
+    def _subscription_message(self, event: str, channel: str, pairs: List[str]) -> Dict:
+        """
+        Build a V1 subscribe/unsubscribe message for one channel.
+
+        OHLC subscriptions are named like their channel, "ohlc-<interval>",
+        so each interval is tracked and resubscribed on its own.
+        """
+        name, _, interval = channel.partition("-")
+        message = {
+            "event": event,
+            "pair": list(pairs),
+            "subscription": {"name": name},
+        }
+        if name == "book":
+            message["subscription"]["depth"] = self.book_depth
+        elif name == "ohlc" and interval:
+            message["subscription"]["interval"] = int(interval)
+        return message
 
     @property
     def is_ready(self) -> bool:
         """Property to check if websocket is fully initialized and ready."""
         return (
             self._message_queue is not None
-            and self._callback_queue is not None
             and self._data_lock is not None
         )
 
@@ -172,102 +481,9 @@ class EnhancedWebSocketHandler:
         """Initialize async components."""
         if not self.is_ready:
             self._message_queue = asyncio.Queue()
-            self._callback_queue = asyncio.Queue()
             self._data_lock = asyncio.Lock()
             self.logger.info("Async components initialized")
 
-    async def _maintain_connection(self):
-        """
-        Maintain WebSocket connection with comprehensive error handling and logging.
-        """
-        while self._running:
-            try:
-                # Log detailed connection attempt information
-                self.logger.info(f"Attempting WebSocket connection to {self.wss_uri}")
-                self.logger.info("Connection parameters:")
-                self.logger.info(f"  Max Retries: {self.max_retries}")
-                self.logger.info(f"  Retry Delay: {self.retry_delay}")
-
-                # Scan network connections before attempting to connect
-                self._scan_network_connections()
-
-                # Track when we started the connection attempt
-                connection_start = datetime.now()
-
-                async with websockets.connect(
-                    self.wss_uri, 
-                    ssl=self.ssl_context,
-                    ping_interval=20,    # Ping every 20 seconds
-                    ping_timeout=10      # Wait 10 seconds for ping response
-                ) as websocket:
-                    # Mark a successful connection
-                    self.websocket = websocket
-                    self._connected = True
-                    self.connection_state = "connected"
-                    self._connected_event.set()
-
-                    # Log that the connection succeeded
-                    self._log_connection_attempt(success=True)
-
-                    self.logger.info("WebSocket connected successfully!")
-                    elapsed = datetime.now() - connection_start
-                    self.logger.info(f"Connection established in {elapsed}")
-                    self.logger.info(f"Local Address: {websocket.local_address}")
-                    self.logger.info(f"Remote Address: {websocket.remote_address}")
-                    
-                    # Resubscribe to any channels we had subscribed to before disconnect
-                    await self._resubscribe()
-
-                    # Main connection loop
-                    while self._running:
-                        try:
-                            message = await websocket.recv()
-                            await self._message_queue.put(message)
-                        except websockets.ConnectionClosed:
-                            self.logger.warning("WebSocket connection closed")
-                            break
-                        except Exception as recv_error:
-                            self.logger.error(f"Error receiving message: {recv_error}")
-                            break
-
-            except Exception as connect_error:
-                # Log the failure
-                self._log_connection_attempt(success=False, error=connect_error)
-
-                self.logger.error("WebSocket Connection Failed!")
-                self.logger.error(f"Error Details: {type(connect_error).__name__}")
-                self.logger.error(f"Error Message: {str(connect_error)}")
-                self.logger.error(traceback.format_exc())
-
-                # Additional checks for specific error strings
-                if "Name or service not known" in str(connect_error):
-                    self.logger.critical("DNS resolution failed. Check your network and WebSocket URI.")
-                elif "Connection refused" in str(connect_error):
-                    self.logger.critical("Connection refused. Verify WebSocket server is running.")
-                elif "SSL" in str(connect_error):
-                    self.logger.critical("SSL/TLS connection error. Check your SSL configuration.")
-
-                # Update connection status
-                self.connection_state = "error"
-                self._connected = False
-                self._connected_event.clear()
-                self.websocket = None
-                self._reconnect_count += 1
-
-                # Retry after delay if still running
-                if self._running:
-                    await asyncio.sleep(self.retry_delay)
-
-            finally:
-                # Cleanup connection state
-                self._connected = False
-                self._connected_event.clear()
-                self.websocket = None
-
-                # If not in an error state, set to disconnected
-                if self.connection_state != "error":
-                    self.connection_state = "disconnected"
-
     async def start(self):
         """
         Start the WebSocket handler with comprehensive initialization.
@@ -285,14 +501,15 @@ class EnhancedWebSocketHandler:
         self.logger.info(f"  URI: {self.wss_uri}")
         self.logger.info(f"  Max Retries: {self.max_retries}")
         self.logger.info(f"  Retry Delay: {self.retry_delay} seconds")
+        self.logger.info(f"  Shards: {len(self.shards)}")
 
-        # Start background tasks
-        processor_task = asyncio.create_task(self._process_messages())
-        callback_task = asyncio.create_task(self._process_callbacks())
-        connection_task = asyncio.create_task(self._maintain_connection())
-        self._tasks.extend([processor_task, callback_task, connection_task])
+        # Start background tasks: one message processor, one connection per shard
+        self._tasks.append(asyncio.create_task(self._process_messages()))
+        self._tasks.append(asyncio.create_task(self._close_bars()))
+        self._tasks.extend(asyncio.create_task(shard.run()) for shard in self.shards)
+        self.dispatcher.start()
 
-        # Wait for initial connection
+        # Wait for the first shard to connect
         await self._connected_event.wait()
 
         # Optional: Send authentication if required (assuming _authenticate exists or will be added)
@@ -322,7 +539,7 @@ class EnhancedWebSocketHandler:
         if not self.connected:
             self.connection_state = "connecting"
             await self._connected_event.wait()
-            self.connection_state = "connected"
+            self._update_connection_state()
 
     #
     # --- REPLACED METHOD #1: Updated _wait_for_initial_data ---
@@ -361,20 +578,6 @@ class EnhancedWebSocketHandler:
             except Exception as e:
                 self.logger.error(f"Error processing message: {e}")
 
-    async def _process_callbacks(self):
-        """Process callbacks in a separate task."""
-        while self._running:
-            try:
-                channel, data = await self._callback_queue.get()
-                for callback in self._callbacks[channel]:
-                    try:
-                        await callback(data)
-                    except Exception as e:
-                        self.logger.error(f"Error in callback: {e}")
-                self._callback_queue.task_done()
-            except Exception as e:
-                self.logger.error(f"Error processing callback: {e}")
-
     #
     # --- REPLACED METHOD #2: Updated subscribe_to_btc ---
     #
@@ -399,70 +602,85 @@ class EnhancedWebSocketHandler:
                     break
                 await asyncio.sleep(0.5)
             
-            # Then subscribe to additional pairs
+            # Then subscribe to additional pairs, batched per shard
             additional_pairs = [
                 "XBTUSDT",     # Bitcoin/USDT
                 "XETHZUSD",    # Ethereum/USD
                 "ETHUSDT",     # Ethereum/USDT
             ]
             
-            for pair in additional_pairs:
-                try:
-                    self.logger.info(f"Subscribing to additional pair {pair}")
-                    await self.subscribe("ticker", [pair])
-                    await asyncio.sleep(0.5)  # Small delay between subscriptions
-                except Exception as e:
-                    self.logger.error(f"Failed to subscribe to {pair}: {e}")
+            try:
+                self.logger.info(f"Subscribing to additional pairs {additional_pairs}")
+                await self.subscribe("ticker", additional_pairs)
+            except Exception as e:
+                self.logger.error(f"Failed to subscribe to {additional_pairs}: {e}")
                     
         except Exception as e:
             self.logger.error(f"Failed to subscribe to primary BTC pair: {e}")
             raise  # Re-raise for higher-level handling if needed
 
-    async def _resubscribe(self):
-        """Resubscribe to all active subscriptions after reconnect."""
-        self.logger.info("Resubscribing to active channels...")
-        for subscription in self._active_subscriptions:
-            try:
-                channel, pairs_str = subscription.split(":", 1)
-                pairs = pairs_str.split(",")
-                await self.subscribe(channel, pairs)
-                self.logger.info(f"Resubscribed to {channel} for pairs {pairs}")
-            except Exception as e:
-                self.logger.error(f"Error resubscribing: {e}")
-
-    async def subscribe(self, channel: str, pairs: List[str], callback: Optional[Callable] = None):
-        """Subscribe to a channel with an optional callback."""
-        await self.ensure_connection()
-
-        message = {
-            "event": "subscribe",
-            "pair": pairs,
-            "subscription": {"name": channel},
-        }
-        self.logger.debug(f"Sending subscription message: {message}")
+    async def subscribe(
+        self,
+        channel: str,
+        pairs: List[str],
+        callback: Optional[Callable] = None,
+        policy: Optional[OverflowPolicy] = None,
+        maxsize: Optional[int] = None
+    ):
+        """
+        Subscribe to a channel with an optional callback.
+        
+        The callback gets its own bounded mailbox; ``policy`` chooses what
+        happens when it falls behind (by default ticker, book and ohlc
+        coalesce to the latest value per pair and trades block the reader).
+        Book callbacks receive ``OrderBook.depth()`` snapshots rather than
+        the raw deltas.
+        
+        Pairs are spread across the shards and each shard gets one batched
+        message. A shard that is down subscribes when it reconnects.
+        """
+        if not self.is_ready:
+            await self.init_async()
 
         if callback:
-            key = f"{channel}:{','.join(pairs)}"
-            self._callbacks[key].append(callback)
+            self.dispatcher.subscribe(channel, pairs, callback, policy, maxsize)
 
-        if self.connected:
+        for shard, shard_pairs in self._partition(pairs).items():
             try:
-                await self.websocket.send(json.dumps(message))
-                self._active_subscriptions.add(f"{channel}:{','.join(pairs)}")
-                self.logger.info(f"Subscribed to {channel} for pairs {pairs}")
+                if await shard.subscribe(channel, shard_pairs):
+                    self.logger.info(f"[{shard.name}] Subscribed to {channel} for pairs {shard_pairs}")
+                else:
+                    self.logger.warning(
+                        f"[{shard.name}] Disconnected, {channel} for pairs {shard_pairs} will subscribe on reconnect"
+                    )
             except Exception as e:
-                self.logger.error(f"Error sending subscription message: {e}")
-        else:
-            self.logger.warning(f"Attempted to subscribe while disconnected: {channel} {pairs}")
+                self.logger.error(f"[{shard.name}] Error sending subscription message: {e}")
 
     async def _handle_message(self, message: str):
-        """Process incoming WebSocket messages with proper locking."""
+        """Decode an incoming WebSocket message and dispatch it."""
+        try:
+            data = json_loads(message)
+        except ValueError as e:
+            self._message_count += 1
+            self._error_count += 1
+            self.logger.error(f"Error decoding message: {e}, message: {message}")
+            return
+            
+        await self._handle_data(data, message)
+        
+    async def _handle_data(self, data, message):
+        """
+        Process a decoded WebSocket message.
+        
+        The channel handlers are synchronous, so they cannot interleave with
+        other coroutines and need no lock.
+        """
         self._message_count += 1
         self._last_update = datetime.now()
 
         try:
-            data = json.loads(message)
-            self.logger.debug(f"Received message: {message}")
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug(f"Received message: {message}")
 
             # Handle system messages (dict-based)
             if isinstance(data, dict):
@@ -473,33 +691,87 @@ class EnhancedWebSocketHandler:
 
             # Handle data messages (list-based)
             if isinstance(data, list):
-                channel_name = data[2]
-                pair = data[3]
-
-                async with self._data_lock:
-                    if channel_name == "ticker":
-                        self._handle_ticker(pair, data[1])
-                    elif channel_name == "trade":
-                        self._handle_trades(pair, data[1])
-                        if self.portfolio_manager:
-                            try:
-                                balances = await self.portfolio_manager.get_balances()
-                                self.logger.info(f"Updated balances: {balances}")
-                            except Exception as e:
-                                self.logger.error(f"Error fetching balances: {e}")
-                    elif channel_name == "book":
-                        self._handle_orderbook(pair, data[1])
-
-                subscription_key = f"{channel_name}:{pair}"
-                if subscription_key in self._callbacks:
-                    await self._callback_queue.put((subscription_key, data[1]))
+                channel_name = data[-2]
+                pair = data[-1]
+                payload = data[1]
+
+                if channel_name == "ticker":
+                    self._handle_ticker(pair, payload)
+                elif channel_name == "trade":
+                    bars = self._handle_trades(pair, payload)
+                    if bars and self.dispatcher.subscribers:
+                        await self._publish_bars(bars)
+                    if self.portfolio_manager:
+                        try:
+                            balances = await self.portfolio_manager.get_balances()
+                            self.logger.info(f"Updated balances: {balances}")
+                        except Exception as e:
+                            self.logger.error(f"Error fetching balances: {e}")
+                elif channel_name.startswith("book"):
+                    # Book updates touching both sides carry one dict per side
+                    if len(data) > 4:
+                        payload = {**data[1], **data[2]}
+                    channel_name = "book"
+                    self._handle_orderbook(pair, payload)
+
+                    # Book messages are deltas, which cannot be coalesced, so
+                    # subscribers get the whole book after each one instead
+                    if not self.dispatcher.subscribers.get(f"book:{pair}"):
+                        return
+                    book = self.order_books.get(pair)
+                    if book is None or not book.synced:
+                        return
+                    payload = {'pair': pair, 'updated_at': book.updated_at, **book.depth()}
+
+                if self.dispatcher.subscribers:
+                    await self.dispatcher.publish(channel_name, pair, payload)
 
         except Exception as e:
             self._error_count += 1
             self.logger.error(f"Error processing message: {e}, message: {message}")
 
     def _handle_ticker(self, pair: str, data: Dict):
-        """Handle ticker data updates with improved logging and validation."""
+        """Handle ticker data updates, writing into the pair's TickerRecord."""
+        try:
+            # Fast path: well-formed V1 ticker, parsed without intermediate dicts
+            a, b, c, v, p, t, l, h, o = (
+                data["a"], data["b"], data["c"], data["v"], data["p"],
+                data["t"], data["l"], data["h"], data["o"]
+            )
+            ask = float(a[0] if isinstance(a, list) else a)
+            bid = float(b[0] if isinstance(b, list) else b)
+            close = float(c[0] if isinstance(c, list) else c)
+            volume = float(v[1] if len(v) > 1 else v[0])
+            vwap = float(p[1] if len(p) > 1 else p[0])
+            trades = int(float(t[1] if len(t) > 1 else t[0]))
+            low = float(l[1] if len(l) > 1 else l[0])
+            high = float(h[1] if len(h) > 1 else h[0])
+            open_ = float(o[0] if isinstance(o, list) else o)
+        except Exception:
+            self._handle_ticker_fallback(pair, data)
+            return
+
+        record = self._ticker_data.get(pair)
+        if record is None:
+            record = self._ticker_data[pair] = TickerRecord()
+
+        record.ask = ask
+        record.bid = bid
+        record.close = close
+        record.volume = volume
+        record.vwap = vwap
+        record.trades = trades
+        record.low = low
+        record.high = high
+        record.open = open_
+        record.updated_at = time.time()
+
+        # Log a warning if key values are zero, but store them anyway
+        if ask == 0.0 or bid == 0.0 or close == 0.0:
+            self.logger.warning(f"Ticker for {pair} has zero in ask/bid/close. Storing partial data anyway.")
+
+    def _handle_ticker_fallback(self, pair: str, data: Dict):
+        """Field-by-field ticker parsing with per-field error reporting."""
         try:
             required_fields = ["a", "b", "c", "v", "p", "t", "l", "h", "o"]
             missing_fields = [field for field in required_fields if field not in data]
@@ -524,7 +796,6 @@ class EnhancedWebSocketHandler:
                 "low": safe_float(data["l"][1] if len(data["l"]) > 1 else data["l"][0], "low"),
                 "high": safe_float(data["h"][1] if len(data["h"]) > 1 else data["h"][0], "high"),
                 "open": safe_float(data["o"], "open"),
-                "last_update": datetime.now().isoformat()
             }
 
             # Log a warning if key values are zero, but store them anyway
@@ -535,98 +806,197 @@ class EnhancedWebSocketHandler:
             ):
                 self.logger.warning(f"Ticker for {pair} has zero in ask/bid/close. Storing partial data anyway.")
 
-            self._ticker_data[pair] = new_ticker_data
-            self.logger.debug(f"Updated ticker data for {pair}")
+            record = self._ticker_data.get(pair)
+            if record is None:
+                record = self._ticker_data[pair] = TickerRecord()
+            for field, value in new_ticker_data.items():
+                setattr(record, field, value)
+            record.updated_at = time.time()
 
         except Exception as e:
             self.logger.error(f"Error handling ticker data for {pair}: {e}, data: {data}")
             self.logger.debug(f"Raw ticker data received: {data}")
 
-    def _handle_trades(self, pair: str, trades: List):
-        """Handle trades data updates with improved validation."""
-        if pair not in self._trades_data:
-            self._trades_data[pair] = []
+    def _handle_trades(self, pair: str, trades: List) -> List[Bar]:
+        """
+        Append trades to the pair's tape, which keeps the latest trade_capacity,
+        and to the pair's live candles; returns the bars the trades closed.
+        """
+        tape = self._trades_data.get(pair)
+        if tape is None:
+            tape = self._trades_data[pair] = TradeTape(self.trade_capacity, self.trade_windows)
+        add_trade = self.candles.add_trade
+        bars = []
 
         try:
             for trade in trades:
                 if len(trade) >= 4:
-                    self._trades_data[pair].append({
-                        "price": float(trade[0]),
-                        "volume": float(trade[1]),
-                        "time": float(trade[2]),
-                        "side": "sell" if trade[3] == "s" else "buy",
-                        "market": trade[4] if len(trade) > 4 else "market",
-                        "misc": trade[5] if len(trade) > 5 else ""
-                    })
+                    price = float(trade[0])
+                    volume = float(trade[1])
+                    time_ = float(trade[2])
+                    tape.append(
+                        price,
+                        volume,
+                        time_,
+                        -1 if trade[3] == "s" else 1,
+                        len(trade) > 4 and trade[4] == "m"
+                    )
+                    closed = add_trade(pair, price, volume, time_)
+                    if closed:
+                        bars.extend(closed)
                 else:
                     self.logger.warning(f"Incomplete trade data received for {pair}: {trade}")
-
-            # Keep only the latest 1000 trades
-            self._trades_data[pair] = self._trades_data[pair][-1000:]
             
         except Exception as e:
             self.logger.error(f"Error handling trades for {pair}: {e}")
 
+        return bars
+
+    async def _publish_bars(self, bars: List[Bar]):
+        """Deliver closed bars to subscribers of their ``bar-<interval>`` channel."""
+        for bar in bars:
+            await self.dispatcher.publish(f"bar-{bar.interval}", bar.pair, bar.to_dict())
+
+    async def _close_bars(self):
+        """Close the bars of pairs that have gone quiet, once a second."""
+        while self._running:
+            await asyncio.sleep(1.0)
+            try:
+                bars = self.candles.advance(time.time())
+                if bars and self.dispatcher.subscribers:
+                    await self._publish_bars(bars)
+            except Exception as e:
+                self.logger.error(f"Error closing candles: {e}")
+
+    async def subscribe_bars(
+        self,
+        pairs: List[str],
+        interval: int,
+        callback: Callable,
+        policy: Optional[OverflowPolicy] = None,
+        maxsize: Optional[int] = None
+    ):
+        """
+        Call ``callback`` with each closed bar of an interval, as a dict.
+
+        Bars are built from the trade channel, which is subscribed to for any
+        of the pairs not already on it; no REST polling is involved.
+        """
+        if interval not in self.candles.intervals:
+            raise ValueError(f"Interval {interval} is not aggregated, have {self.candles.intervals}")
+        if not self.is_ready:
+            await self.init_async()
+
+        self.dispatcher.subscribe(f"bar-{interval}", pairs, callback, policy, maxsize)
+
+        missing = [pair for pair in pairs if pair not in self.shard_for(pair).subscriptions.get("trade", ())]
+        if missing:
+            await self.subscribe("trade", missing)
+
+    def get_bars(self, pair: str, interval: int = 1, lookback: Optional[int] = None,
+                 include_forming: bool = False):
+        """Live bars built from trades, as a DataFrame indexed by open time."""
+        return self.candles.get_bars(pair, interval, lookback, include_forming)
+
+    def ws_pair(self, pair: str) -> str:
+        """Pair as the V1 API names it, e.g. BTC/USD -> XBT/USD."""
+        base, sep, quote = pair.partition("/")
+        if not sep:
+            return pair
+        return f"{WS_ASSET_NAMES.get(base, base)}/{WS_ASSET_NAMES.get(quote, quote)}"
+
+    def live_bars(self, pair: str, interval: int, lookback: int, include_forming: bool = False):
+        """
+        Live bars that can stand in for a REST OHLC request, or None.
+
+        The pair (in any naming ws_pair understands) must be subscribed to
+        trades, the aggregator must hold ``lookback`` closed bars, and the
+        latest of them must have ended within one interval of now. Otherwise
+        trades are not reaching the aggregator and the caller should fall
+        back to REST, seeding the aggregator with the response. The same
+        holds while the bars include the partial bar trades started in.
+        """
+        pair = self.ws_pair(pair)
+        if interval not in self.candles.intervals:
+            return None
+        shard = self._pair_shards.get(pair)
+        if shard is None or pair not in shard.subscriptions.get("trade", ()):
+            return None
+        if self.candles.bar_count(pair, interval) < lookback:
+            return None
+        end = self.candles.last_closed_end(pair, interval)
+        if end is None or time.time() - end > interval * 60:
+            return None
+        bars = self.candles.get_bars(pair, interval, lookback, include_forming)
+        partial = self.candles.partial_start(pair, interval)
+        if partial is not None and len(bars) and bars.index[0].timestamp() <= partial:
+            return None
+        return bars
+
     def _handle_orderbook(self, pair: str, data: Dict):
-        """Handle orderbook data updates with improved validation."""
+        """Apply a book snapshot or update, resubscribing on checksum mismatch."""
         try:
-            if pair not in self._orderbook_data:
-                self._orderbook_data[pair] = {
-                    "asks": {},
-                    "bids": {},
-                    "last_update": datetime.now().isoformat()
-                }
+            book = self.order_books.get(pair)
+            if book is None:
+                book = self.order_books[pair] = OrderBook(pair, self.book_depth)
 
             # Handle snapshot
-            if "as" in data and "bs" in data:
-                self._orderbook_data[pair]["asks"].clear()
-                self._orderbook_data[pair]["bids"].clear()
-
-                for price, volume, timestamp in data["as"]:
-                    if float(volume) > 0:
-                        self._orderbook_data[pair]["asks"][price] = [
-                            float(price),
-                            float(volume),
-                            timestamp
-                        ]
-
-                for price, volume, timestamp in data["bs"]:
-                    if float(volume) > 0:
-                        self._orderbook_data[pair]["bids"][price] = [
-                            float(price),
-                            float(volume),
-                            timestamp
-                        ]
+            if "as" in data or "bs" in data:
+                book.apply_snapshot(data)
+                return
 
-            else:
-                # Handle updates
-                if "a" in data:  # Asks updates
-                    for price, volume, timestamp in data["a"]:
-                        if float(volume) == 0:
-                            self._orderbook_data[pair]["asks"].pop(price, None)
-                        else:
-                            self._orderbook_data[pair]["asks"][price] = [
-                                float(price),
-                                float(volume),
-                                timestamp
-                            ]
-
-                if "b" in data:  # Bids updates
-                    for price, volume, timestamp in data["b"]:
-                        if float(volume) == 0:
-                            self._orderbook_data[pair]["bids"].pop(price, None)
-                        else:
-                            self._orderbook_data[pair]["bids"][price] = [
-                                float(price),
-                                float(volume),
-                                timestamp
-                            ]
-
-            self._orderbook_data[pair]["last_update"] = datetime.now().isoformat()
+            # Updates are meaningless until a fresh snapshot arrives
+            if not book.synced:
+                return
+
+            if not book.apply_update(data):
+                self.logger.warning(f"Order book checksum mismatch for {pair}, resubscribing")
+                self._schedule_book_resync(pair)
 
         except Exception as e:
             self.logger.error(f"Error handling orderbook for {pair}: {e}, data: {data}")
 
+    def _schedule_book_resync(self, pair: str):
+        """Request a fresh book snapshot for a pair, once at a time."""
+        if pair in self._book_resyncs:
+            return
+        self._book_resyncs[pair] = asyncio.create_task(self._resync_book(pair))
+
+    async def _resync_book(self, pair: str):
+        """Resubscribe to a pair's book so the exchange sends a new snapshot."""
+        shard = self.shard_for(pair)
+        try:
+            for event in ("unsubscribe", "subscribe"):
+                await shard.send(self._subscription_message(event, "book", [pair]))
+            self.logger.info(f"[{shard.name}] Resubscribed to book for {pair}")
+        except Exception as e:
+            self.logger.error(f"Error resubscribing to book for {pair}: {e}")
+        finally:
+            self._book_resyncs.pop(pair, None)
+
+    def get_trade_tape(self, pair: str) -> Optional[TradeTape]:
+        """Trade tape for a pair, if any trades have been received."""
+        return self._trades_data.get(pair)
+
+    def get_trades_data(self, pair: str, limit: Optional[int] = None) -> List[Dict]:
+        """Latest trades for a pair as dicts, oldest first."""
+        tape = self._trades_data.get(pair)
+        return tape.to_dicts(limit) if tape is not None else []
+
+    def get_trade_stats(self, pair: str, window: float = 60.0) -> Optional[Dict]:
+        """Rolling VWAP, volume imbalance and trade rate over the window ending now."""
+        tape = self._trades_data.get(pair)
+        if tape is None:
+            return None
+        if float(window) not in tape.windows:
+            tape.add_window(window)
+        return tape.stats(window, now=time.time())
+
+    def get_order_book(self, pair: str) -> Optional[OrderBook]:
+        """Live order book for a pair, if subscribed and in sync."""
+        book = self.order_books.get(pair)
+        return book if book is not None and book.synced else None
+
     def _all_data_initializing(self) -> bool:
         """
         Check if all pairs in _ticker_data have 'status' == 'initializing' 
@@ -682,10 +1052,10 @@ class EnhancedWebSocketHandler:
                 if pair in self._ticker_data:
                     data = self._ticker_data[pair]
                     # Check if we have valid data
-                    if data.get("close", 0) > 0 or data.get("ask", 0) > 0 or data.get("bid", 0) > 0:
+                    if data.close > 0 or data.ask > 0 or data.bid > 0:
                         all_zeros = False
-                    result[pair] = data.copy()
-                    result[pair].setdefault("status", "active")
+                    result[pair] = data.to_dict()
+                    result[pair]["status"] = "active"
                 else:
                     result[pair] = get_default_ticker()
             
@@ -697,8 +1067,8 @@ class EnhancedWebSocketHandler:
         # Return all cached data
         return {
             p: {
-                **data,
-                "status": data.get("status", "active")
+                **data.to_dict(),
+                "status": "active"
             }
             for p, data in self._ticker_data.items()
         }
@@ -730,7 +1100,6 @@ class EnhancedWebSocketHandler:
             return
 
         self._running = False
-        self._connected = False
         self._connected_event.clear()
         self.connection_state = "disconnected"
 
@@ -739,25 +1108,30 @@ class EnhancedWebSocketHandler:
         self.logger.info(f"Final network connections before shutdown: {len(final_connections)}")
 
         # Cancel all tasks with logging
-        for task in self._tasks:
+        tasks = self._tasks + list(self._book_resyncs.values())
+        for task in tasks:
             if not task.done():
                 task.cancel()
                 self.logger.debug(f"Cancelled task: {task}")
 
         try:
-            await asyncio.gather(*self._tasks, return_exceptions=True)
+            await asyncio.gather(*tasks, return_exceptions=True)
         except asyncio.CancelledError:
             self.logger.info("Tasks cancelled during shutdown")
+        await self.dispatcher.stop()
+
+        if self.recorder is not None:
+            self.recorder.close()
 
-        if self.websocket:
-            await self.websocket.close()
-            self.websocket = None
-            self.logger.info("WebSocket connection closed")
+        for shard in self.shards:
+            if shard.websocket:
+                await shard.websocket.close()
+                shard.websocket = None
+                self.logger.info(f"[{shard.name}] WebSocket connection closed")
 
         # Clear queues with logging
         for queue_name, queue in [
-            ("message queue", self._message_queue), 
-            ("callback queue", self._callback_queue)
+            ("message queue", self._message_queue)
         ]:
             if queue:
                 queue_size = queue.qsize()
@@ -774,35 +1148,26 @@ class EnhancedWebSocketHandler:
 
     async def unsubscribe(self, channel: str, pairs: List[str]):
         """Unsubscribe from a channel."""
-        await self.ensure_connection()
+        await self.dispatcher.unsubscribe(channel, pairs)
 
-        message = {
-            "event": "unsubscribe",
-            "pair": pairs,
-            "subscription": {"name": channel},
-        }
-
-        if self.connected:
+        for shard, shard_pairs in self._partition(pairs).items():
             try:
-                await self.websocket.send(json.dumps(message))
-                subscription_key = f"{channel}:{','.join(pairs)}"
-                self._active_subscriptions.discard(subscription_key)
-                self._callbacks.pop(subscription_key, None)
-                self.logger.info(f"Unsubscribed from {channel} for pairs {pairs}")
+                if await shard.unsubscribe(channel, shard_pairs):
+                    self.logger.info(f"[{shard.name}] Unsubscribed from {channel} for pairs {shard_pairs}")
+                else:
+                    self.logger.warning(f"[{shard.name}] Unsubscribed from {channel} {shard_pairs} while disconnected")
             except Exception as e:
-                self.logger.error(f"Error sending unsubscribe message: {e}")
-        else:
-            self.logger.warning(f"Attempted to unsubscribe while disconnected: {channel} {pairs}")
+                self.logger.error(f"[{shard.name}] Error sending unsubscribe message: {e}")
 
     async def ping(self) -> bool:
-        """Send a ping message to check connection health."""
+        """Send a ping message on every shard to check connection health."""
         if not self.connected:
             return False
 
         try:
             message = {"event": "ping", "reqid": self._message_count + 1}
-            await self.websocket.send(json.dumps(message))
-            return True
+            results = [await shard.send(message) for shard in self.shards]
+            return all(results)
         except Exception as e:
             self.logger.error(f"Error sending ping: {e}")
             return False
@@ -815,14 +1180,18 @@ class EnhancedWebSocketHandler:
             "error_count": self._error_count,
             "reconnect_count": self._reconnect_count,
             "last_update": self._last_update.isoformat(),
-            "active_subscriptions": len(self._active_subscriptions),
+            "active_subscriptions": sum(
+                len(pairs) for shard in self.shards for pairs in shard.subscriptions.values()
+            ),
             "connection_status": self.connection_state,
             "queue_size": queue_size,
+            "shards": [shard.metrics() for shard in self.shards],
+            "subscribers": self.dispatcher.metrics(),
         }
 
     def clear_data_caches(self):
         """Clear all data caches."""
         self._ticker_data.clear()
-        self._orderbook_data.clear()
+        self.order_books.clear()
         self._trades_data.clear()
         self.logger.info("All data caches cleared")